@@ -39,10 +39,12 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "rest_framework",
     "main.apps.MainConfig",
 ]
 
 MIDDLEWARE = [
+    "main.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -93,6 +95,99 @@ else:
     }
 
 
+# Число одновременных запросов к randomuser.me при загрузке пользователей
+RANDOM_USER_FETCH_CONCURRENCY = int(
+    os.getenv('RANDOM_USER_FETCH_CONCURRENCY', 1)
+)
+# Размер очередей между стадиями конвейера загрузки (в батчах)
+RANDOM_USER_PIPELINE_QUEUE_SIZE = int(
+    os.getenv('RANDOM_USER_PIPELINE_QUEUE_SIZE', 4)
+)
+# Размер порции вставки при записи пользователей (кроме PostgreSQL,
+# где используется COPY): строки одной порции целиком лежат в памяти
+RANDOM_USER_WRITE_BATCH_SIZE = int(
+    os.getenv('RANDOM_USER_WRITE_BATCH_SIZE', 100)
+)
+# Повторы запросов к API: число повторов и границы паузы
+# (экспоненциальная с джиттером), секунды
+RANDOM_USER_FETCH_RETRIES = int(os.getenv('RANDOM_USER_FETCH_RETRIES', 3))
+RANDOM_USER_RETRY_BASE_DELAY = float(
+    os.getenv('RANDOM_USER_RETRY_BASE_DELAY', 0.5)
+)
+RANDOM_USER_RETRY_MAX_DELAY = float(
+    os.getenv('RANDOM_USER_RETRY_MAX_DELAY', 10)
+)
+# Размыкатель: после стольких ошибок подряд API не опрашивается
+# RANDOM_USER_CIRCUIT_RESET секунд
+RANDOM_USER_CIRCUIT_FAILURES = int(
+    os.getenv('RANDOM_USER_CIRCUIT_FAILURES', 5)
+)
+RANDOM_USER_CIRCUIT_RESET = float(os.getenv('RANDOM_USER_CIRCUIT_RESET', 30))
+# Границы адаптивного размера батча и целевая задержка ответа API, с
+RANDOM_USER_MIN_BATCH_SIZE = int(os.getenv('RANDOM_USER_MIN_BATCH_SIZE', 50))
+RANDOM_USER_MAX_BATCH_SIZE = int(
+    os.getenv('RANDOM_USER_MAX_BATCH_SIZE', 5000)
+)
+RANDOM_USER_TARGET_LATENCY = float(
+    os.getenv('RANDOM_USER_TARGET_LATENCY', 2.0)
+)
+# Резерв провалидированных пользователей для ручных загрузок: воркер
+# пополняет его до HIGH, когда в нём не больше LOW записей (HIGH=0 —
+# резерв отключён)
+RANDOM_USER_RESERVOIR_LOW = int(os.getenv('RANDOM_USER_RESERVOIR_LOW', 500))
+RANDOM_USER_RESERVOIR_HIGH = int(
+    os.getenv('RANDOM_USER_RESERVOIR_HIGH', 1000)
+)
+# Задание со статусом running без отметки воркера дольше стольких
+# секунд считается брошенным (воркер умер) и завершается как failed
+INGESTION_JOB_STALE_TIMEOUT = float(
+    os.getenv('INGESTION_JOB_STALE_TIMEOUT', 600)
+)
+# Адрес API randomuser.me (или локальной замены из run_fake_api)
+RANDOM_USER_API_URL = os.getenv(
+    'RANDOM_USER_API_URL', 'https://randomuser.me/api/'
+)
+# Повторная загрузка того же человека: 'ignore' (пропустить)
+# или 'update' (обновить существующую запись)
+RANDOM_USER_CONFLICT_MODE = os.getenv('RANDOM_USER_CONFLICT_MODE', 'ignore')
+# Пагинация списка пользователей: 'offset' (номера страниц)
+# или 'cursor' (keyset по pk, не зависит от глубины страницы)
+USER_LIST_PAGINATION = os.getenv('USER_LIST_PAGINATION', 'offset')
+# Источник общего числа пользователей: 'exact' (COUNT(*)),
+# 'counter' (счётчик, обновляемый при загрузке) или
+# 'estimate' (статистика планировщика PostgreSQL)
+USER_COUNT_MODE = os.getenv('USER_COUNT_MODE', 'exact')
+# Сколько секунд хранить отрендеренные страницы списка и профиля
+# в кэше (CACHES['default']); 0 отключает кэш страниц. Запись
+# пользователей в любом процессе (в том числе в воркере) сразу делает
+# их устаревшими: версия набора, входящая в ключ, хранится в DB
+USER_PAGE_CACHE_TIMEOUT = int(os.getenv('USER_PAGE_CACHE_TIMEOUT', 300))
+# Сколько секунд хранить числа фасетов списка (пол, страна); кэш
+# сбрасывается и раньше — при записи пользователей
+USER_FACET_CACHE_TIMEOUT = int(os.getenv('USER_FACET_CACHE_TIMEOUT', 3600))
+# Сколько ближайших пользователей показывать в профиле
+NEARBY_USERS_COUNT = int(os.getenv('NEARBY_USERS_COUNT', 5))
+
+# Бюджет запроса: более долгие или с большим числом SQL-запросов
+# логируются с уровнем WARNING (main.middleware)
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_QUERIES = int(os.getenv('SLOW_REQUEST_QUERIES', 50))
+
+# Локальное хранилище фото пользователей (main.thumbnails): каталог,
+# предельный общий размер и размер одного фото в байтах, таймаут
+# скачивания в секундах. THUMBNAIL_PROXY=0 — ссылки прямо на randomuser.me
+THUMBNAIL_PROXY = os.getenv('THUMBNAIL_PROXY', '1') == '1'
+THUMBNAIL_DIR = os.getenv('THUMBNAIL_DIR', BASE_DIR / 'thumbnails')
+THUMBNAIL_CACHE_MAX_BYTES = int(
+    os.getenv('THUMBNAIL_CACHE_MAX_BYTES', 100 * 1024 * 1024)
+)
+THUMBNAIL_MAX_BYTES = int(os.getenv('THUMBNAIL_MAX_BYTES', 1024 * 1024))
+THUMBNAIL_FETCH_TIMEOUT = float(os.getenv('THUMBNAIL_FETCH_TIMEOUT', 5))
+
+# Каталог для снимков метрик процессов (несколько воркеров);
+# без него /metrics показывает метрики только своего процесса
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1.0))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -162,5 +257,16 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        'main.pipeline': {
+            'handlers': ['console'],
+            'level': 'DEBUG',
+            'propagate': False,
+        },
+        # Строки key=value с замерами каждого запроса
+        'main.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
@@ -0,0 +1,183 @@
+from django.http import StreamingHttpResponse
+from rest_framework import generics
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from main import geo, stats
+from main.export import iter_user_chunks, ndjson_lines
+from main.models import IngestionJob, RandomUser, UserStat
+from main.serializers import (
+    IngestionJobSerializer, NearbyUserSerializer, RandomUserReadSerializer
+)
+
+
+class RandomUserCursorPagination(CursorPagination):
+    """Курсорная пагинация по убыванию pk, как на странице списка."""
+    ordering = '-pk'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class UserListAPIView(generics.ListAPIView):
+    """Список пользователей в JSON с курсорной пагинацией."""
+    queryset = RandomUser.objects.all()
+    serializer_class = RandomUserReadSerializer
+    pagination_class = RandomUserCursorPagination
+
+
+class UserDetailAPIView(generics.RetrieveAPIView):
+    """Один пользователь по pk."""
+    queryset = RandomUser.objects.all()
+    serializer_class = RandomUserReadSerializer
+    lookup_url_kwarg = 'user_pk'
+
+
+class RandomUserAPIView(APIView):
+    """Один или несколько (?count=) случайных пользователей."""
+    MAX_COUNT = 100
+
+    def get(self, request):
+        try:
+            count = int(request.query_params.get('count', 1))
+        except ValueError:
+            raise ValidationError({'count': 'A valid integer is required.'})
+        if not 1 <= count <= self.MAX_COUNT:
+            raise ValidationError(
+                {'count': f'Must be between 1 and {self.MAX_COUNT}.'}
+            )
+        users = RandomUser.objects.random(count=count)
+        if not users:
+            raise NotFound('No users available')
+        return Response(RandomUserReadSerializer(users, many=True).data)
+
+
+class NearbyUsersAPIView(APIView):
+    """
+    Поиск пользователей по координатам:
+    ?lat=&lon=&k= — k ближайших к точке, с расстоянием distance_km;
+    ?bbox=min_lat,min_lon,max_lat,max_lon&limit= — не больше limit
+    пользователей в прямоугольнике (min_lon > max_lon — через 180-й
+    меридиан) в порядке индекса по ячейкам сетки.
+    """
+    DEFAULT_K = 10
+    MAX_K = 100
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 1000
+
+    def get(self, request):
+        params = request.query_params
+        if 'bbox' in params:
+            return self._in_bbox(params)
+        latitude = self._coordinate(params.get('lat'), 'lat', 90)
+        longitude = self._coordinate(params.get('lon'), 'lon', 180)
+        k = self._count(params, 'k', self.DEFAULT_K, self.MAX_K)
+        users = geo.nearest(latitude, longitude, k=k)
+        return Response(NearbyUserSerializer(users, many=True).data)
+
+    def _in_bbox(self, params):
+        parts = params['bbox'].split(',')
+        if len(parts) != 4:
+            raise ValidationError(
+                {'bbox': 'Expected min_lat,min_lon,max_lat,max_lon.'}
+            )
+        min_lat, max_lat = (
+            self._coordinate(parts[i], 'bbox', 90) for i in (0, 2)
+        )
+        min_lon, max_lon = (
+            self._coordinate(parts[i], 'bbox', 180) for i in (1, 3)
+        )
+        if min_lat > max_lat:
+            raise ValidationError({'bbox': 'min_lat exceeds max_lat.'})
+        limit = self._count(
+            params, 'limit', self.DEFAULT_LIMIT, self.MAX_LIMIT
+        )
+        users = RandomUser.objects.filter(
+            geo.bbox_q(min_lat, min_lon, max_lat, max_lon)
+        ).order_by('geo_cell', 'latitude', 'longitude')[:limit]
+        return Response(NearbyUserSerializer(users, many=True).data)
+
+    @staticmethod
+    def _coordinate(value, name, bound):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValidationError({name: 'A valid number is required.'})
+        if not -bound <= number <= bound:
+            raise ValidationError(
+                {name: f'Must be between {-bound} and {bound}.'}
+            )
+        return number
+
+    @staticmethod
+    def _count(params, name, default, maximum):
+        try:
+            value = int(params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: 'A valid integer is required.'})
+        if not 1 <= value <= maximum:
+            raise ValidationError(
+                {name: f'Must be between 1 and {maximum}.'}
+            )
+        return value
+
+
+class UserStatsAPIView(APIView):
+    """
+    Число пользователей по полу, стране и домену email из таблицы
+    статистики: время ответа не зависит от размера RandomUser.
+    ?limit= ограничивает число значений каждого признака.
+    """
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 1000
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        if not 1 <= limit <= self.MAX_LIMIT:
+            raise ValidationError(
+                {'limit': f'Must be between 1 and {self.MAX_LIMIT}.'}
+            )
+        genders = stats.get_breakdown(UserStat.GENDER)
+        data = {'total': sum(count for _, count in genders)}
+        for dimension in stats.DIMENSIONS:
+            breakdown = (
+                genders if dimension == UserStat.GENDER
+                else stats.get_breakdown(dimension, limit)
+            )
+            data[dimension] = [
+                {'value': value, 'count': count}
+                for value, count in breakdown[:limit]
+            ]
+        return Response(data)
+
+
+class UserStreamView(APIView):
+    """
+    Выгрузка всех пользователей в формате NDJSON (по объекту на строку).
+    Таблица читается порциями, а ответ отдаётся потоком, поэтому
+    память сервера не зависит от размера таблицы.
+    """
+    CHUNK_SIZE = 2000
+
+    def get(self, request):
+        chunks = iter_user_chunks(
+            fields=RandomUserReadSerializer.Meta.fields,
+            chunk_size=self.CHUNK_SIZE
+        )
+        response = StreamingHttpResponse(
+            ndjson_lines(chunks), content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'inline; filename="users.ndjson"'
+        return response
+
+
+class IngestionJobAPIView(generics.RetrieveAPIView):
+    """Прогресс задания на загрузку пользователей."""
+    queryset = IngestionJob.objects.all()
+    serializer_class = IngestionJobSerializer
+    lookup_url_kwarg = 'job_pk'
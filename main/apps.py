@@ -1,6 +1,7 @@
 import logging
 
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 
@@ -11,6 +12,12 @@ class MainConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "main"
 
+    def ready(self):
+        from main import signals  # noqa: F401
+        from main.search import create_postgres_search_indexes
+
+        post_migrate.connect(create_postgres_search_indexes, sender=self)
+
 
 
 
@@ -0,0 +1,153 @@
+import itertools
+import logging
+import platform
+import random
+import time
+import tracemalloc
+
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from main.fake_api import generate_user
+from main.services import RandomUserService
+
+SCENARIOS = ('validate', 'write', 'end_to_end')
+# Поля, которые сервис запрашивает у API (параметр inc)
+FIXTURE_FIELDS = ('gender', 'name', 'phone', 'email', 'location', 'picture')
+
+
+class _Rollback(Exception):
+    pass
+
+
+def fixture_records(count, seed=0):
+    """
+    Фиксированные записи в формате ответа API: один и тот же seed
+    всегда даёт одинаковые данные, сеть не нужна.
+    """
+    rng = random.Random(seed)
+    return [generate_user(rng, FIXTURE_FIELDS) for _ in range(count)]
+
+
+def _validate(service, records):
+    service.validate_users(records)
+
+
+def _write(service, users):
+    service.write_users(users)
+
+
+def _end_to_end(service, records):
+    source = iter(records)
+    service.fetch_users = lambda count: list(itertools.islice(source, count))
+    # Без резерва: иначе замер зависел бы от того, сколько записей
+    # в ReservoirUser, а не от кода загрузки
+    service._load_from_reservoir = lambda total: 0
+    service.load_initial_users(total=len(records), concurrency=1)
+
+
+def _prepare(scenario, service, records):
+    """Входные данные сценария, подготовленные вне замера."""
+    if scenario == 'write':
+        return _write, service.validate_users(records)
+    if scenario == 'end_to_end':
+        return _end_to_end, records
+    return _validate, records
+
+
+def _run_once(scenario, records, trace_memory):
+    """
+    Один прогон сценария в транзакции, которая откатывается,
+    поэтому данные в базе не меняются и прогоны не мешают друг другу.
+    Возвращает (секунды, пик памяти в байтах или None).
+    """
+    service = RandomUserService()
+    func, data = _prepare(scenario, service, records)
+    peak = None
+    try:
+        with transaction.atomic():
+            if trace_memory:
+                tracemalloc.start()
+                start_memory = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            try:
+                func(service, data)
+            finally:
+                elapsed = time.perf_counter() - started
+                if trace_memory:
+                    peak = tracemalloc.get_traced_memory()[1] - start_memory
+                    tracemalloc.stop()
+            raise _Rollback
+    except _Rollback:
+        pass
+    return elapsed, peak
+
+
+def run_benchmarks(sizes, scenarios=SCENARIOS, seed=0, memory=True,
+                   repeat=3):
+    """
+    Замеряет записи в секунду и пиковую память каждого сценария
+    на каждом размере. Скорость — лучший из repeat прогонов без
+    tracemalloc, который сам по себе замедляет код в разы;
+    память меряется отдельным прогоном.
+    """
+    results = {}
+    # Предупреждения о невалидных записях, прогресс загрузки на каждом
+    # батче и журнал запросов DEBUG исказили бы и скорость, и память
+    logging.disable(logging.WARNING)
+    try:
+        with override_settings(DEBUG=False):
+            for size in sizes:
+                records = fixture_records(size, seed)
+                for scenario in scenarios:
+                    elapsed = min(
+                        _run_once(scenario, records, False)[0]
+                        for _ in range(max(1, repeat))
+                    )
+                    result = {
+                        'records': size,
+                        'seconds': round(elapsed, 4),
+                        'records_per_second': round(size / elapsed, 1),
+                    }
+                    if memory:
+                        _, peak = _run_once(scenario, records, True)
+                        result['peak_memory_kb'] = round(peak / 1024, 1)
+                    results[f'{scenario}:{size}'] = result
+    finally:
+        logging.disable(logging.NOTSET)
+    return {
+        'environment': {
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+
+
+def compare_with_baseline(report, baseline, tolerance=0.25):
+    """
+    Список регрессий относительно базовой линии: скорость ниже
+    более чем на tolerance или пик памяти выше более чем на tolerance.
+    Замеры, которых нет в базовой линии, не сравниваются.
+    """
+    regressions = []
+    baseline_results = baseline.get('results', {})
+    for name, result in report['results'].items():
+        expected = baseline_results.get(name)
+        if expected is None:
+            continue
+        min_rate = expected['records_per_second'] * (1 - tolerance)
+        if result['records_per_second'] < min_rate:
+            regressions.append(
+                f"{name}: {result['records_per_second']:.0f} records/s, "
+                f"baseline {expected['records_per_second']:.0f}"
+            )
+        if 'peak_memory_kb' in result and 'peak_memory_kb' in expected:
+            max_memory = expected['peak_memory_kb'] * (1 + tolerance)
+            if result['peak_memory_kb'] > max_memory:
+                regressions.append(
+                    f"{name}: peak memory {result['peak_memory_kb']:.0f} KB, "
+                    f"baseline {expected['peak_memory_kb']:.0f} KB"
+                )
+    return regressions
@@ -0,0 +1,66 @@
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+from main.models import Counter, RandomUser
+
+logger = logging.getLogger(__name__)
+
+
+def exact_user_count():
+    """Точное число пользователей: SELECT COUNT(*)."""
+    return RandomUser.objects.count()
+
+
+def counter_user_count():
+    """
+    Число пользователей из счётчика, который RandomUserService
+    обновляет в той же транзакции, что и вставку.
+    """
+    return Counter.objects.get_value(
+        Counter.USER_COUNT, initial=exact_user_count
+    )
+
+
+def estimated_user_count():
+    """
+    Приблизительное число пользователей без сканирования таблицы.
+    В PostgreSQL берётся из статистики планировщика (pg_class.reltuples),
+    в остальных базах — из кэшированного диапазона id.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class "
+                "WHERE oid = %s::regclass",
+                [RandomUser._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # reltuples = -1, пока таблица ни разу не анализировалась
+        if row and row[0] >= 0:
+            return row[0]
+        return exact_user_count()
+    lo, hi = RandomUser.objects.id_range()
+    return 0 if lo is None else hi - lo + 1
+
+
+_PROVIDERS = {
+    'exact': exact_user_count,
+    'counter': counter_user_count,
+    'estimate': estimated_user_count,
+}
+
+
+def get_user_count(mode=None):
+    """
+    Возвращает число пользователей способом из настройки USER_COUNT_MODE:
+    exact, counter или estimate.
+    """
+    if mode is None:
+        mode = getattr(settings, 'USER_COUNT_MODE', 'exact')
+    provider = _PROVIDERS.get(mode)
+    if provider is None:
+        logger.warning(f"Unknown USER_COUNT_MODE {mode!r}, using exact")
+        provider = exact_user_count
+    return provider()
@@ -0,0 +1,112 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from main.models import RandomUser
+
+EXPORT_FIELDS = (
+    'id', 'gender', 'first_name', 'last_name',
+    'phone', 'email', 'location', 'picture',
+)
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def iter_user_chunks(fields=EXPORT_FIELDS, chunk_size=DEFAULT_CHUNK_SIZE,
+                     min_id=None, max_id=None, shard=None, shards=1):
+    """
+    Отдаёт пользователей порциями словарей (values()) по возрастанию pk.
+    Каждая порция выбирается условием pk > последний_pk LIMIT chunk_size,
+    поэтому память не растёт с размером таблицы, а запросы не
+    замедляются к концу выгрузки. min_id/max_id задают диапазон
+    id (включительно). shard из shards — часть для параллельной
+    выгрузки: пользователи с pk % shards == shard. Части не зависят
+    от диапазона id на момент запуска, поэтому процессы, запущенные
+    в разное время, не пересекаются и не оставляют пропусков, а
+    добавленные во время выгрузки строки попадают в свою часть.
+    Среди fields должно быть поле id.
+    """
+    queryset = RandomUser.objects.order_by('pk').values(*fields)
+    if shard is not None:
+        if not 0 <= shard < shards:
+            raise ValueError(f"shard must be in [0, {shards})")
+        queryset = queryset.alias(
+            shard_index=F('pk') % shards
+        ).filter(shard_index=shard)
+    if max_id is not None:
+        queryset = queryset.filter(pk__lte=max_id)
+    last_pk = None if min_id is None else min_id - 1
+    return _iter_chunks(queryset, chunk_size, last_pk)
+
+
+def _iter_chunks(queryset, chunk_size, last_pk):
+    while True:
+        chunk = queryset
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1]['id']
+
+
+def _to_json(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def ndjson_lines(chunks):
+    """Один JSON-объект на строку."""
+    for rows in chunks:
+        for row in rows:
+            yield _to_json(row) + '\n'
+
+
+def csv_lines(chunks, fields=EXPORT_FIELDS):
+    """CSV с заголовком; location записывается JSON-строкой."""
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.pop()
+    for rows in chunks:
+        for row in rows:
+            writer.writerow([
+                _to_json(row[field]) if field == 'location' else row[field]
+                for field in fields
+            ])
+        yield buffer.pop()
+
+
+def columnar_lines(chunks, fields=EXPORT_FIELDS):
+    """
+    Компактный колоночный формат: одна строка JSON на порцию,
+    {"count": N, "columns": {"поле": [значения...]}}. Имена полей
+    не повторяются в каждой записи, а однотипные значения идут
+    подряд, поэтому файл меньше и лучше сжимается.
+    """
+    for rows in chunks:
+        columns = {field: [row[field] for row in rows] for field in fields}
+        yield _to_json({'count': len(rows), 'columns': columns}) + '\n'
+
+
+class _LineBuffer:
+    """Минимальный файловый объект для csv.writer."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, value):
+        self._parts.append(value)
+
+    def pop(self):
+        value = ''.join(self._parts)
+        self._parts = []
+        return value
+
+
+FORMATS = {
+    'csv': csv_lines,
+    'ndjson': ndjson_lines,
+    'columnar': columnar_lines,
+}
@@ -0,0 +1,80 @@
+from collections import Counter as Tally
+
+from django.conf import settings
+from django.core.cache import cache
+
+from main import stats
+from main.models import UserStat
+from main.page_cache import get_dataset_version
+
+FACETS_CACHE_KEY = 'random_user:facets'
+DEFAULT_FACET_CACHE_TIMEOUT = 3600
+# Фильтры списка пользователей: параметр запроса и колонка RandomUser
+FACET_FIELDS = ('gender', 'country')
+
+
+def get_facet_counts():
+    """
+    {(пол, страна): число} из строк UserStat.GENDER_COUNTRY. Кэшируется
+    под версией набора пользователей: запись пользователей увеличивает
+    её после коммита, и следующий запрос читает новые числа. Версия
+    лежит в DB, поэтому это верно и для загрузок воркером, у которого
+    свой кэш. Строк столько, сколько пар «пол и страна», а не
+    пользователей.
+    """
+    key = f'{FACETS_CACHE_KEY}:v{get_dataset_version()}'
+    counts = cache.get(key)
+    if counts is None:
+        rows = UserStat.objects.filter(
+            dimension=UserStat.GENDER_COUNTRY, count__gt=0
+        ).values_list('value', 'count')
+        counts = {
+            stats.split_gender_country(value): count
+            for value, count in rows
+        }
+        cache.set(key, counts, getattr(
+            settings, 'USER_FACET_CACHE_TIMEOUT', DEFAULT_FACET_CACHE_TIMEOUT
+        ))
+    return counts
+
+
+def _matches(pair, gender, country):
+    return (not gender or pair[0] == gender) and (
+        not country or pair[1] == country
+    )
+
+
+def filtered_count(gender='', country=''):
+    """Число пользователей с выбранными фильтрами без COUNT(*)."""
+    return sum(
+        count for pair, count in get_facet_counts().items()
+        if _matches(pair, gender, country)
+    )
+
+
+def facet_options(gender='', country=''):
+    """
+    {'gender': [(значение, число)], 'country': [...]} по убыванию числа
+    (пустые значения не выбираются фильтром и не показываются).
+    Числа каждого фасета учитывают фильтр по другому: при выбранной
+    стране у пола показано, сколько людей останется после выбора.
+    """
+    genders = Tally()
+    countries = Tally()
+    for pair, count in get_facet_counts().items():
+        if _matches(pair, '', country):
+            genders[pair[0]] += count
+        if _matches(pair, gender, ''):
+            countries[pair[1]] += count
+    return {
+        'gender': _ordered(genders),
+        'country': _ordered(countries),
+    }
+
+
+def _ordered(tally):
+    return sorted(
+        ((value, count) for value, count in tally.items()
+         if value and count > 0),
+        key=lambda item: (-item[1], item[0])
+    )
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import logging
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+API_VERSION = '1.4'
+MAX_RESULTS = 5000
+API_ERROR = (
+    "Uh oh, something has gone wrong. "
+    "Please tweet us @randomapi about the issue. Thank you."
+)
+PORTRAIT_BASE = 'https://randomuser.me/api/portraits/'
+FIELDS = (
+    'gender', 'name', 'location', 'email', 'login', 'registered', 'dob',
+    'phone', 'cell', 'id', 'picture', 'nat',
+)
+
+_FIRST_NAMES = {
+    'male': (
+        'James', 'John', 'Robert', 'Michael', 'William', 'David', 'Lucas',
+        'Noah', 'Oliver', 'Elias', 'Mathis', 'Hugo', 'Ivan', 'Aaron',
+    ),
+    'female': (
+        'Mary', 'Patricia', 'Jennifer', 'Linda', 'Emma', 'Olivia', 'Ava',
+        'Sofia', 'Mia', 'Chloe', 'Lea', 'Alice', 'Anna', 'Ella',
+    ),
+}
+_LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller',
+    'Davis', 'Martin', 'Bernard', 'Dubois', 'Muller', 'Schmidt', 'Novak',
+    'Rossi', 'Jensen', 'Hansen', 'Silva', 'Santos', 'Kumar',
+)
+_PLACES = (
+    ('United States', 'US', 'New York', 'New York'),
+    ('United States', 'US', 'California', 'Los Angeles'),
+    ('United Kingdom', 'GB', 'Greater London', 'London'),
+    ('France', 'FR', 'Gironde', 'Bordeaux'),
+    ('Germany', 'DE', 'Bayern', 'Munich'),
+    ('Spain', 'ES', 'Madrid', 'Madrid'),
+    ('Brazil', 'BR', 'Bahia', 'Salvador'),
+    ('Norway', 'NO', 'Oslo', 'Oslo'),
+    ('Australia', 'AU', 'Victoria', 'Melbourne'),
+    ('Canada', 'CA', 'Ontario', 'Toronto'),
+)
+
+
+class FaultConfig:
+    """
+    Какие сбои и задержки изображает сервер. Доли задаются
+    вероятностью на запрос (invalid_record_rate — на запись).
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0,
+                 api_error_rate=0.0, truncate_rate=0.0, malformed_rate=0.0,
+                 invalid_record_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.api_error_rate = api_error_rate
+        self.truncate_rate = truncate_rate
+        self.malformed_rate = malformed_rate
+        self.invalid_record_rate = invalid_record_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def chance(self, rate):
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def delay(self):
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0
+        return self.latency + extra
+
+
+def generate_user(rng, fields=FIELDS, portrait_base=PORTRAIT_BASE):
+    """
+    Одна запись в формате ответа randomuser.me. Ссылки на фото
+    начинаются с portrait_base.
+    """
+    gender = rng.choice(('male', 'female'))
+    first = rng.choice(_FIRST_NAMES[gender])
+    last = rng.choice(_LAST_NAMES)
+    country, nat, state, city = rng.choice(_PLACES)
+    token = f'{rng.getrandbits(40):010x}'
+    portrait = rng.randrange(100)
+    folder = 'men' if gender == 'male' else 'women'
+    user = {
+        'gender': gender,
+        'name': {
+            'title': 'Mr' if gender == 'male' else 'Ms',
+            'first': first,
+            'last': last,
+        },
+        'location': {
+            'street': {
+                'number': rng.randrange(1, 9999),
+                'name': f'{rng.choice(_LAST_NAMES)} Street',
+            },
+            'city': city,
+            'state': state,
+            'country': country,
+            'postcode': rng.randrange(10000, 99999),
+            'coordinates': {
+                'latitude': f'{rng.uniform(-90, 90):.4f}',
+                'longitude': f'{rng.uniform(-180, 180):.4f}',
+            },
+            'timezone': {'offset': '+0:00', 'description': 'UTC'},
+        },
+        'email': f'{first.lower()}.{last.lower()}.{token}@example.com',
+        'login': {'uuid': token, 'username': f'{first.lower()}{portrait}'},
+        'registered': {'date': '2015-06-01T10:00:00.000Z', 'age': 10},
+        'dob': {'date': '1990-01-01T00:00:00.000Z', 'age': 35},
+        'phone': f'({rng.randrange(100, 999)})-{rng.randrange(1000, 9999)}',
+        'cell': f'({rng.randrange(100, 999)})-{rng.randrange(1000, 9999)}',
+        'id': {'name': 'SSN', 'value': token},
+        'picture': {
+            'large': f'{portrait_base}{folder}/{portrait}.jpg',
+            'medium': f'{portrait_base}med/{folder}/{portrait}.jpg',
+            'thumbnail': f'{portrait_base}thumb/{folder}/{portrait}.jpg',
+        },
+        'nat': nat,
+    }
+    return {field: user[field] for field in fields}
+
+
+def corrupt_user(rng, user):
+    """Портит запись так, чтобы её отклонила валидация."""
+    damage = rng.choice(('name', 'email', 'picture'))
+    if damage == 'name' and 'name' in user:
+        user['name'] = None
+    elif damage == 'email' and 'email' in user:
+        user['email'] = 'not-an-email'
+    elif 'picture' in user:
+        user['picture'] = {}
+    return user
+
+
+def render_portrait(path):
+    """
+    Картинка 1×1 PNG, цвет которой зависит от пути: разные фото
+    отличаются содержимым, одинаковые пути дают одинаковые байты.
+    """
+    color = hashlib.sha1(path.encode('utf-8')).digest()[:3]
+
+    def chunk(kind, data):
+        body = kind + data
+        return (
+            struct.pack('>I', len(data)) + body
+            + struct.pack('>I', zlib.crc32(body))
+        )
+
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 2, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(b'\x00' + color))
+        + chunk(b'IEND', b'')
+    )
+
+
+def build_response(params, faults=None, portrait_base=PORTRAIT_BASE):
+    """
+    Тело ответа на запрос с параметрами API (словарь списков,
+    как у parse_qs). Поддерживаются inc/exc, results, seed, page
+    и noinfo. Одинаковые seed и page дают одинаковых людей.
+    """
+    faults = faults or FaultConfig()
+
+    def param(name, default=None):
+        values = params.get(name)
+        return values[0] if values else default
+
+    try:
+        results = int(param('results', 1))
+    except ValueError:
+        results = 1
+    results = min(max(results, 1), MAX_RESULTS)
+    try:
+        page = max(int(param('page', 1)), 1)
+    except ValueError:
+        page = 1
+    seed = param('seed') or f'{random.getrandbits(64):016x}'
+
+    fields = FIELDS
+    if param('inc'):
+        included = set(param('inc').split(','))
+        fields = [field for field in FIELDS if field in included]
+    elif param('exc'):
+        excluded = set(param('exc').split(','))
+        fields = [field for field in FIELDS if field not in excluded]
+
+    rng = random.Random(f'{seed}:{page}')
+    users = []
+    for _ in range(results):
+        user = generate_user(rng, fields, portrait_base)
+        if faults.chance(faults.invalid_record_rate):
+            user = corrupt_user(rng, user)
+        users.append(user)
+
+    body = {'results': users}
+    if 'noinfo' not in params:
+        body['info'] = {
+            'seed': seed, 'results': results, 'page': page,
+            'version': API_VERSION,
+        }
+    return body
+
+
+class FakeRandomUserHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик запросов, повторяющий /api/ randomuser.me
+    и фото пользователей /api/portraits/.
+    """
+
+    server_version = 'FakeRandomUser/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        portrait = url.path.startswith('/api/portraits/')
+        if not portrait and url.path.rstrip('/') not in ('', '/api'):
+            self._send(404, b'{"error": "Not found"}')
+            return
+
+        faults = self.server.faults
+        delay = faults.delay()
+        if delay:
+            time.sleep(delay)
+
+        if faults.chance(faults.error_rate):
+            self._send(503, json.dumps({'error': API_ERROR}).encode())
+            return
+        if portrait:
+            self._send(
+                200, render_portrait(url.path), content_type='image/png'
+            )
+            return
+        if faults.chance(faults.api_error_rate):
+            # Настоящий API иногда отвечает ошибкой с кодом 200
+            self._send(200, json.dumps({'error': API_ERROR}).encode())
+            return
+        if faults.chance(faults.malformed_rate):
+            self._send(
+                200, b'<html><body>Bad Gateway</body></html>',
+                content_type='text/html'
+            )
+            return
+
+        params = parse_qs(url.query, keep_blank_values=True)
+        body = json.dumps(
+            build_response(params, faults, self.server.portrait_base)
+        ).encode()
+        if faults.chance(faults.truncate_rate):
+            # Обрыв соединения посреди тела ответа
+            self._send(200, body, length=len(body), send=len(body) // 2)
+            self.close_connection = True
+            return
+        self._send(200, body)
+
+    def _send(self, status, body, content_type='application/json',
+              length=None, send=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header(
+            'Content-Length', str(len(body) if length is None else length)
+        )
+        self.end_headers()
+        self.wfile.write(body if send is None else body[:send])
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class FakeRandomUserServer(ThreadingHTTPServer):
+    """
+    Локальная замена randomuser.me для нагрузочных тестов и
+    проверки обработки сбоев без сети. Можно использовать как
+    контекстный менеджер: сервер работает в фоновом потоке.
+    """
+
+    daemon_threads = True
+    # Как часто фоновый поток проверяет запрос на остановку
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, host='127.0.0.1', port=0, faults=None):
+        super().__init__((host, port), FakeRandomUserHandler)
+        self.faults = faults or FaultConfig()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api/'
+
+    @property
+    def portrait_base(self):
+        return f'{self.url}portraits/'
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.serve_forever, args=(self.POLL_INTERVAL,),
+            daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
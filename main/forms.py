@@ -6,3 +6,20 @@ class FormNumber(forms.Form):
     number = forms.IntegerField(
         min_value=0, max_value=1000, label='Число новых людей'
     )
+
+
+class SearchForm(forms.Form):
+    """Форма поиска пользователей по имени, фамилии и email"""
+    q = forms.CharField(
+        required=False, max_length=100, label='Поиск'
+    )
+
+
+class FacetForm(forms.Form):
+    """Форма фильтров списка пользователей по полу и стране"""
+    gender = forms.CharField(
+        required=False, max_length=20, label='Пол'
+    )
+    country = forms.CharField(
+        required=False, max_length=100, label='Страна'
+    )
@@ -0,0 +1,164 @@
+import math
+
+from django.db.models import Q
+
+# Сетка по широте и долготе с шагом GRID_DEGREES: номер ячейки
+# хранится в RandomUser.geo_cell. После изменения шага ячейки нужно
+# пересчитать командой backfill_geo_columns --all
+GRID_DEGREES = 1
+GRID_ROWS = 180 // GRID_DEGREES
+GRID_COLUMNS = 360 // GRID_DEGREES
+
+EARTH_RADIUS_KM = 6371.0088
+# Половина окружности Земли: дальше точек не бывает
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+# Радиус первого шага поиска ближайших, км
+INITIAL_RADIUS_KM = 25
+
+
+def parse_coordinates(location):
+    """
+    (latitude, longitude) из location.coordinates ответа API
+    (randomuser.me отдаёт их строками) либо (None, None), если
+    координат нет или они вне допустимых границ.
+    """
+    if not isinstance(location, dict):
+        return None, None
+    coordinates = location.get('coordinates')
+    if not isinstance(coordinates, dict):
+        return None, None
+    try:
+        latitude = float(coordinates['latitude'])
+        longitude = float(coordinates['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return None, None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None, None
+    return latitude, longitude
+
+
+def _row(latitude):
+    return min(int((latitude + 90) // GRID_DEGREES), GRID_ROWS - 1)
+
+
+def _column(longitude):
+    return min(int((longitude + 180) // GRID_DEGREES), GRID_COLUMNS - 1)
+
+
+def cell_id(latitude, longitude):
+    """Номер ячейки сетки: ячейки одной полосы широт идут подряд."""
+    if latitude is None or longitude is None:
+        return None
+    return _row(latitude) * GRID_COLUMNS + _column(longitude)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Расстояние по дуге большого круга в километрах."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bbox_q(min_lat, min_lon, max_lat, max_lon):
+    """
+    Условие «точка в прямоугольнике». min_lon > max_lon означает
+    прямоугольник через 180-й меридиан. Прямоугольник покрывается
+    диапазонами geo_cell — не больше одного на полосу широт (соседние
+    сливаются), каждый читается из индекса (geo_cell, latitude,
+    longitude), и точные границы проверяются по тем же строкам индекса.
+    """
+    min_lat, max_lat = max(min_lat, -90), min(max_lat, 90)
+    if min_lon <= max_lon:
+        lon_ranges = [(min_lon, max_lon)]
+    else:
+        # По возрастанию номеров ячеек, чтобы диапазоны соседних
+        # полос сливались
+        lon_ranges = [(-180, max_lon), (min_lon, 180)]
+
+    cell_ranges = []
+    for row in range(_row(min_lat), _row(max_lat) + 1):
+        for lo, hi in lon_ranges:
+            start = row * GRID_COLUMNS + _column(lo)
+            end = row * GRID_COLUMNS + _column(hi)
+            if cell_ranges and cell_ranges[-1][1] + 1 >= start:
+                cell_ranges[-1][1] = max(cell_ranges[-1][1], end)
+            else:
+                cell_ranges.append([start, end])
+    cells = Q()
+    for start, end in cell_ranges:
+        cells |= Q(geo_cell__range=(start, end))
+
+    longitudes = Q()
+    for lo, hi in lon_ranges:
+        longitudes |= Q(longitude__gte=lo, longitude__lte=hi)
+    return cells & Q(latitude__gte=min_lat, latitude__lte=max_lat) & longitudes
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """
+    Прямоугольник (min_lat, min_lon, max_lat, max_lon), содержащий все
+    точки не дальше radius_km. Если круг захватывает полюс или 180-й
+    меридиан, прямоугольник охватывает все долготы либо идёт через
+    меридиан (min_lon > max_lon).
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    min_lat = latitude - math.degrees(angle)
+    max_lat = latitude + math.degrees(angle)
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), -180, min(max_lat, 90), 180
+    ratio = math.sin(angle) / math.cos(math.radians(latitude))
+    if ratio >= 1:
+        return min_lat, -180, max_lat, 180
+    delta = math.degrees(math.asin(ratio))
+    min_lon, max_lon = longitude - delta, longitude + delta
+    if min_lon < -180:
+        min_lon += 360
+    if max_lon > 180:
+        max_lon -= 360
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def nearest(latitude, longitude, k=10, queryset=None):
+    """
+    k ближайших пользователей (с атрибутом distance_km), от ближнего.
+
+    Кандидаты берутся из прямоугольника вокруг круга радиуса r
+    (только pk и координаты из индекса), расстояние считается точно.
+    Если в круге меньше k точек, радиус растёт вчетверо, поэтому при
+    равномерной плотности читается порядка 16·k строк индекса, а
+    объекты загружаются только для k найденных.
+    """
+    if queryset is None:
+        from main.models import RandomUser
+        queryset = RandomUser.objects.all()
+    if latitude is None or longitude is None or k < 1:
+        return []
+
+    radius = INITIAL_RADIUS_KM
+    while True:
+        candidates = queryset.filter(
+            bbox_q(*radius_bbox(latitude, longitude, radius))
+        ).values_list('pk', 'latitude', 'longitude')
+        within = sorted(
+            (distance, pk)
+            for pk, distance in (
+                (pk, haversine_km(latitude, longitude, lat, lon))
+                for pk, lat, lon in candidates
+            )
+            if distance <= radius
+        )
+        if len(within) >= k or radius >= MAX_DISTANCE_KM:
+            break
+        radius = min(radius * 4, MAX_DISTANCE_KM)
+
+    found = within[:k]
+    users = queryset.in_bulk([pk for _, pk in found])
+    result = []
+    for distance, pk in found:
+        if pk in users:
+            users[pk].distance_km = distance
+            result.append(users[pk])
+    return result
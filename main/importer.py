@@ -0,0 +1,115 @@
+import json
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def iter_records(stream):
+    """
+    Потоково читает записи пользователей в формате ответа randomuser.me.
+
+    Поддерживаются:
+    - NDJSON: на строке одна запись или целый ответ API {"results": [...]};
+    - JSON-массив записей — разбирается поэлементно, без загрузки файла;
+    - JSON-объект ответа API {"results": [...]} — загружается целиком,
+      его размер ограничен самим API.
+
+    Отдаёт пары (номер записи, запись); номера начинаются с 1.
+    """
+    head = _skip_whitespace(stream)
+    if head == '[':
+        records = _iter_array(stream)
+    elif head == '{':
+        records = _iter_objects(head, stream)
+    elif head:
+        raise ValueError(f"Unexpected input start: {head!r}")
+    else:
+        records = iter(())
+    yield from enumerate(records, start=1)
+
+
+def _skip_whitespace(stream):
+    while True:
+        char = stream.read(1)
+        if not char or not char.isspace():
+            return char
+
+
+def _results(document):
+    """Записи из ответа API или сама запись."""
+    if isinstance(document, dict) and 'results' in document:
+        results = document['results']
+        if not isinstance(results, list):
+            raise ValueError("'results' must be a list")
+        return results
+    return [document]
+
+
+def _iter_objects(head, stream):
+    """
+    Один или несколько JSON-объектов подряд (NDJSON или один
+    многострочный документ). Объекты декодируются по мере чтения.
+    """
+    decoder = json.JSONDecoder()
+    buffer = head
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer:
+            if eof:
+                return
+            chunk = stream.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buffer = chunk
+            continue
+        try:
+            document, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Читаем не меньше уже накопленного, чтобы большой документ
+            # разбирался заново лишь логарифмическое число раз
+            chunk = stream.read(max(READ_CHUNK_SIZE, len(buffer)))
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield from _results(document)
+        buffer = buffer[end:]
+
+
+def _iter_array(stream):
+    """Элементы JSON-массива, декодируемые по одному."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    expect_item = True
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer:
+            if eof:
+                raise ValueError("Unterminated JSON array")
+            chunk = stream.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buffer = chunk
+            continue
+        if buffer[0] == ']':
+            return
+        if not expect_item:
+            if buffer[0] != ',':
+                raise ValueError(f"Expected ',' in array, got {buffer[0]!r}")
+            buffer = buffer[1:]
+            expect_item = True
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Читаем не меньше уже накопленного, чтобы большой документ
+            # разбирался заново лишь логарифмическое число раз
+            chunk = stream.read(max(READ_CHUNK_SIZE, len(buffer)))
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+        expect_item = False
@@ -0,0 +1,108 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from main.models import IngestionJob
+from main.services import RandomUserService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_STALE_TIMEOUT = 600
+
+
+def enqueue_ingestion(number):
+    """
+    Ставит загрузку number пользователей в очередь заданий.
+    Панель заданий на странице списка строится вне кэша, поэтому
+    кэш страниц при этом не сбрасывается.
+    """
+    return IngestionJob.objects.create(requested=number)
+
+
+def claim_next_job():
+    """
+    Забирает самое старое задание из очереди. Захват — условный UPDATE
+    по статусу, поэтому несколько воркеров не возьмут одно задание
+    (работает и в SQLite, где нет SELECT ... SKIP LOCKED).
+    """
+    pending = IngestionJob.objects.filter(status=IngestionJob.PENDING)
+    for job_pk in pending.order_by('pk').values_list('pk', flat=True)[:10]:
+        now = timezone.now()
+        claimed = IngestionJob.objects.filter(
+            pk=job_pk, status=IngestionJob.PENDING
+        ).update(
+            status=IngestionJob.RUNNING, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return IngestionJob.objects.get(pk=job_pk)
+    return None
+
+
+def run_job(job, service=None):
+    """
+    Выполняет задание, сохраняя прогресс после каждого батча.
+    Задание завершается со статусом failed, если загружено меньше
+    запрошенного.
+    """
+    service = service or RandomUserService()
+
+    def on_progress(saved):
+        IngestionJob.objects.filter(pk=job.pk).update(
+            saved=saved, heartbeat_at=timezone.now()
+        )
+
+    try:
+        job.saved = service.load_initial_users(
+            total=job.requested, on_progress=on_progress
+        )
+        if job.saved >= job.requested:
+            job.status = IngestionJob.DONE
+        else:
+            job.status = IngestionJob.FAILED
+            job.error = f"Loaded {job.saved} of {job.requested} users"
+    except Exception as e:
+        logger.error(f"Ingestion job {job.pk} failed: {e}")
+        job.status = IngestionJob.FAILED
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['saved', 'status', 'error', 'finished_at'])
+    return job
+
+
+def fail_stale_jobs():
+    """
+    Завершает со статусом failed задания, которые числятся running,
+    но дольше INGESTION_JOB_STALE_TIMEOUT секунд не получали отметки
+    воркера: воркер умер, не сохранив итог, и иначе задание вечно
+    показывалось бы выполняющимся. Возвращает число таких заданий.
+    """
+    timeout = getattr(
+        settings, 'INGESTION_JOB_STALE_TIMEOUT', DEFAULT_JOB_STALE_TIMEOUT
+    )
+    now = timezone.now()
+    deadline = now - timedelta(seconds=timeout)
+    failed = IngestionJob.objects.filter(
+        Q(heartbeat_at__lt=deadline)
+        | Q(heartbeat_at__isnull=True, started_at__lt=deadline),
+        status=IngestionJob.RUNNING,
+    ).update(
+        status=IngestionJob.FAILED, finished_at=now,
+        error=f"Worker stopped responding for over {timeout} seconds"
+    )
+    if failed:
+        logger.warning(f"Marked {failed} stale ingestion jobs as failed")
+    return failed
+
+
+def process_jobs(service=None):
+    """Выполняет задания, пока очередь не опустеет. Возвращает их число."""
+    processed = 0
+    while True:
+        job = claim_next_job()
+        if job is None:
+            return processed
+        run_job(job, service)
+        processed += 1
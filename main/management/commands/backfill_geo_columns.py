@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.models import RandomUser
+
+GEO_FIELDS = ['latitude', 'longitude', 'geo_cell']
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда для заполнения координат и ячейки сетки
+    у пользователей, загруженных до их появления.
+    """
+    help = "Backfill latitude/longitude/geo_cell from the location JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of rows updated per transaction"
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Recompute all rows (e.g. after changing the grid step)"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = RandomUser.objects.only(
+            'id', 'location', *GEO_FIELDS
+        ).order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(geo_cell__isnull=True)
+
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for user in batch:
+                user.sync_geo_columns()
+            changed = [
+                user for user in batch
+                if options['all'] or user.geo_cell is not None
+            ]
+            with transaction.atomic():
+                RandomUser.objects.bulk_update(
+                    changed, GEO_FIELDS, batch_size=batch_size
+                )
+            updated += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled coordinates for {updated} users"
+        ))
@@ -0,0 +1,57 @@
+from collections import Counter as Tally
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main import stats
+from main.models import RandomUser, UserStat
+from main.page_cache import bump_dataset_version
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда для заполнения колонок city/country
+    у пользователей, загруженных до их появления.
+    """
+    help = "Backfill city/country columns from the location JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of rows updated per transaction"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = RandomUser.objects.filter(city='', country='').only(
+            'id', 'location', 'city', 'country', 'gender', 'email'
+        ).order_by('pk')
+
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for user in batch:
+                user.sync_location_columns()
+            changed = [user for user in batch if user.city or user.country]
+            # Страна меняется с пустой: статистика по странам тоже
+            deltas = Tally()
+            for user in changed:
+                deltas.subtract(stats.dimensions(user.gender, '', user.email))
+                deltas.update(stats.user_dimensions(user))
+            with transaction.atomic():
+                RandomUser.objects.bulk_update(
+                    changed, ['city', 'country'], batch_size=batch_size
+                )
+                UserStat.objects.apply(deltas)
+            updated += len(changed)
+        if updated:
+            # Страницы и фасеты списка показывают страну
+            bump_dataset_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled location columns for {updated} users"
+        ))
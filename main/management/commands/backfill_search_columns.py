@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.models import RandomUser
+from main.search import SEARCH_COLUMNS, SEARCH_FIELDS
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда для заполнения колонок поиска *_search
+    у пользователей, загруженных до их появления.
+    """
+    help = "Backfill the normalized search columns"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of rows updated per transaction"
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Recompute all rows (e.g. after changing normalization)"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        columns = list(SEARCH_COLUMNS.values())
+        queryset = RandomUser.objects.only(
+            'id', *SEARCH_FIELDS, *columns
+        ).order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(first_name_search='', email_search='')
+
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for user in batch:
+                user.sync_search_columns()
+            with transaction.atomic():
+                RandomUser.objects.bulk_update(
+                    batch, columns, batch_size=batch_size
+                )
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled search columns for {updated} users"
+        ))
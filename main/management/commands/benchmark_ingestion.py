@@ -0,0 +1,113 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.benchmarks import SCENARIOS, compare_with_baseline, run_benchmarks
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'ingestion_baseline.json'
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда для замера скорости загрузки пользователей:
+    только валидация, только запись в DB и весь путь от ответа API
+    до базы. Данные берутся из фиксированного набора, без сети;
+    всё записанное откатывается. Результат сравнивается с базовой
+    линией, и регрессия завершает команду с ошибкой.
+    """
+    help = "Benchmark user ingestion and compare with a stored baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1000,10000,100000',
+            help="Comma-separated record counts to measure at"
+        )
+        parser.add_argument(
+            '--scenarios', default=','.join(SCENARIOS),
+            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}"
+        )
+        parser.add_argument(
+            '--output', default=None,
+            help="Write results as JSON to this file"
+        )
+        parser.add_argument(
+            '--baseline', default=str(DEFAULT_BASELINE),
+            help="Baseline JSON to compare with"
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help="Allowed slowdown / memory growth as a fraction"
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help="Store these results as the new baseline"
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help="Timed runs per measurement, the fastest is kept"
+        )
+        parser.add_argument(
+            '--no-memory', action='store_true',
+            help="Skip the tracemalloc run"
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        scenarios = options['scenarios'].split(',')
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(unknown)}")
+
+        report = run_benchmarks(
+            sizes, scenarios, memory=not options['no_memory'],
+            repeat=options['repeat']
+        )
+        for name, result in report['results'].items():
+            memory = result.get('peak_memory_kb')
+            self.stdout.write(
+                f"{name:<18} {result['records_per_second']:>10.0f} records/s"
+                + (f"  peak {memory:>9.0f} KB" if memory is not None else '')
+            )
+
+        if options['output']:
+            self._save(options['output'], report)
+
+        if options['update_baseline']:
+            self._save(options['baseline'], report)
+            self.stdout.write(self.style.SUCCESS(
+                f"Baseline updated: {options['baseline']}"
+            ))
+            return
+
+        try:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            self.stdout.write(f"No baseline at {options['baseline']}")
+            return
+
+        environment = baseline.get('environment', {})
+        if environment.get('database') != report['environment']['database']:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded on {environment.get('database')}, "
+                f"not comparing"
+            ))
+            return
+
+        regressions = compare_with_baseline(
+            report, baseline, options['tolerance']
+        )
+        if regressions:
+            raise CommandError(
+                "Performance regression:\n" + '\n'.join(regressions)
+            )
+        self.stdout.write(
+            self.style.SUCCESS("No regressions against baseline")
+        )
+
+    @staticmethod
+    def _save(path, report):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
@@ -0,0 +1,96 @@
+import random
+import statistics
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.models import RandomUser
+from main.search import search_users
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда для замера задержки поиска по мере роста таблицы.
+    Синтетические пользователи вставляются в транзакции, которая
+    откатывается в конце, поэтому данные в базе не меняются.
+    """
+    help = "Benchmark ?q= search latency as the user table grows"
+
+    QUERIES = ('jo', 'smith', 'anna k', 'user123')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='10000,100000,1000000',
+            help="Comma-separated table sizes to measure at"
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help="Runs per query at every size"
+        )
+        parser.add_argument(
+            '--explain', action='store_true',
+            help="Print the query plan at the largest size"
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        rng = random.Random(0)
+        try:
+            with transaction.atomic():
+                inserted = 0
+                for size in sizes:
+                    self._grow(size - inserted, rng)
+                    inserted = size
+                    self._measure(size, options['repeat'])
+                if options['explain']:
+                    queryset = self._page(self.QUERIES[0])
+                    self.stdout.write(queryset.explain())
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _grow(self, count, rng):
+        batch = []
+        for _ in range(count):
+            first = rng.choice(string.ascii_uppercase) + ''.join(
+                rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))
+            )
+            last = ''.join(rng.choices(string.ascii_lowercase, k=7))
+            user = RandomUser(
+                gender=rng.choice(('male', 'female')),
+                first_name=first,
+                last_name=last.title(),
+                email=f'{first.lower()}.{last}@example.com',
+                phone='000-000-000',
+                picture='https://randomuser.me/api/portraits/thumb/men/1.jpg',
+                location={},
+            )
+            user.sync_search_columns()
+            batch.append(user)
+            if len(batch) == 5000:
+                RandomUser.objects.bulk_create(batch)
+                batch = []
+        RandomUser.objects.bulk_create(batch)
+
+    def _page(self, query):
+        queryset = RandomUser.displayed.only(*RandomUser.LIST_FIELDS)
+        return search_users(queryset, query)[:10]
+
+    def _measure(self, size, repeat):
+        for query in self.QUERIES:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(self._page(query))
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"rows={size:>9} q={query!r:<10} "
+                f"median={statistics.median(timings):.2f}ms "
+                f"max={max(timings):.2f}ms"
+            )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from main import thumbnails
+from main.models import RandomUser
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда для заполнения локального хранилища фото
+    (после загрузки пользователей), чтобы первые просмотры списка
+    не ждали скачивания.
+    """
+    help = "Download user pictures into the local thumbnail store"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help="Only cache pictures of the N most recent users"
+        )
+
+    def handle(self, *args, **options):
+        queryset = RandomUser.displayed.values_list('picture', flat=True)
+        if options['limit'] is not None:
+            queryset = queryset[:options['limit']]
+        # Фото повторяются у разных людей: каждый адрес скачивается раз
+        urls = list(dict.fromkeys(queryset))
+
+        cached = failed = 0
+        for url in urls:
+            try:
+                thumbnails.get_or_fetch(url)
+            except thumbnails.ThumbnailError as e:
+                self.stderr.write(str(e))
+                failed += 1
+                continue
+            cached += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Cached {cached} thumbnails, {failed} failed"
+        ))
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.models import RandomUser
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда для заполнения dedup_key у пользователей,
+    загруженных до его появления. Первая (самая старая) запись
+    человека получает ключ, повторы остаются без ключа либо
+    удаляются с --delete-duplicates.
+    """
+    help = "Backfill dedup_key and find duplicate users"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of rows updated per transaction"
+        )
+        parser.add_argument(
+            '--delete-duplicates', action='store_true',
+            help="Delete rows that duplicate an already keyed user"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = RandomUser.objects.filter(dedup_key__isnull=True).only(
+            'id', 'email', 'first_name', 'last_name', 'dedup_key'
+        ).order_by('pk')
+
+        updated = 0
+        duplicates = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for user in batch:
+                user.sync_dedup_key()
+            existing = set(
+                RandomUser.objects.filter(
+                    dedup_key__in=[user.dedup_key for user in batch]
+                ).values_list('dedup_key', flat=True)
+            )
+
+            keyed = []
+            duplicate_pks = []
+            for user in batch:
+                if user.dedup_key in existing:
+                    duplicate_pks.append(user.pk)
+                else:
+                    existing.add(user.dedup_key)
+                    keyed.append(user)
+
+            with transaction.atomic():
+                RandomUser.objects.bulk_update(
+                    keyed, ['dedup_key'], batch_size=batch_size
+                )
+                if options['delete_duplicates'] and duplicate_pks:
+                    RandomUser.objects.filter(pk__in=duplicate_pks).delete()
+            updated += len(keyed)
+            duplicates += len(duplicate_pks)
+
+        action = 'deleted' if options['delete_duplicates'] else 'found'
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled dedup_key for {updated} users, "
+            f"{action} {duplicates} duplicates"
+        ))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.export import DEFAULT_CHUNK_SIZE, FORMATS, iter_user_chunks
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда для потоковой выгрузки пользователей в файл.
+    Таблица читается порциями, поэтому память не зависит от её размера.
+    """
+    help = "Export users to CSV, NDJSON or columnar JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=sorted(FORMATS), default='ndjson',
+            help="Output format"
+        )
+        parser.add_argument(
+            '--output', '-o', default='-',
+            help="Output file path, '-' for stdout"
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Rows fetched per query"
+        )
+        parser.add_argument('--min-id', type=int, help="First id to export")
+        parser.add_argument('--max-id', type=int, help="Last id to export")
+        parser.add_argument(
+            '--shard', type=int,
+            help="Export only users with id %% shards == shard (0-based)"
+        )
+        parser.add_argument(
+            '--shards', type=int, default=1,
+            help="Total number of shards for --shard"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            chunks = iter_user_chunks(
+                chunk_size=options['chunk_size'],
+                min_id=options['min_id'], max_id=options['max_id'],
+                shard=options['shard'], shards=options['shards']
+            )
+        except ValueError as e:
+            raise CommandError(e)
+        lines = FORMATS[options['format']](chunks)
+
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(
+            options['output'], 'w', encoding='utf-8', newline=''
+        ) as output:
+            for line in lines:
+                output.write(line)
@@ -12,6 +12,16 @@ class Command(BaseCommand):
     """
     help = "Load initial users from external API"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=None,
+            help="Number of API batch requests kept in flight"
+        )
+        parser.add_argument(
+            '--pipeline', action='store_true',
+            help="Overlap fetching, validation and saving"
+        )
+
     def handle(self, *args, **options):
         from main.models import RandomUser
 
@@ -27,7 +37,14 @@ class Command(BaseCommand):
             self.stdout.write(
                 "Starting initial user load from API..."
             )
-            service.load_initial_users(1000)
+            if options['pipeline']:
+                service.load_pipelined(
+                    1000, fetch_workers=options['concurrency']
+                )
+            else:
+                service.load_initial_users(
+                    1000, concurrency=options['concurrency']
+                )
             self.stdout.write(self.style.SUCCESS(
                 "Initial user load completed successfully.")
             )
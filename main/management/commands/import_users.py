@@ -0,0 +1,100 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.importer import iter_records
+from main.services import RandomUserService
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда для загрузки пользователей из сохранённых ответов
+    API randomuser.me (файлы или stdin) без обращения к сети.
+    """
+    help = "Import users from saved randomuser.me responses (JSON/NDJSON)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', default=['-'],
+            help="Input files, '-' for stdin"
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Records validated and written per transaction"
+        )
+        parser.add_argument(
+            '--errors', default='import_errors.ndjson',
+            help="Sidecar NDJSON file for rejected records"
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+        self.service = RandomUserService()
+        self.batch_size = options['batch_size']
+        self.saved = 0
+        self.rejected = 0
+        # Файл отклонённых записей создаётся при первой из них
+        self.errors_path = options['errors']
+        self.errors = None
+
+        try:
+            for path in options['paths']:
+                if path == '-':
+                    self._import(sys.stdin, '<stdin>')
+                    continue
+                try:
+                    with open(path, encoding='utf-8') as stream:
+                        self._import(stream, path)
+                except OSError as e:
+                    raise CommandError(f"Cannot read {path}: {e}")
+        finally:
+            if self.errors is not None:
+                self.errors.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.saved} users, rejected {self.rejected}"
+        ))
+        result = self.service.write_result
+        if result.updated or result.skipped:
+            self.stdout.write(
+                f"Already existing users: updated {result.updated}, "
+                f"skipped {result.skipped}"
+            )
+        if self.rejected:
+            self.stdout.write(f"Rejected records: {options['errors']}")
+
+    def _import(self, stream, source):
+        batch = []
+        try:
+            for number, record in iter_records(stream):
+                batch.append((number, record))
+                if len(batch) >= self.batch_size:
+                    self._flush(batch, source)
+                    batch = []
+        except ValueError as e:
+            self._flush(batch, source)
+            raise CommandError(f"Invalid JSON in {source}: {e}")
+        self._flush(batch, source)
+
+    def _flush(self, batch, source):
+        if not batch:
+            return
+
+        def on_error(index, error):
+            number, record = batch[index]
+            self.rejected += 1
+            if self.errors is None:
+                self.errors = open(self.errors_path, 'w', encoding='utf-8')
+            self.errors.write(json.dumps({
+                'source': source,
+                'record': number,
+                'errors': error.detail,
+                'data': record,
+            }, ensure_ascii=False, default=str) + '\n')
+
+        users = self.service.validate_users(
+            [record for _, record in batch], on_error=on_error
+        )
+        self.saved += self.service.write_users(users)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from main import stats
+from main.page_cache import bump_dataset_version
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда для пересчёта статистики пользователей
+    по полу, стране и домену email полным проходом по таблице.
+    """
+    help = "Rebuild the user statistics table from RandomUser"
+
+    def handle(self, *args, **options):
+        rows = stats.rebuild()
+        # Фасеты списка закэшированы по версии данных
+        bump_dataset_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt user statistics: {rows} rows"
+        ))
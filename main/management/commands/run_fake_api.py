@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+
+from main.fake_api import FakeRandomUserServer, FaultConfig
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда: локальная замена randomuser.me с задержками
+    и сбоями для нагрузочных тестов без сети. Чтобы загрузка шла
+    через неё, задайте RANDOM_USER_API_URL=http://<host>:<port>/api/.
+    """
+    help = "Run a local randomuser.me stand-in with fault injection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument(
+            '--latency', type=float, default=0.0,
+            help="Seconds added to every response"
+        )
+        parser.add_argument(
+            '--jitter', type=float, default=0.0,
+            help="Up to this many extra random seconds per response"
+        )
+        parser.add_argument(
+            '--error-rate', type=float, default=0.0,
+            help="Share of requests answered with 503 and an API error"
+        )
+        parser.add_argument(
+            '--api-error-rate', type=float, default=0.0,
+            help="Share of requests answered with 200 and an API error"
+        )
+        parser.add_argument(
+            '--truncate-rate', type=float, default=0.0,
+            help="Share of responses cut off in the middle of the body"
+        )
+        parser.add_argument(
+            '--malformed-rate', type=float, default=0.0,
+            help="Share of responses with a non-JSON body"
+        )
+        parser.add_argument(
+            '--invalid-record-rate', type=float, default=0.0,
+            help="Share of records that fail validation"
+        )
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help="Seed for the fault generator"
+        )
+
+    def handle(self, *args, **options):
+        faults = FaultConfig(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            api_error_rate=options['api_error_rate'],
+            truncate_rate=options['truncate_rate'],
+            malformed_rate=options['malformed_rate'],
+            invalid_record_rate=options['invalid_record_rate'],
+            seed=options['seed'],
+        )
+        server = FakeRandomUserServer(
+            options['host'], options['port'], faults
+        )
+        self.stdout.write(f"Fake randomuser API listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main import reservoir
+from main.jobs import fail_stale_jobs, process_jobs
+from main.services import RandomUserService
+
+
+class Command(BaseCommand):
+    """
+    Кастомная команда-воркер: выполняет задания на загрузку
+    пользователей, поставленные через форму на главной странице,
+    а когда очередь пуста, пополняет резерв пользователей.
+    """
+    help = "Run queued user ingestion jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Process the current queue and exit"
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help="Seconds to wait between queue checks"
+        )
+        parser.add_argument(
+            '--no-reservoir', action='store_true',
+            help="Do not refill the prefetched user reservoir"
+        )
+
+    def handle(self, *args, **options):
+        service = RandomUserService()
+        self.stdout.write("Ingestion worker started")
+        while True:
+            # Задания умерших воркеров проверяются при каждом опросе:
+            # воркер, перезапущенный сразу после падения, застанет
+            # отметку свежей
+            stale = fail_stale_jobs()
+            if stale:
+                self.stderr.write(f"Failed {stale} stale jobs")
+            processed = process_jobs(service)
+            if processed:
+                self.stdout.write(f"Processed {processed} jobs")
+            if not options['no_reservoir']:
+                self.refill_reservoir(service)
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
+
+    def refill_reservoir(self, service):
+        try:
+            added = reservoir.refill(service)
+        except Exception as e:
+            # Резерв лишь ускоряет загрузки: ошибка API не останавливает
+            # воркер, пополнение повторится на следующей проверке
+            self.stderr.write(f"Reservoir refill failed: {e}")
+            return
+        if added:
+            self.stdout.write(f"Added {added} users to reservoir")
@@ -0,0 +1,377 @@
+import atexit
+import glob
+import json
+import math
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+    1.0, 2.5, 5.0, 7.5, 10.0, math.inf,
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, "
+                f"got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class CounterMetric(_Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.update(self, self._key(labels), amount)
+
+
+class HistogramMetric(_Metric):
+    """Распределение значений (обычно длительностей) по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != math.inf:
+            self.buckets += (math.inf,)
+        super().__init__(registry, name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        self.registry.update(self, self._key(labels), value)
+
+    def time(self, **labels):
+        """Контекстный менеджер: замеряет длительность блока."""
+        return _Timer(self, labels)
+
+
+class _Timer:
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(
+            time.perf_counter() - self.started, **self.labels
+        )
+
+
+class Registry:
+    """
+    Метрики в текстовом формате Prometheus (эндпоинт /metrics).
+
+    Каждый процесс копит значения в памяти: счётчик — числом,
+    гистограмма — списком [корзины..., сумма, количество]. Если задан
+    METRICS_DIR, процесс не чаще раза в METRICS_FLUSH_INTERVAL секунд
+    сохраняет снимок своих значений в отдельный файл этого каталога,
+    а /metrics суммирует снимки всех процессов, поэтому метрики
+    нескольких воркеров видны с любого из них.
+
+    Снимки завершившихся процессов не копятся: при выходе процесс
+    помечает свой снимок префиксом done-, а /metrics забирает такие
+    снимки и снимки умерших процессов своей машины в значения
+    текущего процесса и удаляет файлы. Суммы при этом не меняются.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._values = {}
+        # Значения завершившихся процессов, забранные из их снимков
+        self._absorbed = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        # Машина, pid и время старта: перезапущенный процесс с тем же
+        # pid не затрёт снимок предыдущего, а по машине и pid видно,
+        # можно ли проверить, жив ли владелец снимка
+        self._snapshot_name = (
+            f'{socket.gethostname()}-{os.getpid()}-{time.time_ns()}.json'
+        )
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+
+    def update(self, metric, key, value):
+        with self._lock:
+            if metric.kind == 'counter':
+                self._values[(metric.name, key)] = (
+                    self._values.get((metric.name, key), 0) + value
+                )
+            else:
+                state = self._values.get((metric.name, key))
+                if state is None:
+                    state = [0] * (len(metric.buckets) + 2)
+                    self._values[(metric.name, key)] = state
+                for index, bound in enumerate(metric.buckets):
+                    if value <= bound:
+                        state[index] += 1
+                        break
+                state[-2] += value
+                state[-1] += 1
+        self._maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            merged = {}
+            for values in (self._absorbed, self._values):
+                for (name, key), value in values.items():
+                    _add(merged, name, key, value)
+            return [
+                [name, list(key), value]
+                for (name, key), value in merged.items()
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+            self._absorbed.clear()
+
+    # Снимки для нескольких процессов
+
+    def _metrics_dir(self):
+        return getattr(settings, 'METRICS_DIR', None)
+
+    def _maybe_flush(self):
+        if not self._metrics_dir():
+            return
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+        if time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        """Сохраняет снимок значений процесса (атомарной заменой файла)."""
+        directory = self._metrics_dir()
+        if not directory:
+            return
+        self._last_flush = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self._snapshot_name)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        """
+        Сохраняет последний снимок и помечает его как снимок
+        завершившегося процесса (вызывается при выходе).
+        """
+        directory = self._metrics_dir()
+        if not directory:
+            return
+        self.flush()
+        name = self._snapshot_name
+        os.replace(
+            os.path.join(directory, name),
+            os.path.join(directory, f'done-{name}')
+        )
+
+    def _is_finished(self, filename):
+        """
+        Завершился ли процесс, записавший снимок. Живость проверяется
+        только для процессов своей машины: pid другой машины (или
+        другого контейнера) здесь ничего не значит.
+        """
+        if filename.startswith('done-'):
+            return True
+        try:
+            host, pid, _ = filename[:-len('.json')].rsplit('-', 2)
+            pid = int(pid)
+        except ValueError:
+            return False
+        if host != socket.gethostname() or os.name != 'posix':
+            return False
+        if pid == os.getpid():
+            # Снимок прежнего процесса с тем же pid
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            return False
+        return False
+
+    def _absorb_finished(self, directory):
+        """
+        Переносит снимки завершившихся процессов в значения текущего
+        и удаляет их файлы. Файл сначала переименовывается: из
+        нескольких процессов, собирающих метрики одновременно, его
+        заберёт только один, и значения не посчитаются дважды.
+        """
+        claimed = []
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            filename = os.path.basename(path)
+            if filename == self._snapshot_name:
+                continue
+            if not self._is_finished(filename):
+                continue
+            claimed_path = f'{path}.{os.getpid()}.claimed'
+            try:
+                os.rename(path, claimed_path)
+                with open(claimed_path, encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            with self._lock:
+                for name, key, value in snapshot:
+                    _add(self._absorbed, name, tuple(key), value)
+            claimed.append(claimed_path)
+        if claimed:
+            # Забранные значения сначала попадают в снимок текущего
+            # процесса и только потом исчезают из каталога
+            self.flush()
+            for claimed_path in claimed:
+                os.remove(claimed_path)
+
+    def collect(self):
+        """
+        Значения всех процессов: снимки из METRICS_DIR (включая
+        только что сохранённый снимок текущего процесса) либо
+        значения текущего процесса.
+        """
+        directory = self._metrics_dir()
+        if not directory:
+            snapshots = [self.snapshot()]
+        else:
+            self._absorb_finished(directory)
+            self.flush()
+            snapshots = []
+            for path in glob.glob(os.path.join(directory, '*.json')):
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+        merged = {}
+        for snapshot in snapshots:
+            for name, key, value in snapshot:
+                if name in self.metrics:
+                    _add(merged, name, tuple(key), value)
+        return merged
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        values = self.collect()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            series = sorted(
+                (key, value) for (metric_name, key), value in values.items()
+                if metric_name == name
+            )
+            for key, value in series:
+                labels = list(zip(metric.labelnames, key))
+                if metric.kind == 'counter':
+                    lines.append(
+                        f'{name}{_labels(labels)} {_number(value)}'
+                    )
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets, value):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else _number(bound)
+                    lines.append(
+                        f'{name}_bucket{_labels(labels + [("le", le)])} '
+                        f'{cumulative}'
+                    )
+                lines.append(
+                    f'{name}_sum{_labels(labels)} {_number(value[-2])}'
+                )
+                lines.append(f'{name}_count{_labels(labels)} {value[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _add(values, name, key, value):
+    """Прибавляет значение счётчика или гистограммы к values."""
+    if isinstance(value, list):
+        total = values.setdefault((name, key), [0] * len(value))
+        for index, item in enumerate(value):
+            total[index] += item
+    else:
+        values[(name, key)] = values.get((name, key), 0) + value
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        (name, value.replace('\\', '\\\\').replace('"', '\\"')
+         .replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return f'{value:.1f}'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.close)
+
+FETCH_SECONDS = HistogramMetric(
+    REGISTRY, 'randomuser_fetch_seconds',
+    'Latency of randomuser.me batch requests', ['outcome'],
+)
+FETCH_ERRORS = CounterMetric(
+    REGISTRY, 'randomuser_fetch_errors_total',
+    'Failed randomuser.me batch requests', ['reason'],
+)
+RECORDS_VALIDATED = CounterMetric(
+    REGISTRY, 'randomuser_records_validated_total',
+    'API records that passed validation',
+)
+RECORDS_REJECTED = CounterMetric(
+    REGISTRY, 'randomuser_records_rejected_total',
+    'API records rejected by validation', ['reason'],
+)
+ROWS_WRITTEN = CounterMetric(
+    REGISTRY, 'randomuser_rows_written_total',
+    'Committed user rows by write result', ['result'],
+)
+DB_WRITE_SECONDS = HistogramMetric(
+    REGISTRY, 'randomuser_db_write_seconds',
+    'Time spent writing a batch of users',
+)
+RESERVOIR_TAKEN = CounterMetric(
+    REGISTRY, 'randomuser_reservoir_taken_total',
+    'Prefetched records taken from the reservoir by loads',
+)
+THUMBNAIL_REQUESTS = CounterMetric(
+    REGISTRY, 'thumbnail_requests_total',
+    'User picture lookups in the local thumbnail store', ['result'],
+)
+REQUEST_SECONDS = HistogramMetric(
+    REGISTRY, 'http_request_duration_seconds',
+    'Time spent serving HTTP requests', ['view', 'method'],
+)
@@ -0,0 +1,126 @@
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from main import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _RequestTimings:
+    """Замеры одного запроса: SQL, рендер шаблона и общее время."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка connection.execute_wrapper вокруг каждого запроса
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def finish_render(self, response):
+        if self.render_started is not None:
+            self.render_time += time.perf_counter() - self.render_started
+            self.render_started = None
+
+
+@contextmanager
+def timed_render(request):
+    """
+    Учитывает в tpl рендер, сделанный вне TemplateResponse (например,
+    render_to_string в представлении). Рендер внутри уже замеряемого
+    TemplateResponse не прибавляется второй раз.
+    """
+    timings = getattr(request, '_server_timings', None)
+    if timings is None or timings.render_started is not None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.render_time += time.perf_counter() - started
+
+
+class ServerTimingMiddleware:
+    """
+    Добавляет к ответу заголовок Server-Timing с числом SQL-запросов,
+    временем в DB, временем рендера шаблона и общим временем запроса
+    и пишет те же значения строкой key=value в лог main.middleware.
+    Запросы, превысившие SLOW_REQUEST_MS или SLOW_REQUEST_QUERIES,
+    логируются с уровнем WARNING. Для потоковых ответов учитывается
+    только время до начала отдачи тела. Шаблоны, которые представление
+    рендерит само, замеряются через timed_render.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = _RequestTimings()
+        request._server_timings = timings
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(timings)
+                )
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings.db_time * 1000:.1f};'
+            f'desc="{timings.queries} queries"',
+            f'tpl;dur={timings.render_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+        metrics.REQUEST_SECONDS.observe(
+            total, view=self._view_name(request), method=request.method
+        )
+        self._log(request, response, timings, total)
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        TemplateResponse рендерится после выхода из представления:
+        замер начинается перед рендером и заканчивается в post-render
+        callback.
+        """
+        timings = getattr(request, '_server_timings', None)
+        if timings is not None:
+            timings.start_render()
+            response.add_post_render_callback(timings.finish_render)
+        return response
+
+    @staticmethod
+    def _view_name(request):
+        return getattr(request.resolver_match, 'view_name', None) or '-'
+
+    @staticmethod
+    def _log(request, response, timings, total):
+        slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        slow_queries = getattr(settings, 'SLOW_REQUEST_QUERIES', 50)
+        total_ms = total * 1000
+        slow = total_ms > slow_ms or timings.queries > slow_queries
+        view = ServerTimingMiddleware._view_name(request)
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            f"{'slow_request' if slow else 'request'} "
+            f"method={request.method} path={request.path} view={view} "
+            f"status={response.status_code} total_ms={total_ms:.1f} "
+            f"db_ms={timings.db_time * 1000:.1f} queries={timings.queries} "
+            f"template_ms={timings.render_time * 1000:.1f}"
+        )
@@ -1,5 +1,13 @@
-from django.db import models
+import hashlib
+import random
+
+from django.core.cache import cache
+from django.db import connections, models, transaction
 from django.urls import reverse
+from django.utils import timezone
+
+from main.geo import cell_id, parse_coordinates
+from main.search import SEARCH_COLUMNS, normalize
 
 
 class DisplayedManager(models.Manager):
@@ -11,6 +19,86 @@ class DisplayedManager(models.Manager):
         return super().get_queryset().order_by('-pk')
 
 
+class RandomUserManager(models.Manager):
+    """
+    Менеджер по умолчанию с выборкой случайных пользователей,
+    стоимость которой не зависит от размера таблицы.
+    """
+    ID_RANGE_CACHE_KEY = 'random_user:id_range'
+    ID_RANGE_TIMEOUT = 60
+    RANDOM_ATTEMPTS = 5
+
+    def id_range(self, refresh=False):
+        """
+        Возвращает (min_id, max_id) из кэша. Агрегат MIN/MAX по
+        первичному ключу берётся из индекса и пересчитывается не чаще
+        раза в ID_RANGE_TIMEOUT секунд. Для пустой таблицы (None, None).
+        """
+        id_range = None if refresh else cache.get(self.ID_RANGE_CACHE_KEY)
+        if id_range is None:
+            bounds = self.get_queryset().aggregate(
+                lo=models.Min('pk'), hi=models.Max('pk')
+            )
+            id_range = (bounds['lo'], bounds['hi'])
+            cache.set(
+                self.ID_RANGE_CACHE_KEY, id_range, self.ID_RANGE_TIMEOUT
+            )
+        return id_range
+
+    def invalidate_id_range(self):
+        """Сбрасывает кэш диапазона id (после вставки или удаления)."""
+        cache.delete(self.ID_RANGE_CACHE_KEY)
+
+    def random(self, count=1):
+        """
+        Возвращает список из не более чем count разных случайных
+        пользователей.
+
+        Случайные id выбираются из диапазона [min_id, max_id] и ищутся
+        точным совпадением по первичному ключу; промахи по «дыркам»
+        после удалений повторяются до RANDOM_ATTEMPTS раз, поэтому
+        выбор равномерен. Если дыр слишком много, недостающие
+        пользователи берутся первыми после случайного id.
+        """
+        users = self._random(count, self.id_range())
+        if not users:
+            # Кэшированный диапазон мог устареть после удалений
+            users = self._random(count, self.id_range(refresh=True))
+        return users
+
+    def _random(self, count, id_range):
+        lo, hi = id_range
+        if lo is None or count < 1:
+            return []
+        ids = range(lo, hi + 1)
+        found = {}
+
+        for _ in range(self.RANDOM_ATTEMPTS):
+            need = count - len(found)
+            if need <= 0:
+                break
+            if need == 1:
+                candidates = [random.choice(ids)]
+            else:
+                candidates = random.sample(ids, min(len(ids), need * 2))
+            candidates = [pk for pk in candidates if pk not in found]
+            hits = self.get_queryset().in_bulk(candidates)
+            for pk in candidates:
+                if pk in hits and len(found) < count:
+                    found[pk] = hits[pk]
+
+        need = count - len(found)
+        if need > 0:
+            rest = self.get_queryset().exclude(pk__in=found).order_by('pk')
+            start = random.choice(ids)
+            extra = list(rest.filter(pk__gte=start)[:need])
+            if len(extra) < need:
+                extra += list(rest.filter(pk__lt=start)[:need - len(extra)])
+            for user in extra:
+                found[user.pk] = user
+        return list(found.values())
+
+
 class RandomUser(models.Model):
     """
     Модель пользователя, полученного из внешнего API randomuser.me.
@@ -24,10 +112,126 @@ class RandomUser(models.Model):
     email = models.EmailField(max_length=100, verbose_name='Почта')
     phone = models.CharField(max_length=100, verbose_name='Номер телефона')
     picture = models.URLField(verbose_name='Фото')
+    city = models.CharField(
+        max_length=100, blank=True, default='', verbose_name='Город'
+    )
+    country = models.CharField(
+        max_length=100, blank=True, default='', verbose_name='Страна'
+    )
+    # Координаты из location.coordinates и ячейка сетки main.geo
+    # для поиска по прямоугольнику и ближайших
+    latitude = models.FloatField(null=True, blank=True, verbose_name='Широта')
+    longitude = models.FloatField(
+        null=True, blank=True, verbose_name='Долгота'
+    )
+    geo_cell = models.IntegerField(
+        null=True, blank=True, editable=False, verbose_name='Ячейка сетки'
+    )
+    # Имя, фамилия и email после main.search.normalize: по ним идёт
+    # префиксный поиск без учёта регистра для любых алфавитов
+    SEARCH_MAX_LENGTH = 100
+    first_name_search = models.CharField(
+        max_length=SEARCH_MAX_LENGTH, blank=True, default='', editable=False
+    )
+    last_name_search = models.CharField(
+        max_length=SEARCH_MAX_LENGTH, blank=True, default='', editable=False
+    )
+    email_search = models.CharField(
+        max_length=SEARCH_MAX_LENGTH, blank=True, default='', editable=False
+    )
+    # NULL допускается для строк, загруженных до появления ключа:
+    # уникальность NULL не ограничивает (см. команду dedupe_users)
+    dedup_key = models.CharField(
+        max_length=40, unique=True, null=True, editable=False,
+        verbose_name='Ключ дедупликации'
+    )
 
-    objects = models.Manager()
+    objects = RandomUserManager()
     displayed = DisplayedManager()
 
+    class Meta:
+        indexes = [
+            # Префиксный поиск без учёта регистра (main.search);
+            # varchar_pattern_ops нужен LIKE 'префикс%' в PostgreSQL,
+            # остальные базы opclasses не учитывают
+            *(
+                models.Index(
+                    fields=[column], name=f'randomuser_{column}',
+                    opclasses=['varchar_pattern_ops']
+                )
+                for column in SEARCH_COLUMNS.values()
+            ),
+            # Поиск по координатам читает только этот индекс (main.geo)
+            models.Index(
+                fields=['geo_cell', 'latitude', 'longitude'],
+                name='randomuser_geo_cell'
+            ),
+            # Фильтры списка по полу и стране в порядке -pk (UsersView)
+            models.Index(
+                fields=['gender', 'id'], name='randomuser_gender_id'
+            ),
+            models.Index(
+                fields=['country', 'gender', 'id'],
+                name='randomuser_country_gender_id'
+            ),
+        ]
+
+    # Колонки, которые выводит таблица на странице списка
+    LIST_FIELDS = (
+        'id', 'picture', 'first_name', 'last_name', 'gender',
+        'email', 'phone', 'city', 'country',
+    )
+
+    def sync_location_columns(self):
+        """
+        Заполняет денормализованные колонки city/country из JSON location,
+        чтобы список не загружал и не разбирал весь location.
+        """
+        location = self.location if isinstance(self.location, dict) else {}
+        for field in ('city', 'country'):
+            value = location.get(field)
+            max_length = self._meta.get_field(field).max_length
+            setattr(self, field, str(value)[:max_length] if value else '')
+
+    def sync_geo_columns(self):
+        """Заполняет latitude/longitude/geo_cell из JSON location."""
+        self.latitude, self.longitude = parse_coordinates(self.location)
+        self.geo_cell = cell_id(self.latitude, self.longitude)
+
+    def sync_search_columns(self):
+        """Заполняет колонки *_search для поиска (main.search)."""
+        for field, column in SEARCH_COLUMNS.items():
+            value = normalize(getattr(self, field))
+            setattr(self, column, value[:self.SEARCH_MAX_LENGTH])
+
+    @staticmethod
+    def compute_dedup_key(email, first_name, last_name):
+        """
+        Ключ, по которому повторно загруженный человек распознаётся
+        как уже существующий: SHA-1 нормализованных email и имени.
+        """
+        normalized = '|'.join(
+            str(value).strip().lower()
+            for value in (email, first_name, last_name)
+        )
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+    def sync_dedup_key(self):
+        self.dedup_key = self.compute_dedup_key(
+            self.email, self.first_name, self.last_name
+        )
+
+    def sync_derived_columns(self):
+        """Пересчитывает все колонки, производные от данных API."""
+        self.sync_location_columns()
+        self.sync_geo_columns()
+        self.sync_search_columns()
+        self.sync_dedup_key()
+
+    def save(self, *args, **kwargs):
+        self.sync_derived_columns()
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         """
         Возвращает абсолютный URL для
@@ -37,3 +241,253 @@ class RandomUser(models.Model):
 
     def __str__(self):
         return self.first_name
+
+
+class CounterManager(models.Manager):
+    def get_value(self, name, initial=0):
+        """
+        Возвращает значение счётчика. Если счётчика ещё нет, он создаётся
+        со значением initial (число или функция, вычисляющая его).
+        """
+        counter = self.filter(name=name).first()
+        if counter is None:
+            value = initial() if callable(initial) else initial
+            counter, _ = self.get_or_create(
+                name=name, defaults={'value': value}
+            )
+        return counter.value
+
+    def increment(self, name, delta=1, initial=None):
+        """
+        Атомарно увеличивает счётчик на delta одним UPDATE.
+        Отсутствующий счётчик создаётся со значением initial
+        (по умолчанию — delta).
+        """
+        with transaction.atomic():
+            updated = self.filter(name=name).update(
+                value=models.F('value') + delta
+            )
+            if not updated:
+                if initial is None:
+                    value = delta
+                else:
+                    value = initial() if callable(initial) else initial
+                self.get_or_create(name=name, defaults={'value': value})
+
+
+class Counter(models.Model):
+    """
+    Именованный счётчик, поддерживаемый инкрементально
+    (например, число пользователей без COUNT(*) по всей таблице).
+    """
+    USER_COUNT = 'random_user_count'
+    # Версия набора пользователей в ключах кэша страниц (page_cache)
+    DATASET_VERSION = 'dataset_version'
+    # Оценка объёма хранилища фото (main.thumbnails), байт
+    THUMBNAIL_BYTES = 'thumbnail_bytes'
+
+    name = models.CharField(
+        max_length=100, primary_key=True, verbose_name='Название'
+    )
+    value = models.BigIntegerField(default=0, verbose_name='Значение')
+
+    objects = CounterManager()
+
+    def __str__(self):
+        return f'{self.name}={self.value}'
+
+
+class UserStatManager(models.Manager):
+    def apply(self, deltas):
+        """
+        Прибавляет к счётчикам {(dimension, value): delta}. В SQLite и
+        PostgreSQL это один executemany с INSERT ... ON CONFLICT DO UPDATE
+        SET count = count + EXCLUDED.count: недостающие строки создаются
+        той же командой, а параллельные загрузки не теряют приращения
+        друг друга. Строки идут в одном порядке, чтобы параллельные
+        транзакции не блокировали друг друга крест-накрест. В остальных
+        базах недостающие строки сначала создаются с нулём, затем
+        счётчики меняются одним UPDATE с CASE.
+        """
+        deltas = sorted(
+            (key, delta) for key, delta in deltas.items() if delta
+        )
+        if not deltas:
+            return
+        connection = connections[self.db]
+        if connection.vendor in ('sqlite', 'postgresql'):
+            quote = connection.ops.quote_name
+            table = quote(self.model._meta.db_table)
+            count = quote('count')
+            sql = (
+                f'INSERT INTO {table} '
+                f'({quote("dimension")}, {quote("value")}, {count}) '
+                f'VALUES (%s, %s, %s) '
+                f'ON CONFLICT ({quote("dimension")}, {quote("value")}) '
+                f'DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}'
+            )
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, [
+                    (dimension, value, delta)
+                    for (dimension, value), delta in deltas
+                ])
+            return
+
+        condition = models.Q()
+        for (dimension, value), _ in deltas:
+            condition |= models.Q(dimension=dimension, value=value)
+        with transaction.atomic(using=self.db):
+            self.bulk_create(
+                [
+                    self.model(dimension=dimension, value=value, count=0)
+                    for (dimension, value), _ in deltas
+                ],
+                ignore_conflicts=True
+            )
+            increment = models.Case(
+                *(
+                    models.When(dimension=dimension, value=value, then=delta)
+                    for (dimension, value), delta in deltas
+                ),
+                default=0,
+                output_field=models.BigIntegerField(),
+            )
+            self.filter(condition).update(count=models.F('count') + increment)
+
+
+class UserStat(models.Model):
+    """
+    Число пользователей с данным значением признака (пол, страна,
+    домен email, пара «пол и страна»). Поддерживается инкрементально
+    при записи пользователей (main.stats), поэтому разбивки
+    не сканируют таблицу.
+    """
+    GENDER = 'gender'
+    COUNTRY = 'country'
+    EMAIL_DOMAIN = 'email_domain'
+    # Значение — f'{gender}|{country}': из этих строк считаются
+    # фасеты списка пользователей (main.facets)
+    GENDER_COUNTRY = 'gender_country'
+    DIMENSION_CHOICES = [
+        (GENDER, 'Пол'),
+        (COUNTRY, 'Страна'),
+        (EMAIL_DOMAIN, 'Домен email'),
+        (GENDER_COUNTRY, 'Пол и страна'),
+    ]
+
+    dimension = models.CharField(
+        max_length=20, choices=DIMENSION_CHOICES, verbose_name='Признак'
+    )
+    value = models.CharField(
+        max_length=130, blank=True, verbose_name='Значение'
+    )
+    count = models.BigIntegerField(default=0, verbose_name='Число')
+
+    objects = UserStatManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dimension', 'value'], name='userstat_unique_value'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.dimension}:{self.value}={self.count}'
+
+
+class IngestionJob(models.Model):
+    """
+    Задание на загрузку пользователей из API. Создаётся формой на
+    странице списка и выполняется командой run_ingestion_worker,
+    чтобы веб-запрос не ждал внешний API и запись в DB.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    requested = models.PositiveIntegerField(verbose_name='Запрошено')
+    saved = models.PositiveIntegerField(default=0, verbose_name='Сохранено')
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING,
+        db_index=True, verbose_name='Статус'
+    )
+    error = models.TextField(blank=True, default='', verbose_name='Ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Создано'
+    )
+    started_at = models.DateTimeField(null=True, verbose_name='Начато')
+    # Воркер отмечается здесь после каждого батча: по давней отметке
+    # видно, что он умер, не завершив задание
+    heartbeat_at = models.DateTimeField(
+        null=True, verbose_name='Последняя отметка воркера'
+    )
+    finished_at = models.DateTimeField(null=True, verbose_name='Завершено')
+
+    ACTIVE_STATUSES = (PENDING, RUNNING)
+
+    @property
+    def remaining(self):
+        return max(self.requested - self.saved, 0)
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def get_absolute_url(self):
+        return reverse('ingestion_job', kwargs={'job_pk': self.pk})
+
+    def __str__(self):
+        return f'#{self.pk} {self.status} {self.saved}/{self.requested}'
+
+
+class ReservoirUser(models.Model):
+    """
+    Провалидированная, но ещё не опубликованная запись API из резерва.
+    Воркер заполняет резерв в простое, а load_initial_users берёт
+    записи отсюда до обращения к API (см. main.reservoir).
+    """
+    dedup_key = models.CharField(
+        max_length=40, unique=True, verbose_name='Ключ дедупликации'
+    )
+    data = models.JSONField(verbose_name='Данные пользователя')
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Добавлено'
+    )
+
+    def __str__(self):
+        return self.dedup_key
+
+
+class Thumbnail(models.Model):
+    """
+    Локальная копия фото пользователя (см. main.thumbnails). Файл
+    хранится по SHA-256 содержимого, поэтому одинаковые картинки
+    с разных адресов занимают место один раз.
+    """
+    url_key = models.CharField(
+        max_length=40, unique=True, verbose_name='Ключ адреса'
+    )
+    url = models.URLField(max_length=500, verbose_name='Адрес фото')
+    digest = models.CharField(
+        max_length=64, db_index=True, verbose_name='SHA-256 содержимого'
+    )
+    size = models.PositiveIntegerField(verbose_name='Размер, байт')
+    content_type = models.CharField(max_length=100, verbose_name='Тип')
+    fetched_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Скачано'
+    )
+    last_used_at = models.DateTimeField(
+        default=timezone.now, db_index=True,
+        verbose_name='Последнее обращение'
+    )
+
+    def __str__(self):
+        return self.url
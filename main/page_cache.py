@@ -0,0 +1,92 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_response_headers
+from django.views.decorators.cache import cache_page
+
+from main.models import Counter
+
+DEFAULT_PAGE_CACHE_TIMEOUT = 300
+
+
+def get_dataset_version():
+    """
+    Текущая версия набора пользователей. Версия входит в ключ
+    закэшированных страниц, поэтому после её увеличения старые
+    страницы просто перестают находиться и вытесняются по таймауту.
+    Версия хранится в DB (счётчик Counter.DATASET_VERSION), а не в
+    кэше: CACHES['default'] у каждого процесса свой, и увеличение
+    версии воркером загрузки иначе не увидел бы веб-процесс.
+    """
+    # Новая версия не должна совпасть ни с одной из использованных
+    # раньше (кэш может пережить DB), поэтому начальная — от времени
+    return Counter.objects.get_value(
+        Counter.DATASET_VERSION, initial=time.time_ns
+    )
+
+
+def bump_dataset_version():
+    """Делает все закэшированные страницы устаревшими."""
+    Counter.objects.increment(Counter.DATASET_VERSION, initial=time.time_ns)
+
+
+def get_page_cache_timeout():
+    """Время жизни страницы в секундах; 0 отключает кэш страниц."""
+    return getattr(
+        settings, 'USER_PAGE_CACHE_TIMEOUT', DEFAULT_PAGE_CACHE_TIMEOUT
+    )
+
+
+def cached_fragment(request, prefix, render):
+    """
+    Результат render() (часть страницы) из кэша под ключом с версией
+    набора пользователей и URL запроса с параметрами. Остальная
+    страница строится на каждый запрос, поэтому в кэш не попадают
+    формы с csrf_token, которые у каждого посетителя свои.
+    """
+    timeout = get_page_cache_timeout()
+    if not timeout:
+        return render()
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    key = f'{prefix}:v{get_dataset_version()}:{path}'
+    value = cache.get(key)
+    if value is None:
+        value = render()
+        cache.set(key, value, timeout)
+    return value
+
+
+class VersionedCacheMixin:
+    """
+    Кэширует GET-ответы представления в CACHES['default'] под ключом
+    с версией набора пользователей. Ключ строится как у cache_page:
+    URL с параметрами и заголовки из Vary. Cookie csrftoken и
+    Vary: Cookie добавляет CsrfViewMiddleware уже после кэша, поэтому
+    ответы, в которых использован CSRF-токен, не кэшируются (такие
+    страницы кэшируют только часть через cached_fragment). Браузеру
+    отдаётся max-age=0: сам он страницу не кэширует, иначе не узнал бы
+    о новой версии данных.
+    """
+
+    cache_key_prefix = 'users'
+
+    def dispatch(self, request, *args, **kwargs):
+        timeout = get_page_cache_timeout()
+        if not timeout:
+            return super().dispatch(request, *args, **kwargs)
+        dispatch = super().dispatch
+
+        def render(request, *args, **kwargs):
+            response = dispatch(request, *args, **kwargs)
+            patch_response_headers(response, 0)
+            if request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+                # В странице токен этого посетителя: cache_page
+                # не сохраняет ответы с Cache-Control: private
+                patch_cache_control(response, private=True)
+            return response
+
+        key_prefix = f'{self.cache_key_prefix}:v{get_dataset_version()}'
+        view = cache_page(timeout, key_prefix=key_prefix)(render)
+        return view(request, *args, **kwargs)
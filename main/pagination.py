@@ -0,0 +1,148 @@
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.utils.functional import cached_property
+
+
+class CountedPaginator(Paginator):
+    """
+    Обычный постраничный пагинатор, которому общее число записей
+    можно передать заранее (из счётчика или статистики), чтобы не
+    выполнять SELECT COUNT(*) на каждый запрос.
+
+    Переданное число — только оценка: счётчик или статистика могут
+    отставать от таблицы. Поэтому строки страницы выбираются срезом
+    per_page + 1 без опоры на него: лишняя строка показывает, есть ли
+    следующая страница, а count уточняется по увиденным строкам.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is not None:
+            return self._count
+        return super().count
+
+    def page(self, number):
+        if self._count is None:
+            return super().page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        seen = bottom + len(rows)
+        # Следующей страницы нет — число известно точно, есть — оно
+        # не меньше увиденного
+        if len(rows) > self.per_page:
+            self.count = max(self._count, seen)
+        else:
+            self.count = seen
+        self.__dict__.pop('num_pages', None)
+        return self._get_page(rows[:self.per_page], number, self)
+
+
+class CursorPage:
+    """
+    Страница keyset-пагинации. Вместо номера страницы хранит курсоры —
+    pk первой и последней записи, от которых строятся соседние страницы.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        return self.object_list[-1].pk if self.object_list else None
+
+    @property
+    def previous_cursor(self):
+        return self.object_list[0].pk if self.object_list else None
+
+
+class CursorPaginator:
+    """
+    Keyset (cursor) пагинация по убыванию pk.
+
+    Страница после курсора выбирается условием pk < after, перед
+    курсором — pk > before, поэтому база читает только per_page + 1
+    строк по индексу первичного ключа на любой глубине, а не
+    пропускает все предыдущие строки, как при OFFSET.
+    """
+
+    def __init__(self, queryset, per_page, count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is not None:
+            return self._count
+        return self.queryset.count()
+
+    def page(self, after=None, before=None):
+        """
+        Возвращает страницу после курсора after (более старые записи)
+        или перед курсором before (более новые). Без курсоров —
+        первую страницу.
+        """
+        after = self._parse_cursor(after)
+        before = self._parse_cursor(before)
+
+        if before is not None:
+            rows = list(
+                self.queryset.filter(pk__gt=before)
+                .order_by('pk')[:self.per_page + 1]
+            )
+            if len(rows) > self.per_page:
+                rows = rows[:self.per_page]
+                rows.reverse()
+                has_next = self.queryset.filter(pk__lte=before).exists()
+                return CursorPage(rows, self, has_next, True)
+            # Дошли до начала списка: показываем полную первую страницу
+            after = None
+
+        rows = list(self._descending(after)[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(
+            rows[:self.per_page], self, has_next, after is not None
+        )
+
+    def _descending(self, after):
+        queryset = self.queryset.order_by('-pk')
+        if after is not None:
+            queryset = queryset.filter(pk__lt=after)
+        return queryset
+
+    @staticmethod
+    def _parse_cursor(value):
+        try:
+            return int(value) if value not in (None, '') else None
+        except (TypeError, ValueError):
+            return None
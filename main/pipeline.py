@@ -0,0 +1,239 @@
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Маркер конца потока данных между стадиями конвейера.
+_DONE = object()
+
+
+class StageStats:
+    """
+    Счётчики одной стадии конвейера: сколько записей и батчей
+    обработано и сколько времени стадия была занята работой.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.busy_time = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items, elapsed):
+        with self._lock:
+            self.items += items
+            self.batches += 1
+            self.busy_time += elapsed
+
+    @property
+    def throughput(self):
+        """Записей в секунду занятого времени стадии."""
+        if not self.busy_time:
+            return 0.0
+        return self.items / self.busy_time
+
+    def __str__(self):
+        return (
+            f"{self.name}: {self.items} items in {self.batches} batches, "
+            f"{self.throughput:.0f} items/s"
+        )
+
+
+class IngestionPipeline:
+    """
+    Конвейер загрузки пользователей: fetch → validate → save.
+
+    Стадии связаны ограниченными очередями, поэтому быстрая стадия
+    блокируется, пока медленная не освободит место (backpressure),
+    а пиковая память зависит от размера очередей, а не от total.
+    Запросы к API и валидация выполняются в фоновых потоках,
+    запись в DB — в вызывающем потоке (у него своё соединение с DB).
+    При ошибке любой стадии остальные останавливаются.
+    """
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, service=None, queue_size=None, fetch_workers=None):
+        if service is None:
+            from main.services import RandomUserService
+            service = RandomUserService()
+        if queue_size is None:
+            queue_size = getattr(
+                settings, 'RANDOM_USER_PIPELINE_QUEUE_SIZE', 4
+            )
+        if fetch_workers is None:
+            fetch_workers = service.get_concurrency()
+
+        self.service = service
+        self.fetch_workers = max(1, fetch_workers)
+        self.raw_queue = queue.Queue(maxsize=max(1, queue_size))
+        self.write_queue = queue.Queue(maxsize=max(1, queue_size))
+        self.stats = {
+            name: StageStats(name) for name in ('fetch', 'validate', 'write')
+        }
+        self.error = None
+
+        self._stop = threading.Event()
+        self._state = threading.Condition()
+        self._total = 0
+        self._reserved = 0
+        self._rejected = 0
+        self._saved = 0
+
+    def run(self, total):
+        """
+        Загружает total пользователей и возвращает число сохранённых.
+        Недостающие из-за невалидных записей добираются новыми батчами.
+        """
+        self._total = total
+        if total <= 0:
+            return 0
+        self.service.reset_batch_size()
+
+        fetchers = [
+            threading.Thread(target=self._fetch_stage, daemon=True)
+            for _ in range(self.fetch_workers)
+        ]
+        validator = threading.Thread(
+            target=self._validate_stage,
+            args=(len(fetchers),),
+            daemon=True
+        )
+        for thread in fetchers + [validator]:
+            thread.start()
+
+        try:
+            self._write_stage()
+        except Exception as e:
+            self._fail('write', e)
+        finally:
+            self._stop.set()
+            with self._state:
+                self._state.notify_all()
+            for thread in fetchers + [validator]:
+                thread.join()
+
+        for stage in self.stats.values():
+            logger.info(f"Pipeline {stage}")
+        return self._saved
+
+    def _fail(self, stage, error):
+        """Запоминает первую ошибку и останавливает все стадии."""
+        if self.error is None:
+            self.error = error
+            logger.error(f"Pipeline stage {stage} failed: {error}")
+        self._stop.set()
+        with self._state:
+            self._state.notify_all()
+
+    def _put(self, target_queue, item):
+        """Блокирующая запись в очередь, прерываемая остановкой."""
+        while not self._stop.is_set():
+            try:
+                target_queue.put(item, timeout=self.POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source_queue):
+        """Блокирующее чтение из очереди, прерываемое остановкой."""
+        while not self._stop.is_set():
+            try:
+                return source_queue.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _reserve_batch(self):
+        """
+        Резервирует размер следующего запроса к API. Ждёт, пока уже
+        запрошенных записей достаточно, и возвращает 0, когда
+        загрузка завершена или остановлена.
+        """
+        with self._state:
+            while not self._stop.is_set():
+                if self._saved >= self._total:
+                    return 0
+                outstanding = self._reserved - self._rejected
+                size = min(
+                    self._total - outstanding,
+                    self.service.batch_size.size
+                )
+                if size > 0:
+                    self._reserved += size
+                    return size
+                self._state.wait(self.POLL_INTERVAL)
+            return 0
+
+    def _fetch_stage(self):
+        try:
+            while True:
+                size = self._reserve_batch()
+                if not size:
+                    break
+                started = time.monotonic()
+                data = self.service.fetch_with_retry(size)
+                self.stats['fetch'].add(len(data), time.monotonic() - started)
+                if not data:
+                    raise RuntimeError("No users returned by API")
+                if len(data) < size:
+                    with self._state:
+                        self._reserved -= size - len(data)
+                        self._state.notify_all()
+                if not self._put(self.raw_queue, data):
+                    break
+        except Exception as e:
+            self._fail('fetch', e)
+        finally:
+            self._put(self.raw_queue, _DONE)
+
+    def _validate_stage(self, producers):
+        try:
+            while producers:
+                data = self._get(self.raw_queue)
+                if data is _DONE:
+                    if self._stop.is_set():
+                        break
+                    producers -= 1
+                    continue
+                started = time.monotonic()
+                users = self.service.validate_users(data)
+                self.stats['validate'].add(
+                    len(data), time.monotonic() - started
+                )
+                if data and not users:
+                    raise RuntimeError("No valid users in last batch")
+                with self._state:
+                    self._rejected += len(data) - len(users)
+                    self._state.notify_all()
+                if not self._put(self.write_queue, users):
+                    break
+        except Exception as e:
+            self._fail('validate', e)
+        finally:
+            self._put(self.write_queue, _DONE)
+
+    def _write_stage(self):
+        while True:
+            users = self._get(self.write_queue)
+            if users is _DONE:
+                break
+            started = time.monotonic()
+            saved_count = self.service.write_users(users)
+            self.stats['write'].add(saved_count, time.monotonic() - started)
+            if users and not saved_count:
+                raise RuntimeError("No new users in last batch")
+            with self._state:
+                self._saved += saved_count
+                # Уже существующие люди добираются новыми батчами,
+                # как и невалидные записи
+                self._rejected += len(users) - saved_count
+                remaining = max(self._total - self._saved, 0)
+                self._state.notify_all()
+            logger.info(f"Saved {saved_count} users, {remaining} remaining")
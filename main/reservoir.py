@@ -0,0 +1,101 @@
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from main import metrics
+from main.models import RandomUser, ReservoirUser
+
+logger = logging.getLogger(__name__)
+
+
+def get_watermarks():
+    """
+    Границы резерва (low, high): когда в резерве не больше low записей,
+    воркер пополняет его до high. high = 0 отключает резерв.
+    """
+    high = max(0, getattr(settings, 'RANDOM_USER_RESERVOIR_HIGH', 1000))
+    low = getattr(settings, 'RANDOM_USER_RESERVOIR_LOW', 500)
+    return min(max(0, low), high), high
+
+
+def reservoir_size():
+    return ReservoirUser.objects.count()
+
+
+@transaction.atomic
+def take(count):
+    """
+    Забирает из резерва до count записей (validated_data, самые старые
+    первыми) и удаляет их. Вызывается в транзакции записи, поэтому при
+    ошибке записи записи возвращаются в резерв. В PostgreSQL строки
+    блокируются с SKIP LOCKED, и параллельные загрузки не получат одну
+    запись; в остальных базах повторно выданная запись отсеется при
+    записи по dedup_key.
+    """
+    if count <= 0:
+        return []
+    queryset = ReservoirUser.objects.order_by('pk')
+    if connection.features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True)
+    rows = list(queryset.values_list('pk', 'data')[:count])
+    if rows:
+        ReservoirUser.objects.filter(pk__in=[pk for pk, _ in rows]).delete()
+        metrics.RESERVOIR_TAKEN.inc(len(rows))
+    return [data for _, data in rows]
+
+
+def store(records):
+    """
+    Добавляет в резерв провалидированные записи, кроме уже
+    опубликованных и уже лежащих в резерве людей (по dedup_key).
+    Возвращает число добавленных записей.
+    """
+    by_key = {}
+    for data in records:
+        key = RandomUser.compute_dedup_key(
+            data['email'], data['first_name'], data['last_name']
+        )
+        by_key.setdefault(key, data)
+    keys = list(by_key)
+    known = set(
+        RandomUser.objects.filter(dedup_key__in=keys)
+        .values_list('dedup_key', flat=True)
+    )
+    known.update(
+        ReservoirUser.objects.filter(dedup_key__in=keys)
+        .values_list('dedup_key', flat=True)
+    )
+    new = [
+        ReservoirUser(dedup_key=key, data=data)
+        for key, data in by_key.items() if key not in known
+    ]
+    # Конфликт возможен только с параллельным пополнением
+    ReservoirUser.objects.bulk_create(new, ignore_conflicts=True)
+    return len(new)
+
+
+def refill(service=None):
+    """
+    Пополняет резерв из API до верхней границы, если в нём не больше
+    нижней. Возвращает число добавленных записей.
+    """
+    low, high = get_watermarks()
+    size = reservoir_size()
+    if not high or size > low:
+        return 0
+    if service is None:
+        from main.services import RandomUserService
+        service = RandomUserService()
+
+    added = 0
+    while size + added < high:
+        count = min(high - size - added, service.batch_size.size)
+        records = service.validate_records(service.fetch_with_retry(count))
+        stored = store(records)
+        if not stored:
+            # Все записи батча уже известны: не опрашиваем API по кругу
+            break
+        added += stored
+    logger.info(f"Reservoir refilled with {added} users to {size + added}")
+    return added
@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """API считается недоступным: запросы не отправляются до паузы."""
+
+
+class RetryPolicy:
+    """
+    Повторы с экспоненциальной паузой и полным джиттером: перед
+    попыткой n ждём случайное время от 0 до min(max_delay, base·2ⁿ),
+    чтобы параллельные загрузчики не повторяли запросы синхронно.
+    """
+
+    def __init__(self, retries=3, base_delay=0.5, max_delay=10.0, rng=None):
+        self.retries = max(0, retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._random = rng or random.Random()
+
+    def delay(self, attempt):
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return self._random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Размыкатель: после failure_threshold ошибок подряд запросы
+    не выполняются reset_timeout секунд. Затем пропускается один
+    пробный запрос: успех замыкает цепь, ошибка снова размыкает.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0,
+                 clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Можно ли отправить запрос сейчас."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_ignored(self):
+        """
+        Запрос завершился ошибкой, ничего не говорящей о здоровье API
+        (например, 4xx): серия ошибок и состояние цепи не меняются,
+        освобождается только место пробного запроса.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if (
+                self._trial_in_flight
+                or self._failures >= self.failure_threshold
+            ):
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+class AdaptiveBatchSize:
+    """
+    Размер батча, подстраивающийся под API: после таймаута
+    уменьшается вдвое, после медленного ответа (дольше target_latency)
+    — на четверть, а после grow_after быстрых ответов подряд
+    растёт на четверть, но не выходит за [minimum, maximum].
+    """
+
+    def __init__(self, initial, minimum=1, maximum=None, target_latency=2.0,
+                 grow_after=3):
+        self.minimum = max(1, minimum)
+        self.maximum = max(maximum or initial, self.minimum)
+        self.target_latency = target_latency
+        self.grow_after = max(1, grow_after)
+        self._size = min(max(initial, self.minimum), self.maximum)
+        self._healthy = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size
+
+    def record_success(self, latency):
+        with self._lock:
+            if latency > self.target_latency:
+                self._healthy = 0
+                self._resize(int(self._size * 0.75))
+                return
+            self._healthy += 1
+            if self._healthy >= self.grow_after:
+                self._healthy = 0
+                self._resize(self._size + max(1, self._size // 4))
+
+    def record_timeout(self):
+        with self._lock:
+            self._healthy = 0
+            self._resize(self._size // 2)
+
+    def _resize(self, size):
+        self._size = min(max(size, self.minimum), self.maximum)
@@ -0,0 +1,111 @@
+import logging
+import sys
+import unicodedata
+
+from django.db import connections
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ('first_name', 'last_name', 'email')
+# Колонки RandomUser с normalize(значение поля), по которым идёт поиск
+SEARCH_COLUMNS = {field: f'{field}_search' for field in SEARCH_FIELDS}
+MAX_SEARCH_TERMS = 5
+# Минимальная длина слова для поиска подстроки по триграммам
+TRIGRAM_MIN_LENGTH = 3
+
+
+def normalize(value):
+    """
+    Строка для сравнения без учёта регистра: NFKC и casefold. Так
+    готовятся и колонки *_search при записи, и слова запроса, поэтому
+    результат не зависит от LOWER() базы (в SQLite он меняет только
+    ASCII, и «Émile» не нашёлся бы по «émile»).
+    """
+    value = str(value)
+    folded = unicodedata.normalize(
+        'NFKC', unicodedata.normalize('NFKC', value).casefold()
+    )
+    # Уже нормализованная строка (обычно email) не хранится дважды
+    return value if folded == value else folded
+
+
+def _prefix_upper_bound(prefix):
+    """
+    Наименьшая строка, большая всех строк с данным префиксом:
+    'abc' → 'abd', или None, если такой строки нет (префикс из одних
+    U+10FFFF). Условие col >= 'abc' AND col < 'abd' читает B-tree
+    индекс и совпадает с префиксным при побайтовом сравнении строк
+    (BINARY в SQLite).
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # Суррогаты не кодируются в UTF-8: следующий символ — U+E000
+        code = 0xE000
+    return prefix[:-1] + chr(code)
+
+
+def _prefix_condition(column, term):
+    condition = Q(**{f'{column}__gte': term})
+    upper = _prefix_upper_bound(term)
+    if upper is not None:
+        condition &= Q(**{f'{column}__lt': upper})
+    return condition
+
+
+def search_users(queryset, query):
+    """
+    Фильтрует пользователей по строке поиска: каждое слово должно быть
+    началом имени, фамилии или email (без учёта регистра, по колонкам
+    *_search).
+
+    В PostgreSQL диапазон >= / < совпадает с префиксом только при
+    collation "C", поэтому там используется LIKE 'слово%' по индексам
+    varchar_pattern_ops, а слова от трёх символов ищутся и как
+    подстрока через триграммные индексы.
+    """
+    terms = normalize(query).split()[:MAX_SEARCH_TERMS]
+    if not terms:
+        return queryset
+
+    postgres = connections[queryset.db].vendor == 'postgresql'
+    for term in terms:
+        condition = Q()
+        for column in SEARCH_COLUMNS.values():
+            if not postgres:
+                condition |= _prefix_condition(column, term)
+            elif len(term) >= TRIGRAM_MIN_LENGTH:
+                condition |= Q(**{f'{column}__contains': term})
+            else:
+                condition |= Q(**{f'{column}__startswith': term})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def create_postgres_search_indexes(using='default', **kwargs):
+    """
+    Обработчик post_migrate: в PostgreSQL создаёт расширение pg_trgm и
+    GIN-индексы по колонкам *_search для поиска подстроки (contains)
+    и удаляет прежние индексы по UPPER(поле).
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    from main.models import RandomUser
+
+    table = RandomUser._meta.db_table
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except Exception as e:
+            logger.warning(f"pg_trgm is unavailable, skipping: {e}")
+            return
+        for field, column in SEARCH_COLUMNS.items():
+            cursor.execute(f'DROP INDEX IF EXISTS {table}_{field}_trgm')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm '
+                f'ON {table} USING gin ("{column}" gin_trgm_ops)'
+            )
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from main.models import RandomUser
+from main.models import IngestionJob, RandomUser
 
 
 class RandomUserSerializer(serializers.ModelSerializer):
@@ -66,3 +66,48 @@ class RandomUserSerializer(serializers.ModelSerializer):
         if not isinstance(value, dict):
             raise serializers.ValidationError("location must be a dict")
         return value
+
+
+class RandomUserReadSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для отдачи пользователей через JSON API
+    в формате модели RandomUser.
+    """
+
+    class Meta:
+        model = RandomUser
+        fields = [
+            'id', 'gender', 'first_name', 'last_name',
+            'phone', 'email', 'location', 'picture'
+        ]
+        read_only_fields = fields
+
+
+class NearbyUserSerializer(RandomUserReadSerializer):
+    """
+    Пользователь из поиска по координатам: с координатами и, для
+    поиска ближайших, расстоянием до точки запроса.
+    """
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta(RandomUserReadSerializer.Meta):
+        fields = RandomUserReadSerializer.Meta.fields + [
+            'latitude', 'longitude', 'distance_km'
+        ]
+        read_only_fields = fields
+
+    def get_distance_km(self, user):
+        distance = getattr(user, 'distance_km', None)
+        return None if distance is None else round(distance, 3)
+
+
+class IngestionJobSerializer(serializers.ModelSerializer):
+    """Состояние задания на загрузку пользователей."""
+
+    class Meta:
+        model = IngestionJob
+        fields = [
+            'id', 'status', 'requested', 'saved', 'remaining', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -1,11 +1,21 @@
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
 from django.db import transaction
-from rest_framework.exceptions import ValidationError
 
-from main.models import RandomUser
-from main.serializers import RandomUserSerializer
+from main import metrics, reservoir, stats
+from main.counts import exact_user_count
+from main.models import Counter, RandomUser
+from main.page_cache import bump_dataset_version
+from main.resilience import (
+    AdaptiveBatchSize, CircuitBreaker, CircuitOpenError, RetryPolicy
+)
+from main.validators import RandomUserBatchValidator
+from main.writers import EMPTY_RESULT, bulk_write_users, get_conflict_mode
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +32,51 @@ class RandomUserService:
 
     def __init__(self):
         if RandomUserService._shared_session is None:
-            RandomUserService._shared_session = requests.Session()
+            session = requests.Session()
+            # Пул соединений должен вмещать все параллельные запросы,
+            # иначе urllib3 будет закрывать лишние соединения.
+            pool_size = max(10, self.get_concurrency())
+            adapter = HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            RandomUserService._shared_session = session
         self.session = RandomUserService._shared_session
+        self.validator = RandomUserBatchValidator()
+        # Накопленный итог записи: inserted / updated / skipped
+        self.write_result = EMPTY_RESULT
+        self.retry_policy = RetryPolicy(
+            retries=getattr(settings, 'RANDOM_USER_FETCH_RETRIES', 3),
+            base_delay=getattr(settings, 'RANDOM_USER_RETRY_BASE_DELAY', 0.5),
+            max_delay=getattr(settings, 'RANDOM_USER_RETRY_MAX_DELAY', 10.0),
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=getattr(
+                settings, 'RANDOM_USER_CIRCUIT_FAILURES', 5
+            ),
+            reset_timeout=getattr(settings, 'RANDOM_USER_CIRCUIT_RESET', 30),
+        )
+        self.reset_batch_size()
+
+    @staticmethod
+    def get_base_url():
+        """
+        Адрес API (настройка RANDOM_USER_API_URL). Позволяет направить
+        загрузку на локальную замену: python manage.py run_fake_api.
+        """
+        return getattr(
+            settings, 'RANDOM_USER_API_URL', RandomUserService.BASE_URL_API
+        )
+
+    @staticmethod
+    def get_concurrency():
+        """
+        Число одновременных запросов к API (настройка
+        RANDOM_USER_FETCH_CONCURRENCY, по умолчанию 1 — последовательно).
+        """
+        concurrency = getattr(settings, 'RANDOM_USER_FETCH_CONCURRENCY', 1)
+        return max(1, int(concurrency))
 
     def fetch_users(self, count=1):
         """
@@ -38,66 +91,272 @@ class RandomUserService:
             'noinfo': True
         }
 
+        started = time.perf_counter()
+        outcome = 'error'
         try:
             response = self.session.get(
-                RandomUserService.BASE_URL_API, params=base_params, timeout=10
+                self.get_base_url(), params=base_params, timeout=10
             )
             response.raise_for_status()
             data = response.json()['results']
+            outcome = 'success'
             return data
         except requests.ConnectionError:
+            metrics.FETCH_ERRORS.inc(reason='connection')
             logger.error("No internet connection")
             raise
         except requests.Timeout:
+            metrics.FETCH_ERRORS.inc(reason='timeout')
             logger.error('Request timed out')
             raise
-        except requests.RequestException as e:
+        except requests.HTTPError as e:
+            metrics.FETCH_ERRORS.inc(reason='http')
             logger.error(f'API request failed: {e}')
             raise
-
         except (KeyError, ValueError) as e:
+            # Сюда же попадает requests.JSONDecodeError
+            metrics.FETCH_ERRORS.inc(reason='invalid_response')
             logger.error(f'Invalid API response: {e}')
             raise
+        except requests.RequestException as e:
+            metrics.FETCH_ERRORS.inc(reason='request')
+            logger.error(f'API request failed: {e}')
+            raise
+        finally:
+            metrics.FETCH_SECONDS.observe(
+                time.perf_counter() - started, outcome=outcome
+            )
+
+    def reset_batch_size(self):
+        """
+        Начинает подбор размера батча заново с DEFAULT_BATCH_SIZE
+        (в начале каждой загрузки).
+        """
+        initial = RandomUserService.DEFAULT_BATCH_SIZE
+        self.batch_size = AdaptiveBatchSize(
+            initial,
+            minimum=min(
+                initial, getattr(settings, 'RANDOM_USER_MIN_BATCH_SIZE', 50)
+            ),
+            maximum=max(
+                initial,
+                getattr(settings, 'RANDOM_USER_MAX_BATCH_SIZE', 5000)
+            ),
+            target_latency=getattr(
+                settings, 'RANDOM_USER_TARGET_LATENCY', 2.0
+            ),
+        )
+
+    def fetch_with_retry(self, count=1):
+        """
+        fetch_users с повторами временных ошибок (таймауты, обрывы
+        соединения, 5xx и 429, битые ответы) через паузы RetryPolicy.
+        Ошибки учитываются размыкателем: при разомкнутой цепи
+        выбрасывается CircuitOpenError без запроса к API. После
+        таймаута батч уменьшается, и повтор запрашивает меньше записей.
+        """
+        for attempt in range(self.retry_policy.retries + 1):
+            if not self.circuit_breaker.allow():
+                raise CircuitOpenError(
+                    "randomuser.me circuit is open, not sending requests"
+                )
+            started = time.perf_counter()
+            try:
+                data = self.fetch_users(count)
+            except Exception as e:
+                if not self._is_retryable(e):
+                    self.circuit_breaker.record_ignored()
+                    raise
+                self.circuit_breaker.record_failure()
+                if isinstance(e, requests.Timeout):
+                    self.batch_size.record_timeout()
+                    count = min(count, self.batch_size.size)
+                if attempt == self.retry_policy.retries:
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                logger.warning(
+                    f"Fetch attempt {attempt + 1} failed: {e}, "
+                    f"retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                continue
+            self.circuit_breaker.record_success()
+            self.batch_size.record_success(time.perf_counter() - started)
+            return data
+
+    @staticmethod
+    def _is_retryable(error):
+        if isinstance(error, requests.HTTPError):
+            status = getattr(error.response, 'status_code', None)
+            return status is None or status == 429 or status >= 500
+        return isinstance(error, (
+            requests.ConnectionError, requests.Timeout,
+            requests.exceptions.ChunkedEncodingError, KeyError, ValueError,
+        ))
 
     @transaction.atomic
     def save_users(self, users_data):
         """
         Сохраняем данные в DB
         """
-        users = []
-        for user_data in users_data:
-            try:
-                users.append(self._create_user(user_data))
-            except ValidationError as e:
-                logger.warning(f'Invalid user data: {e}')
-                continue
+        return self.write_users(self.validate_users(users_data))
+
+    def validate_users(self, users_data, on_error=None):
+        """
+        Валидирует сырые данные API и возвращает несохранённые объекты
+        модели. Невалидные записи пропускаются с предупреждением в логе;
+        если передан on_error, он вызывается как on_error(index, error).
+        """
+        return [
+            self._build_user(data)
+            for data in self.validate_records(users_data, on_error)
+        ]
+
+    def validate_records(self, users_data, on_error=None):
+        """
+        То же, что validate_users, но возвращает validated_data
+        (словари в формате модели), например для резерва.
+        """
+        validated, errors = self.validator.validate(users_data)
+        for index, error in errors:
+            logger.warning(f'Invalid user data: {error}')
+            metrics.RECORDS_REJECTED.inc(reason=self._rejection_reason(error))
+            if on_error is not None:
+                on_error(index, error)
+        if validated:
+            metrics.RECORDS_VALIDATED.inc(len(validated))
+        return validated
+
+    @transaction.atomic
+    def write_users(self, users):
+        """
+        Записывает уже провалидированные объекты модели одной транзакцией
+        (COPY в PostgreSQL, bulk_create порциями в остальных базах).
+        Уже существующие люди (по dedup_key) не дублируются.
+        В той же транзакции обновляется статистика main.stats.
+        Возвращает число новых записей; подробный итог копится
+        в self.write_result.
+        """
         try:
             if users:
-                created = RandomUser.objects.bulk_create(users)
-                return len(created)
+                conflict_mode = get_conflict_mode()
+                for user in users:
+                    if user.dedup_key is None:
+                        user.sync_dedup_key()
+                previous = stats.existing_dimensions(
+                    {user.dedup_key for user in users}
+                )
+                with metrics.DB_WRITE_SECONDS.time():
+                    result = bulk_write_users(
+                        users, conflict_mode, existing_keys=previous
+                    )
+                counted = stats.record_write(users, previous, conflict_mode)
+                if counted != result.inserted:
+                    # Те же люди записаны параллельной загрузкой
+                    logger.warning(
+                        f"User statistics counted {counted} new users, "
+                        f"{result.inserted} inserted; run rebuild_user_stats"
+                    )
+                self.write_result += result
+                transaction.on_commit(
+                    lambda: self._count_written_rows(result)
+                )
+                if result.updated or result.skipped:
+                    logger.info(
+                        f"Inserted {result.inserted}, "
+                        f"updated {result.updated}, "
+                        f"skipped {result.skipped} duplicate users"
+                    )
+                if result.inserted:
+                    Counter.objects.increment(
+                        Counter.USER_COUNT, result.inserted,
+                        initial=exact_user_count
+                    )
+                    transaction.on_commit(
+                        RandomUser.objects.invalidate_id_range
+                    )
+                if result.inserted or result.updated:
+                    # Закэшированные страницы устаревают только после
+                    # фиксации транзакции
+                    transaction.on_commit(bump_dataset_version)
+                return result.inserted
             return 0
         except Exception as e:
             logger.error(f"Database error: {e}")
             raise
 
-    def load_initial_users(self, total=1000):
+    def load_initial_users(self, total=1000, concurrency=None,
+                           on_progress=None):
+        """
+        Основной метод для взаимодействия с данным сервисом.
+        Сначала берёт записи из резерва (main.reservoir), а из API
+        запрашивает только недостающих; при concurrency > 1 батчи
+        запрашиваются параллельно.
+        on_progress(saved) вызывается после каждого сохранённого батча.
+        Возвращает число сохранённых пользователей.
+        """
+        if concurrency is None:
+            concurrency = self.get_concurrency()
+        self.reset_batch_size()
+
+        reserved = self._load_from_reservoir(total)
+        if reserved and on_progress is not None:
+            on_progress(reserved)
+        if reserved >= total:
+            return reserved
+
+        progress = on_progress
+        if on_progress is not None and reserved:
+            def progress_after_reservoir(saved):
+                on_progress(reserved + saved)
+            progress = progress_after_reservoir
+
+        if concurrency > 1:
+            return reserved + self._load_concurrently(
+                total - reserved, concurrency, progress
+            )
+        return reserved + self._load_sequentially(total - reserved, progress)
+
+    def _load_from_reservoir(self, total):
         """
-        Основной метод для взаимодействия с данным сервисом
+        Публикует до total записей из резерва в одной транзакции с их
+        удалением из резерва. Уже существующие люди отсеиваются при
+        записи, и недостающих load_initial_users добирает из API.
+        Возвращает число сохранённых пользователей.
         """
+        try:
+            with transaction.atomic():
+                records = reservoir.take(total)
+                if not records:
+                    return 0
+                saved = self.write_users(
+                    [self._build_user(data) for data in records]
+                )
+        except Exception as e:
+            logger.error(f"Reservoir load failed: {e}")
+            return 0
+        logger.info(
+            f"Saved {saved} of {len(records)} users from reservoir"
+        )
+        return saved
 
+    def _load_sequentially(self, total, on_progress=None):
+        """Запрашивает батчи по одному, пока не сохранит total."""
         remaining = total
 
         while remaining > 0:
 
-            current_size = min(remaining, RandomUserService.DEFAULT_BATCH_SIZE)
+            current_size = min(remaining, self.batch_size.size)
             try:
 
-                data = self.fetch_users(current_size)
+                data = self.fetch_with_retry(current_size)
                 saved_count = self.save_users(data)
                 remaining -= saved_count or 0
                 logger.info(
                     f"Saved { saved_count} users, {remaining} remaining"
                 )
+                if on_progress is not None:
+                    on_progress(total - remaining)
 
                 if saved_count == 0:
                     raise RuntimeError("No users saved in last batch")
@@ -107,13 +366,98 @@ class RandomUserService:
             except Exception as e:
                 logger.error(f"Batch failed: {e}")
                 break
+        return total - remaining
+
+    def load_pipelined(self, total=1000, queue_size=None,
+                       fetch_workers=None):
+        """
+        Загрузка через конвейер fetch → validate → save, в котором
+        сеть, валидация и запись в DB выполняются одновременно.
+        fetch_workers — число одновременных запросов к API (по
+        умолчанию как у load_initial_users).
+        Возвращает число сохранённых пользователей.
+        """
+        from main.pipeline import IngestionPipeline
+
+        pipeline = IngestionPipeline(
+            self, queue_size=queue_size, fetch_workers=fetch_workers
+        )
+        return pipeline.run(total)
+
+    def _load_concurrently(self, total, concurrency, on_progress=None):
+        """
+        Держит до concurrency запросов к API одновременно.
+        Запросы выполняются в пуле потоков, а сохранение — в текущем
+        потоке (у каждого потока было бы своё соединение с DB).
+        Ошибка одного батча не прерывает уже запущенные: новые батчи
+        просто перестают ставиться в очередь, как в последовательном режиме.
+        """
+        remaining = total
+        pending = 0
+        stopping = False
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while in_flight or (remaining - pending > 0 and not stopping):
+                while (
+                    not stopping
+                    and len(in_flight) < concurrency
+                    and remaining - pending > 0
+                ):
+                    size = min(remaining - pending, self.batch_size.size)
+                    future = executor.submit(self.fetch_with_retry, size)
+                    in_flight[future] = size
+                    pending += size
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending -= in_flight.pop(future)
+                    try:
+                        saved_count = self.save_users(future.result())
+                    except Exception as e:
+                        logger.error(f"Batch failed: {e}")
+                        stopping = True
+                        continue
+                    remaining -= saved_count or 0
+                    logger.info(
+                        f"Saved {saved_count} users, {remaining} remaining"
+                    )
+                    if on_progress is not None:
+                        on_progress(total - remaining)
+                    if saved_count == 0:
+                        logger.warning(
+                            "No users saved in last batch, stopping"
+                        )
+                        stopping = True
+        return total - remaining
+
+    @staticmethod
+    def _rejection_reason(error):
+        """Поле, из-за которого запись отклонена (первое по порядку)."""
+        if isinstance(error.detail, dict) and error.detail:
+            return next(iter(error.detail))
+        return 'invalid'
+
+    @staticmethod
+    def _count_written_rows(result):
+        for name, count in result._asdict().items():
+            if count:
+                metrics.ROWS_WRITTEN.inc(count, result=name)
 
     def _create_user(self, user_data):
         """
-        Вальдируем данные пользователя с помощью DRF-сериализатора.
+        Вальдируем данные пользователя пакетным валидатором
+        (с теми же правилами, что и у RandomUserSerializer).
         Возвращаем объект модели без сохранения (используется в bulk_create).
         """
-        serializer = RandomUserSerializer(data=user_data)
-        serializer.is_valid(raise_exception=True)
+        return self._build_user(self.validator.validate_one(user_data))
 
-        return RandomUser(**serializer.validated_data)
+    @staticmethod
+    def _build_user(validated_data):
+        """
+        Создаёт несохранённый объект модели и заполняет колонки,
+        денормализованные из location.
+        """
+        user = RandomUser(**validated_data)
+        user.sync_derived_columns()
+        return user
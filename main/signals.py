@@ -0,0 +1,75 @@
+from collections import Counter as Tally
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from main import stats
+from main.counts import exact_user_count
+from main.models import Counter, RandomUser, UserStat
+from main.page_cache import bump_dataset_version
+
+
+@receiver(post_save, sender=RandomUser)
+def increment_user_count(sender, instance, created, **kwargs):
+    """
+    Поддерживает счётчик пользователей при создании по одному
+    (bulk_create сигналов не шлёт, его учитывает RandomUserService).
+    """
+    if created:
+        Counter.objects.increment(
+            Counter.USER_COUNT, 1, initial=exact_user_count
+        )
+
+
+@receiver(post_delete, sender=RandomUser)
+def decrement_user_count(sender, instance, **kwargs):
+    """Поддерживает счётчик пользователей при удалении записей."""
+    Counter.objects.increment(
+        Counter.USER_COUNT, -1, initial=exact_user_count
+    )
+
+
+@receiver(post_save, sender=RandomUser)
+@receiver(post_delete, sender=RandomUser)
+def invalidate_user_pages(sender, **kwargs):
+    """
+    Изменение пользователя по одному (админка, dedupe_users) тоже
+    делает закэшированные страницы устаревшими.
+    """
+    transaction.on_commit(bump_dataset_version)
+
+
+@receiver(pre_save, sender=RandomUser)
+def remember_stat_dimensions(sender, instance, raw=False, **kwargs):
+    """Запоминает признаки изменяемого пользователя до сохранения."""
+    instance._stat_dimensions = None
+    if instance.pk is None or raw:
+        return
+    row = RandomUser.objects.filter(pk=instance.pk).values_list(
+        *stats.SOURCE_FIELDS
+    ).first()
+    if row is not None:
+        instance._stat_dimensions = stats.dimensions(*row)
+
+
+@receiver(post_save, sender=RandomUser)
+def update_stats_on_save(sender, instance, created, **kwargs):
+    """
+    Поддерживает статистику main.stats при сохранении по одному
+    (пакетную запись учитывает RandomUserService).
+    """
+    deltas = Tally(stats.user_dimensions(instance))
+    previous = getattr(instance, '_stat_dimensions', None)
+    if not created:
+        if previous is None:
+            return
+        deltas.subtract(previous)
+    UserStat.objects.apply(deltas)
+
+
+@receiver(post_delete, sender=RandomUser)
+def update_stats_on_delete(sender, instance, **kwargs):
+    deltas = Tally()
+    deltas.subtract(stats.user_dimensions(instance))
+    UserStat.objects.apply(deltas)
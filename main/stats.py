@@ -0,0 +1,157 @@
+import logging
+import operator
+from collections import Counter as Tally
+
+from django.db import transaction
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Concat
+
+from main.models import RandomUser, UserStat
+from main.writers import CONFLICT_UPDATE, KEY_LOOKUP_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Разбивки, которые отдаёт API статистики
+DIMENSIONS = (UserStat.GENDER, UserStat.COUNTRY, UserStat.EMAIL_DOMAIN)
+# Колонки, из которых считаются признаки
+SOURCE_FIELDS = ('gender', 'country', 'email')
+# Разделитель пола и страны в значении признака GENDER_COUNTRY
+PAIR_SEPARATOR = '|'
+# Сколько email читается за запрос при пересчёте доменов
+REBUILD_CHUNK_SIZE = 2000
+
+
+def email_domain(email):
+    """
+    Домен email в нижнем регистре. Считается только в Python (и при
+    записи, и при пересчёте): LOWER() в SQLite не меняет регистр
+    не-ASCII букв, и числа разошлись бы.
+    """
+    return email.partition('@')[2].lower()
+
+
+def gender_country(gender, country):
+    """Значение признака GENDER_COUNTRY."""
+    return f'{gender}{PAIR_SEPARATOR}{country}'
+
+
+def split_gender_country(value):
+    """(пол, страна) из значения признака GENDER_COUNTRY."""
+    gender, _, country = value.partition(PAIR_SEPARATOR)
+    return gender, country
+
+
+def dimensions(gender, country, email):
+    """Пары (признак, значение) одного пользователя."""
+    return (
+        (UserStat.GENDER, gender),
+        (UserStat.COUNTRY, country),
+        (UserStat.EMAIL_DOMAIN, email_domain(email)),
+        (UserStat.GENDER_COUNTRY, gender_country(gender, country)),
+    )
+
+
+_source_values = operator.attrgetter(*SOURCE_FIELDS)
+
+
+def user_dimensions(user):
+    return dimensions(*_source_values(user))
+
+
+def existing_dimensions(keys):
+    """
+    {dedup_key: признаки} уже записанных людей из keys: по ним запись
+    батча отличает новых людей от повторов и знает старые значения
+    обновляемых.
+    """
+    keys = list(keys)
+    existing = {}
+    for start in range(0, len(keys), KEY_LOOKUP_BATCH_SIZE):
+        rows = RandomUser.objects.filter(
+            dedup_key__in=keys[start:start + KEY_LOOKUP_BATCH_SIZE]
+        ).values_list('dedup_key', *SOURCE_FIELDS)
+        for key, *values in rows:
+            existing[key] = dimensions(*values)
+    return existing
+
+
+def record_write(users, previous, conflict_mode):
+    """
+    Учитывает в статистике батч, записанный bulk_write_users: новые
+    люди прибавляются, у обновлённых (режим update) старые значения
+    заменяются новыми. previous — existing_dimensions до записи.
+    Вызывается в транзакции записи. Возвращает число новых людей.
+    """
+    deltas = Tally()
+    seen = set()
+    inserted = 0
+    for user in users:
+        if user.dedup_key in seen:
+            continue
+        seen.add(user.dedup_key)
+        old = previous.get(user.dedup_key)
+        if old is None:
+            inserted += 1
+        elif conflict_mode == CONFLICT_UPDATE:
+            deltas.subtract(old)
+        else:
+            continue
+        deltas.update(user_dimensions(user))
+    UserStat.objects.apply(deltas)
+    return inserted
+
+
+def get_breakdown(dimension, limit=None):
+    """
+    [(значение, число)] по убыванию числа из таблицы UserStat: время
+    не зависит от числа пользователей.
+    """
+    queryset = UserStat.objects.filter(
+        dimension=dimension, count__gt=0
+    ).order_by('-count', 'value').values_list('value', 'count')
+    if limit is not None:
+        queryset = queryset[:limit]
+    return list(queryset)
+
+
+@transaction.atomic
+def rebuild():
+    """
+    Пересчитывает статистику полным проходом по таблице (нужен после
+    изменений в обход сервиса или для проверки): пол и страна —
+    GROUP BY, домены — email_domain по всем email, как при записи.
+    Возвращает число строк статистики.
+    """
+    expressions = {
+        UserStat.GENDER: F('gender'),
+        UserStat.COUNTRY: F('country'),
+        UserStat.GENDER_COUNTRY: Concat(
+            'gender', Value(PAIR_SEPARATOR), 'country',
+            output_field=CharField()
+        ),
+    }
+    rows = []
+    for dimension, expression in expressions.items():
+        groups = (
+            RandomUser.objects.order_by()
+            .values(stat_value=expression)
+            .annotate(total=Count('pk'))
+        )
+        rows.extend(
+            UserStat(dimension=dimension, value=group['stat_value'],
+                     count=group['total'])
+            for group in groups
+        )
+    emails = RandomUser.objects.order_by().values_list('email', flat=True)
+    domains = Tally(
+        email_domain(email)
+        for email in emails.iterator(chunk_size=REBUILD_CHUNK_SIZE)
+    )
+    rows.extend(
+        UserStat(dimension=UserStat.EMAIL_DOMAIN, value=domain, count=count)
+        for domain, count in domains.items()
+    )
+    UserStat.objects.all().delete()
+    UserStat.objects.bulk_create(rows)
+    logger.info(f"Rebuilt user statistics: {len(rows)} rows")
+    return len(rows)
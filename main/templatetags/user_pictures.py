@@ -0,0 +1,11 @@
+from django import template
+
+from main.thumbnails import proxy_url
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(url):
+    """Адрес фото пользователя через локальное хранилище."""
+    return proxy_url(url)
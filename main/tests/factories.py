@@ -0,0 +1,62 @@
+import itertools
+
+from main.models import RandomUser
+
+
+def mock_user_data(**overrides):
+    """Запись одного человека в формате ответа randomuser.me."""
+    data = {
+        'gender': 'male',
+        'name': {'first': 'John', 'last': 'Doe'},
+        'phone': '123-456-7890',
+        'email': 'john.doe@example.com',
+        'location': {'city': 'New York', 'country': 'USA'},
+        'picture': {'thumbnail': 'http://example.com/thumb.jpg'}
+    }
+    data.update(overrides)
+    return data
+
+
+def unique_users(template=None):
+    """
+    Функция count -> список записей: каждый вызов возвращает новых
+    людей (с разными email). Подходит как side_effect для fetch_users.
+    """
+    template = template or mock_user_data()
+    user_ids = itertools.count()
+
+    def make(count):
+        return [
+            dict(template, email=f'user{next(user_ids)}@example.com')
+            for _ in range(count)
+        ]
+    return make
+
+
+def user_factory(**defaults):
+    """
+    Функция **поля -> RandomUser, сохранённый в DB. Каждый вызов создаёт
+    следующего человека (User0 / user0@example.com, User1 ...), поэтому
+    ключи дедупликации не совпадают. defaults задают поля для всех
+    людей фабрики, аргументы вызова — для одного; save=False возвращает
+    несохранённый объект (для bulk_create).
+    """
+    user_ids = itertools.count()
+
+    def make(save=True, **fields):
+        index = next(user_ids)
+        values = {
+            'gender': 'male',
+            'first_name': f'User{index}',
+            'last_name': 'Test',
+            'email': f'user{index}@example.com',
+            'phone': '000-000-000',
+            'picture': '',
+            'location': {},
+        }
+        values.update(defaults)
+        values.update(fields)
+        if not save:
+            return RandomUser(**values)
+        return RandomUser.objects.create(**values)
+    return make
@@ -0,0 +1,83 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from main.models import RandomUser
+from main.tests.factories import user_factory
+
+
+class UserAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_user = user_factory(
+            picture='http://example.com/user.jpg',
+            location={'city': 'Moscow', 'country': 'Russia'}
+        )
+        cls.users = [create_user() for _ in range(5)]
+
+    def test_list(self):
+        """Список отдаётся постранично с курсором на следующую страницу."""
+        response = self.client.get(reverse('api_users'), {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [user['id'] for user in data['results']],
+            [self.users[4].pk, self.users[3].pk]
+        )
+        self.assertIsNone(data['previous'])
+
+        next_page = self.client.get(data['next']).json()
+        self.assertEqual(next_page['results'][0]['id'], self.users[2].pk)
+
+    def test_detail(self):
+        """Детальная информация о пользователе."""
+        response = self.client.get(
+            reverse('api_user', kwargs={'user_pk': self.users[0].pk})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['first_name'], 'User0')
+        self.assertEqual(response.json()['location']['city'], 'Moscow')
+
+    def test_detail_404(self):
+        """Несуществующий пользователь."""
+        response = self.client.get(
+            reverse('api_user', kwargs={'user_pk': 999})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_random(self):
+        """Несколько разных случайных пользователей за один запрос."""
+        response = self.client.get(reverse('api_random_user'), {'count': 3})
+        self.assertEqual(response.status_code, 200)
+        ids = {user['id'] for user in response.json()}
+        self.assertEqual(len(ids), 3)
+
+    def test_random_invalid_count(self):
+        """Некорректный count даёт 400."""
+        for count in ('abc', '0', '1000'):
+            with self.subTest(count=count):
+                response = self.client.get(
+                    reverse('api_random_user'), {'count': count}
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_random_empty(self):
+        """Случайный пользователь при пустой таблице."""
+        RandomUser.objects.all().delete()
+        RandomUser.objects.invalidate_id_range()
+        response = self.client.get(reverse('api_random_user'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_stream_ndjson(self):
+        """NDJSON-выгрузка отдаёт всех пользователей по строке на каждого."""
+        response = self.client.get(reverse('api_users_stream'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['id'] for row in rows],
+                         [user.pk for user in self.users])
+        self.assertEqual(rows[0]['location']['country'], 'Russia')
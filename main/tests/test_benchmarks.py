@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from main.benchmarks import (
+    compare_with_baseline, fixture_records, run_benchmarks
+)
+from main.models import RandomUser
+
+
+class IngestionBenchmarkTest(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.baseline_path = os.path.join(self.tmpdir.name, 'baseline.json')
+
+    def _benchmark(self, **options):
+        call_command(
+            'benchmark_ingestion', sizes='50', repeat=1,
+            baseline=self.baseline_path, stdout=StringIO(), **options
+        )
+
+    def test_fixture_records_fixed(self):
+        """Фиксированный набор данных одинаков от запуска к запуску."""
+        self.assertEqual(fixture_records(5), fixture_records(5))
+        self.assertEqual(
+            set(fixture_records(1)[0]),
+            {'gender', 'name', 'phone', 'email', 'location', 'picture'}
+        )
+
+    def test_run_benchmarks(self):
+        """Все сценарии замеряются, записанное откатывается."""
+        report = run_benchmarks([50], repeat=1)
+        self.assertEqual(
+            set(report['results']),
+            {'validate:50', 'write:50', 'end_to_end:50'}
+        )
+        for result in report['results'].values():
+            self.assertGreater(result['records_per_second'], 0)
+            self.assertIn('peak_memory_kb', result)
+        self.assertEqual(RandomUser.objects.count(), 0)
+
+    def test_end_to_end_skips_reservoir(self):
+        """Полный путь замеряется без записей из резерва."""
+        with patch('main.reservoir.take') as take:
+            run_benchmarks([50], scenarios=['end_to_end'], repeat=1,
+                           memory=False)
+        take.assert_not_called()
+
+    def test_compare_with_baseline(self):
+        """Замедление и рост памяти сверх допуска — регрессии."""
+        baseline = {'results': {'write:50': {
+            'records_per_second': 1000, 'peak_memory_kb': 100
+        }}}
+        ok = {'results': {'write:50': {
+            'records_per_second': 800, 'peak_memory_kb': 120
+        }}}
+        slow = {'results': {'write:50': {
+            'records_per_second': 500, 'peak_memory_kb': 200
+        }}}
+        self.assertEqual(compare_with_baseline(ok, baseline), [])
+        self.assertEqual(len(compare_with_baseline(slow, baseline)), 2)
+
+    def test_command_fails_on_regression(self):
+        """Команда падает, если результат хуже базовой линии."""
+        self._benchmark(scenarios='validate', update_baseline=True)
+        with open(self.baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        baseline['results']['validate:50']['records_per_second'] *= 1000
+        with open(self.baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f)
+
+        with self.assertRaisesMessage(CommandError, 'validate:50'):
+            self._benchmark(scenarios='validate', no_memory=True)
@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from main.counts import get_user_count
+from main.models import Counter, RandomUser
+from main.services import RandomUserService
+from main.tests.factories import mock_user_data, unique_users
+
+
+class UserCountTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.mock_user_data = mock_user_data()
+        self._unique_users = unique_users(self.mock_user_data)
+
+    def _create_user(self, i):
+        return RandomUser.objects.create(
+            first_name=f'User{i}',
+            last_name='Test',
+            email=f'user{i}@example.com',
+            gender='male',
+            phone='000-000-000',
+            picture='',
+            location={}
+        )
+
+    def test_exact_count(self):
+        """Режим exact считает строки таблицы."""
+        for i in range(3):
+            self._create_user(i)
+        self.assertEqual(get_user_count('exact'), 3)
+
+    def test_counter_follows_ingestion(self):
+        """Счётчик обновляется при сохранении и удалении пользователей."""
+        RandomUserService().save_users(self._unique_users(4))
+        self.assertEqual(get_user_count('counter'), 4)
+
+        user = self._create_user(0)
+        self.assertEqual(get_user_count('counter'), 5)
+
+        user.delete()
+        RandomUser.objects.filter(pk__in=list(
+            RandomUser.objects.values_list('pk', flat=True)[:2]
+        )).delete()
+        self.assertEqual(get_user_count('counter'), 2)
+
+    def test_counter_initialized_from_table(self):
+        """Отсутствующий счётчик инициализируется точным значением."""
+        for i in range(2):
+            self._create_user(i)
+        Counter.objects.all().delete()
+        self.assertEqual(get_user_count('counter'), 2)
+
+    def test_estimated_count(self):
+        """Оценка на SQLite берётся из диапазона id без COUNT(*)."""
+        users = [self._create_user(i) for i in range(3)]
+        RandomUser.objects.invalidate_id_range()
+        self.assertEqual(get_user_count('estimate'), 3)
+        RandomUser.objects.filter(pk=users[1].pk).delete()
+        RandomUser.objects.invalidate_id_range()
+        self.assertEqual(get_user_count('estimate'), 3)
+
+    @override_settings(USER_COUNT_MODE='counter')
+    def test_badge_uses_provider(self):
+        """Бейдж и пагинатор используют выбранный провайдер."""
+        for i in range(12):
+            self._create_user(i)
+        Counter.objects.filter(name=Counter.USER_COUNT).update(value=42)
+
+        response = self.client.get(reverse('main'))
+
+        self.assertEqual(response.context['paginator'].count, 42)
+        self.assertContains(response, 'Всего пользователей: 42')
@@ -0,0 +1,103 @@
+import csv
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from main.export import iter_user_chunks
+from main.tests.factories import user_factory
+
+
+class ExportUsersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_user = user_factory(
+            gender='female', picture='http://example.com/user.jpg',
+            location={'city': 'Paris', 'country': 'France'}
+        )
+        cls.users = [create_user() for _ in range(7)]
+
+    def _export(self, *args):
+        out = StringIO()
+        call_command('export_users', *args, stdout=out)
+        return out.getvalue()
+
+    def test_chunks_cover_table(self):
+        """Порции по pk покрывают всю таблицу без повторов."""
+        chunks = list(iter_user_chunks(chunk_size=3))
+        self.assertEqual([len(rows) for rows in chunks], [3, 3, 1])
+        ids = [row['id'] for rows in chunks for row in rows]
+        self.assertEqual(ids, [user.pk for user in self.users])
+
+    def test_ndjson(self):
+        """NDJSON: по пользователю на строку."""
+        lines = self._export('--format', 'ndjson').splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(json.loads(lines[0])['location']['city'], 'Paris')
+
+    def test_csv(self):
+        """CSV с заголовком и location в виде JSON."""
+        rows = list(csv.DictReader(StringIO(
+            self._export('--format', 'csv', '--chunk-size', '2')
+        )))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1]['first_name'], 'User1')
+        self.assertEqual(json.loads(rows[1]['location'])['country'], 'France')
+
+    def test_columnar(self):
+        """Колоночный формат: строка на порцию с массивами значений."""
+        blocks = [
+            json.loads(line) for line in self._export(
+                '--format', 'columnar', '--chunk-size', '5'
+            ).splitlines()
+        ]
+        self.assertEqual([block['count'] for block in blocks], [5, 2])
+        self.assertEqual(blocks[1]['columns']['first_name'],
+                         ['User5', 'User6'])
+
+    def _shard_ids(self, shard):
+        lines = self._export(
+            '--shard', str(shard), '--shards', '3'
+        ).splitlines()
+        return [json.loads(line)['id'] for line in lines]
+
+    def test_shards_are_disjoint(self):
+        """Части выгрузки не пересекаются и вместе дают всю таблицу."""
+        ids = [pk for shard in range(3) for pk in self._shard_ids(shard)]
+        self.assertEqual(sorted(ids), [user.pk for user in self.users])
+
+    def test_shards_started_apart(self):
+        """
+        Части, запущенные до и после вставки новых строк, не
+        пересекаются, а новые строки попадают в ещё не выгруженные.
+        """
+        ids = self._shard_ids(0)
+        create_user = user_factory(last_name='New')
+        added = [create_user() for _ in range(3)]
+        ids += self._shard_ids(1) + self._shard_ids(2)
+
+        self.assertEqual(len(ids), len(set(ids)))
+        expected = [user.pk for user in self.users] + [
+            user.pk for user in added if user.pk % 3
+        ]
+        self.assertEqual(sorted(ids), sorted(expected))
+
+    def test_shard_bounds(self):
+        """Некорректный номер части."""
+        with self.assertRaises(ValueError):
+            iter_user_chunks(shard=3, shards=3)
+        with self.assertRaises(CommandError):
+            self._export('--shard', '3', '--shards', '3')
+
+    def test_id_range(self):
+        """Выгрузка диапазона id."""
+        lines = self._export(
+            '--min-id', str(self.users[2].pk),
+            '--max-id', str(self.users[4].pk)
+        ).splitlines()
+        self.assertEqual(
+            [json.loads(line)['id'] for line in lines],
+            [user.pk for user in self.users[2:5]]
+        )
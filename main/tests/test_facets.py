@@ -0,0 +1,152 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main import facets
+from main.models import UserStat
+from main.services import RandomUserService
+from main.tests.factories import user_factory
+
+
+@override_settings(USER_PAGE_CACHE_TIMEOUT=0)
+class FacetFilterTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self._create_user = user_factory(
+            last_name='Doe', picture='http://example.com/thumb.jpg'
+        )
+        # 3 мужчины и 1 женщина из США, 2 женщины из Франции
+        for gender, country in [
+            ('male', 'USA'), ('male', 'USA'), ('male', 'USA'),
+            ('female', 'USA'), ('female', 'France'), ('female', 'France'),
+        ]:
+            self._create(gender, country)
+
+    def _create(self, gender, country):
+        return self._create_user(
+            gender=gender, location={'city': 'City', 'country': country}
+        )
+
+    def _list(self, **params):
+        response = self.client.get(reverse('main'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_filtered_pages(self):
+        """Фильтры по полу и стране сочетаются друг с другом."""
+        response = self._list(gender='female')
+        self.assertEqual(len(response.context['user_list']), 3)
+        self.assertEqual(response.context['paginator'].count, 3)
+
+        response = self._list(gender='female', country='USA')
+        users = response.context['user_list']
+        self.assertEqual([user.first_name for user in users], ['User3'])
+
+        response = self._list(country='Spain')
+        self.assertContains(response, 'Нет пользователей')
+
+    def test_facet_counts_follow_other_filter(self):
+        """Числа фасета учитывают фильтр по другому признаку."""
+        self.assertEqual(facets.facet_options(), {
+            'gender': [('female', 3), ('male', 3)],
+            'country': [('USA', 4), ('France', 2)],
+        })
+        options = self._list(country='France').context['facets']
+        self.assertEqual(options['gender'], [('female', 2)])
+        self.assertEqual(options['country'], [('USA', 4), ('France', 2)])
+
+    def test_no_count_query(self):
+        """Число записей и фасеты не считаются по таблице пользователей."""
+        self._list(gender='male')
+        with CaptureQueriesContext(connection) as queries:
+            response = self._list(gender='male', country='USA')
+
+        self.assertEqual(response.context['paginator'].count, 3)
+        sql = ' '.join(query['sql'] for query in queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('USERSTAT', sql)
+
+    def test_counts_refreshed_after_commit(self):
+        """Запись пользователей обновляет закэшированные числа."""
+        self.assertEqual(facets.filtered_count(country='Spain'), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            RandomUserService().save_users([{
+                'gender': 'male',
+                'name': {'first': 'Pablo', 'last': 'Ruiz'},
+                'phone': '123',
+                'email': 'pablo@example.com',
+                'location': {'city': 'Madrid', 'country': 'Spain'},
+                'picture': {'thumbnail': 'http://example.com/thumb.jpg'},
+            }])
+
+        self.assertEqual(facets.filtered_count(country='Spain'), 1)
+        self.assertContains(self._list(), 'Spain (1)')
+
+    def test_counts_refreshed_after_worker_commit(self):
+        """
+        Числа обновляются и после загрузки другим процессом со своим
+        кэшем (воркер): закэшированные здесь числа не остаются старыми.
+        """
+        self.assertEqual(facets.filtered_count(country='Spain'), 0)
+        with patch('main.page_cache.cache', LocMemCache('worker', {})):
+            with self.captureOnCommitCallbacks(execute=True):
+                RandomUserService().save_users([{
+                    'gender': 'male',
+                    'name': {'first': 'Pablo', 'last': 'Ruiz'},
+                    'phone': '123',
+                    'email': 'pablo@example.com',
+                    'location': {'city': 'Madrid', 'country': 'Spain'},
+                    'picture': {'thumbnail': 'http://example.com/thumb.jpg'},
+                }])
+
+        self.assertEqual(facets.filtered_count(country='Spain'), 1)
+
+    def test_stale_stats_do_not_hide_rows(self):
+        """
+        Если статистика отстаёт (например, ещё не пересчитана), число
+        из неё только оценка: страницы показывают все найденные строки.
+        """
+        for _ in range(9):
+            self._create('male', 'USA')
+        UserStat.objects.all().delete()
+        cache.clear()
+
+        response = self._list(gender='male')
+        self.assertEqual(len(response.context['user_list']), 10)
+        self.assertTrue(response.context['page_obj'].has_next())
+
+        response = self._list(gender='male', page=2)
+        self.assertEqual(len(response.context['user_list']), 2)
+        self.assertEqual(response.context['paginator'].count, 12)
+        self.assertFalse(response.context['page_obj'].has_next())
+        response = self.client.get(
+            reverse('main'), {'gender': 'male', 'page': 3}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_pagination_keeps_filters(self):
+        """Ссылки пагинации сохраняют выбранные фильтры."""
+        for _ in range(10):
+            self._create('male', 'USA')
+        response = self._list(gender='male')
+        self.assertContains(response, '?gender=male&amp;page=2')
+
+        with override_settings(USER_LIST_PAGINATION='cursor'):
+            response = self._list(gender='male', country='USA')
+            page = response.context['page_obj']
+            self.assertEqual(len(page), 10)
+            self.assertTrue(page.has_next())
+            response = self._list(
+                gender='male', country='USA', after=page.next_cursor
+            )
+        self.assertEqual(
+            {user.gender for user in response.context['user_list']},
+            {'male'}
+        )
+        self.assertEqual(len(response.context['user_list']), 3)
@@ -0,0 +1,61 @@
+import requests
+from django.test import TestCase, override_settings
+
+from main.fake_api import FakeRandomUserServer, FaultConfig, build_response
+from main.models import RandomUser
+from main.services import RandomUserService
+
+
+class FakeApiTest(TestCase):
+
+    def _serve(self, **faults):
+        server = FakeRandomUserServer(faults=FaultConfig(seed=1, **faults))
+        server.start()
+        self.addCleanup(server.stop)
+        settings_override = override_settings(RANDOM_USER_API_URL=server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return server
+
+    def test_build_response_params(self):
+        """inc, results, noinfo, seed и page как у настоящего API."""
+        params = {'inc': ['gender,email'], 'results': ['3'], 'seed': ['abc']}
+        body = build_response(params)
+        self.assertEqual(len(body['results']), 3)
+        self.assertEqual(set(body['results'][0]), {'gender', 'email'})
+        self.assertEqual(body['info']['seed'], 'abc')
+
+        self.assertEqual(build_response(params), body)
+        next_page = build_response(dict(params, page=['2']))
+        self.assertNotEqual(next_page['results'], body['results'])
+        self.assertNotIn('info', build_response(dict(params, noinfo=[''])))
+
+    def test_service_loads_from_fake_api(self):
+        """Сервис загружает и сохраняет пользователей с локального API."""
+        self._serve()
+        service = RandomUserService()
+        self.assertEqual(len(service.fetch_users(5)), 5)
+        self.assertEqual(service.load_initial_users(total=20), 20)
+        self.assertEqual(RandomUser.objects.count(), 20)
+
+    def test_fault_responses(self):
+        """Ошибки API, обрывы и битые ответы приводят к исключениям."""
+        cases = [
+            ({'error_rate': 1}, requests.HTTPError),
+            ({'api_error_rate': 1}, KeyError),
+            ({'malformed_rate': 1}, ValueError),
+            ({'truncate_rate': 1}, requests.RequestException),
+        ]
+        for faults, error in cases:
+            with self.subTest(faults=faults):
+                self._serve(**faults)
+                with self.assertLogs('main.services', level='ERROR'):
+                    with self.assertRaises(error):
+                        RandomUserService().fetch_users(10)
+
+    def test_invalid_records(self):
+        """Испорченные записи отклоняются валидацией."""
+        self._serve(invalid_record_rate=1)
+        service = RandomUserService()
+        with self.assertLogs('main.services', level='WARNING'):
+            self.assertEqual(service.save_users(service.fetch_users(5)), 0)
@@ -0,0 +1,168 @@
+import random
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from main import geo
+from main.models import RandomUser
+from main.tests.factories import user_factory
+
+
+class GeoGridTest(TestCase):
+
+    def test_parse_coordinates(self):
+        """Координаты API приходят строками; мусор даёт (None, None)."""
+        location = {'coordinates': {'latitude': '-12.5', 'longitude': '45'}}
+        self.assertEqual(geo.parse_coordinates(location), (-12.5, 45.0))
+        for location in (
+            {}, 'x', {'coordinates': {'latitude': 'north'}},
+            {'coordinates': {'latitude': '91', 'longitude': '0'}},
+        ):
+            self.assertEqual(geo.parse_coordinates(location), (None, None))
+
+    def test_cell_id(self):
+        """Крайние широты и долготы попадают в крайние ячейки."""
+        self.assertEqual(geo.cell_id(-90, -180), 0)
+        last = geo.GRID_ROWS * geo.GRID_COLUMNS - 1
+        self.assertEqual(geo.cell_id(90, 180), last)
+        self.assertIsNone(geo.cell_id(None, 10))
+
+    def test_radius_bbox(self):
+        """Прямоугольник вокруг круга у меридиана 180 и у полюса."""
+        min_lat, min_lon, max_lat, max_lon = geo.radius_bbox(0, 179.9, 100)
+        self.assertGreater(min_lon, max_lon)
+        self.assertAlmostEqual(max_lat, 0.8993, places=3)
+
+        self.assertEqual(geo.radius_bbox(89.5, 0, 100)[1::2], (-180, 180))
+
+    def test_bbox_ranges_merged(self):
+        """Полосы широт на всю долготу сливаются в один диапазон."""
+        condition = geo.bbox_q(-10, -180, 10, 180)
+        self.assertEqual(str(condition).count('geo_cell__range'), 1)
+
+
+class GeoQueryTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self._build_user = user_factory(
+            last_name='Doe', picture='http://example.com/thumb.jpg'
+        )
+
+    def _create(self, points):
+        users = []
+        for latitude, longitude in points:
+            user = self._build_user(save=False, location={
+                'coordinates': {
+                    'latitude': str(latitude),
+                    'longitude': str(longitude),
+                },
+            })
+            user.sync_derived_columns()
+            users.append(user)
+        return RandomUser.objects.bulk_create(users)
+
+    def test_columns_filled_on_save(self):
+        """Координаты и ячейка заполняются при сохранении."""
+        user = self._create([(55.75, 37.62)])[0]
+        user.refresh_from_db()
+        self.assertEqual((user.latitude, user.longitude), (55.75, 37.62))
+        self.assertEqual(user.geo_cell, geo.cell_id(55.75, 37.62))
+
+    def test_nearest_matches_brute_force(self):
+        """kNN совпадает с полным перебором, в том числе у меридиана 180."""
+        rng = random.Random(7)
+        points = [
+            (rng.uniform(-80, 80), rng.uniform(-180, 180))
+            for _ in range(300)
+        ] + [(1, 179.95), (1, -179.95)]
+        self._create(points)
+
+        for latitude, longitude in [(0, 0), (1, 179.99), (60, -30)]:
+            expected = sorted(
+                geo.haversine_km(latitude, longitude, lat, lon)
+                for lat, lon in points
+            )[:5]
+            found = geo.nearest(latitude, longitude, k=5)
+            self.assertEqual(len(found), 5)
+            for user, distance in zip(found, expected):
+                self.assertAlmostEqual(user.distance_km, distance, places=6)
+
+    def test_nearest_few_users(self):
+        """Если пользователей меньше k, возвращаются все."""
+        self._create([(10, 10), (-10, -170)])
+        self.assertEqual(len(geo.nearest(0, 0, k=5)), 2)
+        self.assertEqual(geo.nearest(None, 0), [])
+
+    def test_nearest_queries(self):
+        """При плотных данных поиск укладывается в два запроса."""
+        self._create([(0.01 * i, 0.01 * i) for i in range(20)])
+        with self.assertNumQueries(2):
+            users = geo.nearest(0, 0, k=3)
+        self.assertEqual([user.first_name for user in users],
+                         ['User0', 'User1', 'User2'])
+
+    def test_nearby_endpoint(self):
+        """Эндпоинт ближайших отдаёт расстояние и проверяет параметры."""
+        self._create([(0, 0), (0, 1), (0, 3)])
+
+        response = self.client.get(
+            reverse('api_users_nearby'), {'lat': 0, 'lon': 0.9, 'k': 2}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([user['first_name'] for user in data],
+                         ['User1', 'User0'])
+        self.assertAlmostEqual(data[0]['distance_km'], 11.119, places=2)
+
+        for params in ({'lat': 91, 'lon': 0}, {'lon': 0}, {'lat': 0,
+                       'lon': 0, 'k': 0}):
+            response = self.client.get(reverse('api_users_nearby'), params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_bbox_endpoint(self):
+        """Прямоугольник, в том числе через 180-й меридиан."""
+        self._create([(0, 179.5), (0, -179.5), (0, 0), (5, 179.5)])
+
+        response = self.client.get(
+            reverse('api_users_nearby'), {'bbox': '-1,179,1,-179'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(user['first_name'] for user in response.json()),
+            ['User0', 'User1']
+        )
+        response = self.client.get(
+            reverse('api_users_nearby'), {'bbox': '1,0,-1,0'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_profile_nearby_panel(self):
+        """В профиле показываются ближайшие пользователи, кроме него."""
+        users = self._create([(0, 0), (0, 0.1), (40, 40)])
+
+        response = self.client.get(users[0].get_absolute_url())
+
+        nearby = response.context['nearby_users']
+        self.assertEqual([user.pk for user in nearby][:2],
+                         [users[1].pk, users[2].pk])
+        self.assertContains(response, 'Рядом')
+        self.assertContains(response, '11 км')
+
+    def test_backfill_geo_columns(self):
+        """Команда заполняет координаты у старых записей."""
+        users = self._create([(10, 20), (30, 40)])
+        RandomUser.objects.update(latitude=None, longitude=None,
+                                  geo_cell=None)
+
+        out = StringIO()
+        call_command('backfill_geo_columns', stdout=out)
+
+        self.assertIn('Backfilled coordinates for 2 users', out.getvalue())
+        users[1].refresh_from_db()
+        self.assertEqual(users[1].geo_cell, geo.cell_id(30, 40))
@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from main.importer import iter_records
+from main.models import RandomUser
+from main.tests.factories import mock_user_data, unique_users
+
+
+class ImportUsersTest(TestCase):
+
+    def setUp(self):
+        self.mock_user_data = mock_user_data()
+        self._unique_users = unique_users(self.mock_user_data)
+        self.invalid_user_data = dict(self.mock_user_data, email='bad')
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.errors_path = os.path.join(self.tmpdir.name, 'errors.ndjson')
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def _import(self, *paths, **options):
+        out = StringIO()
+        call_command(
+            'import_users', *paths, errors=self.errors_path,
+            stdout=out, stderr=StringIO(), **options
+        )
+        return out.getvalue()
+
+    def test_iter_records_formats(self):
+        """Поддерживаются NDJSON, массив и ответ API."""
+        record = self.mock_user_data
+        inputs = [
+            '\n'.join(json.dumps(record) for _ in range(3)) + '\n',
+            json.dumps([record] * 3, indent=2),
+            json.dumps({'results': [record] * 3}, indent=2),
+            json.dumps({'results': [record]}) + '\n'
+            + json.dumps({'results': [record, record]}) + '\n',
+        ]
+        for content in inputs:
+            with self.subTest(content=content[:20]):
+                with patch('main.importer.READ_CHUNK_SIZE', 16):
+                    records = list(iter_records(StringIO(content)))
+                self.assertEqual([n for n, _ in records], [1, 2, 3])
+                self.assertEqual(records[2][1], record)
+
+    def test_iter_records_empty(self):
+        """Пустой вход."""
+        self.assertEqual(list(iter_records(StringIO('  \n'))), [])
+
+    def test_import_with_rejected_records(self):
+        """Невалидные записи попадают в sidecar-файл."""
+        first, second = self._unique_users(2)
+        path = self._write('users.ndjson', '\n'.join([
+            json.dumps(first),
+            json.dumps(self.invalid_user_data),
+            json.dumps(second),
+        ]))
+
+        with self.assertLogs('main.services', level='WARNING'):
+            output = self._import(path, batch_size=2)
+
+        self.assertIn('Imported 2 users, rejected 1', output)
+        self.assertEqual(RandomUser.objects.count(), 2)
+        with open(self.errors_path, encoding='utf-8') as f:
+            errors = [json.loads(line) for line in f]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0]['record'], 2)
+        self.assertIn('email', errors[0]['errors'])
+        self.assertEqual(errors[0]['data']['email'], 'bad')
+
+    def test_import_api_response(self):
+        """Сохранённый ответ API загружается целиком."""
+        path = self._write(
+            'response.json',
+            json.dumps({'results': self._unique_users(4)})
+        )
+        self._import(path)
+        self.assertEqual(RandomUser.objects.count(), 4)
+        self.assertEqual(RandomUser.objects.first().city, 'New York')
+        # Без отклонённых записей файл ошибок не создаётся
+        self.assertFalse(os.path.exists(self.errors_path))
+
+    def test_import_twice(self):
+        """Повторная загрузка того же файла не дублирует людей."""
+        path = self._write(
+            'response.json',
+            json.dumps({'results': self._unique_users(3)})
+        )
+        self._import(path)
+        output = self._import(path)
+        self.assertIn('Imported 0 users', output)
+        self.assertIn('skipped 3', output)
+        self.assertEqual(RandomUser.objects.count(), 3)
+
+    def test_import_invalid_json(self):
+        """Битый JSON прерывает загрузку с понятной ошибкой."""
+        path = self._write('broken.ndjson', '{"gender": ')
+        with self.assertRaises(CommandError):
+            self._import(path)
+
+    def test_import_missing_file(self):
+        """Несуществующий файл."""
+        with self.assertRaises(CommandError):
+            self._import(os.path.join(self.tmpdir.name, 'missing.json'))
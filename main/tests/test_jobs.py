@@ -0,0 +1,118 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from main.jobs import claim_next_job, enqueue_ingestion, run_job
+from main.models import IngestionJob, RandomUser
+from main.services import RandomUserService
+from main.tests.factories import mock_user_data, unique_users
+
+
+class IngestionJobTest(TestCase):
+
+    def setUp(self):
+        self.mock_user_data = mock_user_data()
+        self._unique_users = unique_users(self.mock_user_data)
+
+    def test_claim_order(self):
+        """Задания забираются по порядку и только один раз."""
+        first = enqueue_ingestion(5)
+        second = enqueue_ingestion(7)
+
+        self.assertEqual(claim_next_job().pk, first.pk)
+        self.assertEqual(claim_next_job().pk, second.pk)
+        self.assertIsNone(claim_next_job())
+        first.refresh_from_db()
+        self.assertEqual(first.status, IngestionJob.RUNNING)
+        self.assertIsNotNone(first.started_at)
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_run_job_progress(self, mock_fetch):
+        """Прогресс сохраняется после каждого батча."""
+        job = enqueue_ingestion(5)
+        progress = []
+
+        def fake_fetch(count):
+            progress.append(IngestionJob.objects.get(pk=job.pk).saved)
+            return self._unique_users(count)
+
+        mock_fetch.side_effect = fake_fetch
+
+        with patch.object(RandomUserService, 'DEFAULT_BATCH_SIZE', 2):
+            job = run_job(claim_next_job())
+
+        self.assertEqual(progress, [0, 2, 4])
+        self.assertEqual(job.status, IngestionJob.DONE)
+        self.assertEqual(job.saved, 5)
+        self.assertEqual(RandomUser.objects.count(), 5)
+        self.assertIsNotNone(job.finished_at)
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_run_job_partial_failure(self, mock_fetch):
+        """Недогруженное задание помечается как failed."""
+        mock_fetch.return_value = []
+        job = enqueue_ingestion(3)
+
+        with self.assertLogs('main.services', level='WARNING'):
+            job = run_job(claim_next_job())
+
+        self.assertEqual(job.status, IngestionJob.FAILED)
+        self.assertIn('Loaded 0 of 3', job.error)
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_worker_once(self, mock_fetch):
+        """Воркер выполняет очередь и выходит с --once."""
+        mock_fetch.side_effect = self._unique_users
+        enqueue_ingestion(2)
+        enqueue_ingestion(1)
+
+        out = StringIO()
+        call_command('run_ingestion_worker', once=True, stdout=out)
+
+        self.assertIn('Processed 2 jobs', out.getvalue())
+        self.assertEqual(RandomUser.objects.count(), 3)
+        self.assertFalse(
+            IngestionJob.objects.exclude(status=IngestionJob.DONE).exists()
+        )
+
+    def test_stale_jobs_failed(self):
+        """
+        Задание умершего воркера (давняя отметка) завершается как
+        failed при запуске воркера, задание живого остаётся running.
+        """
+        enqueue_ingestion(5)
+        stale = claim_next_job()
+        enqueue_ingestion(3)
+        alive = claim_next_job()
+        IngestionJob.objects.filter(pk=stale.pk).update(
+            heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+
+        err = StringIO()
+        call_command(
+            'run_ingestion_worker', once=True, no_reservoir=True,
+            stdout=StringIO(), stderr=err
+        )
+
+        self.assertIn('Failed 1 stale jobs', err.getvalue())
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(stale.status, IngestionJob.FAILED)
+        self.assertIn('stopped responding', stale.error)
+        self.assertIsNotNone(stale.finished_at)
+        self.assertEqual(alive.status, IngestionJob.RUNNING)
+
+    def test_progress_endpoint(self):
+        """JSON-эндпоинт прогресса задания."""
+        job = IngestionJob.objects.create(requested=10, saved=3)
+        response = self.client.get(
+            reverse('ingestion_job', kwargs={'job_pk': job.pk})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['remaining'], 7)
+        self.assertEqual(response.json()['status'], IngestionJob.PENDING)
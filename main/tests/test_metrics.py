@@ -0,0 +1,152 @@
+import json
+import os
+import socket
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from main import metrics
+from main.services import RandomUserService
+
+
+class MetricsRegistryTest(TestCase):
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+        self.requests = metrics.CounterMetric(
+            self.registry, 'test_requests_total', 'Requests', ['code']
+        )
+        self.latency = metrics.HistogramMetric(
+            self.registry, 'test_latency_seconds', 'Latency',
+            buckets=(0.1, 1.0)
+        )
+
+    def test_render(self):
+        """Счётчики и гистограммы в формате Prometheus."""
+        self.requests.inc(code=200)
+        self.requests.inc(2, code=200)
+        self.latency.observe(0.05)
+        self.latency.observe(0.5)
+        self.latency.observe(5)
+
+        text = self.registry.render()
+
+        self.assertIn('# TYPE test_requests_total counter', text)
+        self.assertIn('test_requests_total{code="200"} 3', text)
+        self.assertIn('# TYPE test_latency_seconds histogram', text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('test_latency_seconds_count 3', text)
+        self.assertIn('test_latency_seconds_sum 5.55', text)
+
+    def test_wrong_labels(self):
+        """Набор меток должен совпадать с объявленным."""
+        with self.assertRaises(ValueError):
+            self.requests.inc(status=200)
+
+    def test_processes_aggregated(self):
+        """Снимки других процессов из METRICS_DIR суммируются."""
+        with tempfile.TemporaryDirectory() as directory:
+            other = [
+                ['test_requests_total', ['200'], 5],
+                ['test_latency_seconds', [], [1, 0, 0, 0.05, 1]],
+            ]
+            with open(os.path.join(directory, '1-1.json'), 'w') as f:
+                json.dump(other, f)
+
+            with override_settings(METRICS_DIR=directory):
+                self.requests.inc(code=200)
+                self.latency.observe(0.5)
+                text = self.registry.render()
+                files = os.listdir(directory)
+
+        self.assertEqual(len(files), 2)
+        self.assertIn('test_requests_total{code="200"} 6', text)
+        self.assertIn('test_latency_seconds_count 2', text)
+
+    def test_finished_snapshots_removed(self):
+        """
+        Снимки завершившихся процессов переносятся в снимок текущего и
+        удаляются, снимки процессов другой машины остаются.
+        """
+        host = socket.gethostname()
+        snapshots = {
+            # Завершился штатно
+            f'done-{host}-1-1.json': 1,
+            # Прежний процесс с тем же pid, что у текущего
+            f'{host}-{os.getpid()}-1.json': 2,
+            # Другая машина: живость не проверить
+            'other-host-1-1.json': 4,
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for filename, value in snapshots.items():
+                with open(os.path.join(directory, filename), 'w') as f:
+                    json.dump([['test_requests_total', ['200'], value]], f)
+
+            with override_settings(METRICS_DIR=directory):
+                self.requests.inc(code=200)
+                first = self.registry.render()
+                second = self.registry.render()
+                files = sorted(os.listdir(directory))
+                self.registry.close()
+                closed = sorted(os.listdir(directory))
+
+        self.assertIn('test_requests_total{code="200"} 8', first)
+        self.assertEqual(first, second)
+        own = self.registry._snapshot_name
+        self.assertEqual(files, sorted(['other-host-1-1.json', own]))
+        self.assertIn(f'done-{own}', closed)
+
+
+class MetricsInstrumentationTest(TestCase):
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+        self.mock_user_data = {
+            'gender': 'male',
+            'name': {'first': 'John', 'last': 'Doe'},
+            'phone': '123-456-7890',
+            'email': 'john.doe@example.com',
+            'location': {'city': 'New York', 'country': 'USA'},
+            'picture': {'thumbnail': 'http://example.com/thumb.jpg'}
+        }
+
+    def _value(self, name, **labels):
+        metric = metrics.REGISTRY.metrics[name]
+        key = tuple(str(labels[label]) for label in metric.labelnames)
+        return metrics.REGISTRY.collect().get((name, key))
+
+    def test_ingestion_metrics(self):
+        """Валидация и запись учитываются в метриках."""
+        invalid = dict(self.mock_user_data, email='bad')
+        with self.assertLogs('main.services', level='WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                RandomUserService().save_users(
+                    [self.mock_user_data, invalid]
+                )
+
+        self.assertEqual(
+            self._value('randomuser_records_validated_total'), 1
+        )
+        self.assertEqual(
+            self._value('randomuser_records_rejected_total', reason='email'),
+            1
+        )
+        self.assertEqual(
+            self._value('randomuser_rows_written_total', result='inserted'),
+            1
+        )
+        self.assertEqual(self._value('randomuser_db_write_seconds')[-1], 1)
+
+    def test_metrics_endpoint(self):
+        """Эндпоинт /metrics отдаёт текстовый формат Prometheus."""
+        self.client.get(reverse('random_user'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        self.assertContains(
+            response,
+            'http_request_duration_seconds_count'
+            '{view="random_user",method="GET"} 1'
+        )
@@ -0,0 +1,69 @@
+import re
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from main.tests.factories import user_factory
+
+
+class ServerTimingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = user_factory()(
+            first_name='John', last_name='Doe', email='john@example.com'
+        )
+
+    def _metrics(self, response):
+        header = response['Server-Timing']
+        return {
+            name: (float(duration), desc)
+            for name, duration, desc in re.findall(
+                r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', header
+            )
+        }
+
+    def test_server_timing_header(self):
+        """Заголовок содержит DB, шаблон и общее время."""
+        with self.assertLogs('main.middleware', level='INFO') as cm:
+            response = self.client.get(
+                reverse('user', kwargs={'user_pk': self.user.pk})
+            )
+        metrics = self._metrics(response)
+        self.assertEqual(set(metrics), {'db', 'tpl', 'total'})
+        self.assertRegex(metrics['db'][1], r'^[1-9]\d* queries$')
+        self.assertGreater(metrics['tpl'][0], 0)
+        self.assertGreaterEqual(metrics['total'][0], metrics['tpl'][0])
+        self.assertIn('view=user', cm.output[0])
+        self.assertIn('status=200', cm.output[0])
+
+    def test_fragment_render_timed(self):
+        """
+        Таблица списка, которую представление рендерит само через
+        render_to_string, учитывается во времени шаблона.
+        """
+        def slow_render(*args, **kwargs):
+            time.sleep(0.05)
+            return render_to_string(*args, **kwargs)
+
+        with patch('main.views.render_to_string', side_effect=slow_render):
+            response = self.client.get(reverse('main'))
+
+        self.assertGreaterEqual(self._metrics(response)['tpl'][0], 50)
+
+    def test_random_user_view(self):
+        """Заголовок есть и у страницы случайного пользователя."""
+        response = self.client.get(reverse('random_user'))
+        self.assertIn('db', self._metrics(response))
+
+    @override_settings(SLOW_REQUEST_QUERIES=0)
+    def test_slow_request_logged(self):
+        """Запрос сверх бюджета логируется как WARNING."""
+        with self.assertLogs('main.middleware', level='WARNING') as cm:
+            self.client.get(reverse('main'))
+        self.assertTrue(cm.output[0].startswith('WARNING'))
+        self.assertIn('slow_request', cm.output[0])
@@ -1,3 +1,8 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from ..models import RandomUser
@@ -47,6 +52,47 @@ class RandomUserModelTest(TestCase):
         self.assertEqual(str(self.user1), 'John')
         self.assertEqual(str(self.user2), 'Jane')
 
+    def test_location_columns(self):
+        """Колонки city/country заполняются из location при сохранении."""
+        self.assertEqual(self.user1.city, 'New York')
+        self.assertEqual(self.user2.country, 'UK')
+
+    def test_backfill_location_columns(self):
+        """Команда заполняет колонки у старых записей."""
+        RandomUser.objects.update(city='', country='')
+        call_command('backfill_location_columns', stdout=StringIO())
+        self.user1.refresh_from_db()
+        self.assertEqual(
+            (self.user1.city, self.user1.country), ('New York', 'USA')
+        )
+
+    def test_dedup_key(self):
+        """Ключ не зависит от регистра и пробелов по краям."""
+        self.assertEqual(
+            self.user1.dedup_key,
+            RandomUser.compute_dedup_key(' JOHN@example.com', 'john', 'DOE')
+        )
+        self.assertNotEqual(self.user1.dedup_key, self.user2.dedup_key)
+
+    def test_dedupe_users(self):
+        """Команда заполняет ключ у старых записей и удаляет повторы."""
+        RandomUser.objects.update(dedup_key=None)
+        duplicate = RandomUser.objects.create(
+            first_name='John', last_name='Doe', email='JOHN@example.com',
+            gender='male', phone='1', picture='', location={}
+        )
+        RandomUser.objects.update(dedup_key=None)
+
+        out = StringIO()
+        call_command('dedupe_users', stdout=out)
+        self.assertIn('for 2 users, found 1 duplicates', out.getvalue())
+        self.user1.refresh_from_db()
+        self.assertIsNotNone(self.user1.dedup_key)
+
+        call_command('dedupe_users', delete_duplicates=True, stdout=out)
+        self.assertFalse(RandomUser.objects.filter(pk=duplicate.pk).exists())
+        self.assertEqual(RandomUser.objects.count(), 2)
+
     def test_verbose_names(self):
         """Проверка verbose names полей"""
         field_verbose = {
@@ -65,3 +111,60 @@ class RandomUserModelTest(TestCase):
                     RandomUser._meta.get_field(field).verbose_name,
                     expected_verbose
                 )
+
+
+class RandomUserManagerRandomTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            RandomUser.objects.create(
+                gender='male',
+                first_name=f'User{i}',
+                last_name='Test',
+                location={},
+                email=f'user{i}@example.com',
+                phone='000-000-000',
+                picture='http://example.com/user.jpg'
+            )
+            for i in range(10)
+        ]
+
+    def test_random_returns_existing_user(self):
+        """Случайный пользователь выбирается из существующих."""
+        users = RandomUser.objects.random()
+        self.assertEqual(len(users), 1)
+        self.assertIn(users[0], self.users)
+
+    def test_random_count_distinct(self):
+        """При count > 1 возвращаются разные пользователи."""
+        users = RandomUser.objects.random(count=5)
+        self.assertEqual(len(users), 5)
+        self.assertEqual(len({user.pk for user in users}), 5)
+
+    def test_random_count_larger_than_table(self):
+        """Нельзя вернуть больше пользователей, чем есть в таблице."""
+        self.assertEqual(len(RandomUser.objects.random(count=50)), 10)
+
+    def test_random_with_holes(self):
+        """Удалённые id не ломают выборку."""
+        RandomUser.objects.filter(
+            pk__in=[user.pk for user in self.users[1:-1]]
+        ).delete()
+        for _ in range(20):
+            user = RandomUser.objects.random()[0]
+            self.assertIn(user.pk, (self.users[0].pk, self.users[-1].pk))
+
+    def test_random_stale_range(self):
+        """Устаревший кэш диапазона id пересчитывается."""
+        RandomUser.objects.id_range()
+        RandomUser.objects.all().delete()
+        self.assertEqual(RandomUser.objects.random(), [])
+        self.assertEqual(RandomUser.objects.id_range(), (None, None))
+
+    def test_random_query_count(self):
+        """Выборка не загружает все id таблицы."""
+        RandomUser.objects.id_range()
+        with patch('random.choice', return_value=self.users[3].pk):
+            with self.assertNumQueries(1):
+                user = RandomUser.objects.random()[0]
+        self.assertEqual(user, self.users[3])
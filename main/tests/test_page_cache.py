@@ -0,0 +1,127 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from main.jobs import enqueue_ingestion
+from main.models import IngestionJob, RandomUser
+from main.page_cache import bump_dataset_version, get_dataset_version
+from main.services import RandomUserService
+from main.tests.factories import user_factory
+
+
+class PageCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = user_factory()(
+            first_name='John', last_name='Doe', email='john@example.com'
+        )
+        self.mock_user_data = {
+            'gender': 'female',
+            'name': {'first': 'Jane', 'last': 'Smith'},
+            'phone': '123-456-7890',
+            'email': 'jane.smith@example.com',
+            'location': {'city': 'London', 'country': 'UK'},
+            'picture': {'thumbnail': 'http://example.com/thumb.jpg'}
+        }
+
+    def test_list_table_cached(self):
+        """
+        Повторный запрос списка берёт таблицу из кэша: к DB идут только
+        чтение версии набора и запрос панели заданий.
+        """
+        url = reverse('main')
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, 'john@example.com')
+
+    def test_list_form_per_visitor(self):
+        """
+        Форма загрузки не кэшируется: второй посетитель получает свой
+        CSRF-токен и может отправить форму.
+        """
+        url = reverse('main')
+        first = Client(enforce_csrf_checks=True)
+        second = Client(enforce_csrf_checks=True)
+        first.get(url)
+
+        response = second.get(url)
+        self.assertIn('csrftoken', response.cookies)
+        self.assertIn('Cookie', response['Vary'])
+        token = response.context['csrf_token']
+
+        response = second.post(
+            url, {'number': 5, 'csrfmiddlewaretoken': str(token)}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(IngestionJob.objects.exists())
+
+    def test_jobs_panel_not_cached(self):
+        """
+        Новое задание видно в панели сразу, а закэшированные страницы
+        при этом не сбрасываются.
+        """
+        url = reverse('main')
+        self.client.get(url)
+        version = get_dataset_version()
+
+        job = enqueue_ingestion(5)
+
+        self.assertEqual(get_dataset_version(), version)
+        response = self.client.get(url)
+        self.assertIn(job, response.context['ingestion_jobs'])
+
+    def test_detail_page_cached(self):
+        """Профиль пользователя кэшируется целиком."""
+        url = reverse('user', kwargs={'user_pk': self.user.pk})
+        response = self.client.get(url)
+        self.assertIn('max-age=0', response['Cache-Control'])
+        # Только чтение версии набора
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, 'John')
+
+    def test_save_users_bumps_version(self):
+        """После загрузки пользователей страница строится заново."""
+        url = reverse('main')
+        self.client.get(url)
+        version = get_dataset_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RandomUserService().save_users([self.mock_user_data])
+
+        self.assertNotEqual(get_dataset_version(), version)
+        self.assertContains(self.client.get(url), 'jane.smith@example.com')
+
+    def test_version_shared_between_processes(self):
+        """
+        Версию, увеличенную процессом со своим кэшем (воркер загрузки),
+        видит процесс с другим кэшем, и его страницы строятся заново.
+        """
+        url = reverse('main')
+        self.client.get(url)
+        version = get_dataset_version()
+
+        worker_cache = LocMemCache('worker', {})
+        with patch('main.page_cache.cache', worker_cache):
+            RandomUser.objects.filter(pk=self.user.pk).update(
+                email='changed@example.com'
+            )
+            bump_dataset_version()
+
+        self.assertGreater(get_dataset_version(), version)
+        self.assertContains(self.client.get(url), 'changed@example.com')
+
+    @override_settings(USER_PAGE_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self):
+        """Таймаут 0 отключает кэш страниц."""
+        url = reverse('main')
+        self.client.get(url)
+        RandomUser.objects.filter(pk=self.user.pk).update(
+            email='changed@example.com'
+        )
+        self.assertContains(self.client.get(url), 'changed@example.com')
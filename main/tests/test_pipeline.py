@@ -0,0 +1,118 @@
+from io import StringIO
+from unittest.mock import patch
+
+import requests
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase
+
+from main.models import RandomUser
+from main.pipeline import IngestionPipeline
+from main.services import RandomUserService
+from main.tests.factories import mock_user_data, unique_users
+
+
+class IngestionPipelineTest(TestCase):
+
+    def setUp(self):
+        self.service = RandomUserService()
+        self.mock_user_data = mock_user_data()
+        self._unique_users = unique_users(self.mock_user_data)
+        self.invalid_user_data = dict(self.mock_user_data, name=None)
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_pipeline_saves_total(self, mock_fetch):
+        """Конвейер сохраняет ровно total пользователей."""
+        mock_fetch.side_effect = self._unique_users
+
+        with patch.object(RandomUserService, 'DEFAULT_BATCH_SIZE', 3):
+            pipeline = IngestionPipeline(self.service, queue_size=1)
+            saved = pipeline.run(10)
+
+        self.assertEqual(saved, 10)
+        self.assertEqual(RandomUser.objects.count(), 10)
+        self.assertEqual(pipeline.stats['fetch'].items, 10)
+        self.assertEqual(pipeline.stats['write'].batches, 4)
+        self.assertIsNone(pipeline.error)
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_pipeline_refetches_rejected(self, mock_fetch):
+        """Отброшенные валидацией записи добираются новыми батчами."""
+        first, second = self._unique_users(2)
+        batches = iter([
+            [first, self.invalid_user_data],
+            [second],
+        ])
+        mock_fetch.side_effect = lambda count: next(batches)
+
+        with self.assertLogs('main.services', level='WARNING'):
+            saved = IngestionPipeline(self.service).run(2)
+
+        self.assertEqual(saved, 2)
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertEqual(mock_fetch.call_args_list[1].args, (1,))
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_pipeline_refetches_duplicates(self, mock_fetch):
+        """Уже существующие люди тоже добираются новыми батчами."""
+        first, second = self._unique_users(2)
+        batches = iter([[first, first], [second]])
+        mock_fetch.side_effect = lambda count: next(batches)
+
+        saved = IngestionPipeline(self.service).run(2)
+
+        self.assertEqual(saved, 2)
+        self.assertEqual(RandomUser.objects.count(), 2)
+        self.assertEqual(mock_fetch.call_args_list[1].args, (1,))
+
+    @patch('main.services.time.sleep')
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_pipeline_stops_on_fetch_error(self, mock_fetch, mock_sleep):
+        """
+        Ошибка стадии fetch (после исчерпания повторов) останавливает
+        конвейер без зависания.
+        """
+        mock_fetch.side_effect = requests.Timeout("Timeout error")
+
+        with self.assertLogs('main.pipeline', level='ERROR') as cm:
+            pipeline = IngestionPipeline(self.service)
+            saved = pipeline.run(5)
+
+        self.assertEqual(saved, 0)
+        self.assertIsInstance(pipeline.error, requests.Timeout)
+        self.assertTrue(any('fetch failed' in msg for msg in cm.output))
+
+    @patch('main.services.bulk_write_users')
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_pipeline_stops_on_write_error(self, mock_fetch, mock_write):
+        """Ошибка записи в DB останавливает фоновые стадии."""
+        mock_fetch.side_effect = self._unique_users
+        mock_write.side_effect = DatabaseError("DB fail")
+
+        with patch.object(RandomUserService, 'DEFAULT_BATCH_SIZE', 1):
+            pipeline = IngestionPipeline(self.service, queue_size=1)
+            saved = pipeline.run(50)
+
+        self.assertEqual(saved, 0)
+        self.assertIsInstance(pipeline.error, DatabaseError)
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_load_pipelined(self, mock_fetch):
+        """Метод сервиса запускает конвейер."""
+        mock_fetch.side_effect = self._unique_users
+
+        self.assertEqual(self.service.load_pipelined(total=3), 3)
+        self.assertEqual(RandomUser.objects.count(), 3)
+
+    @patch('main.pipeline.IngestionPipeline.run', autospec=True)
+    def test_fetch_data_pipeline_concurrency(self, mock_run):
+        """fetch_data --pipeline передаёт --concurrency в конвейер."""
+        mock_run.return_value = 1000
+
+        call_command(
+            'fetch_data', pipeline=True, concurrency=3, stdout=StringIO()
+        )
+
+        pipeline, total = mock_run.call_args.args
+        self.assertEqual(total, 1000)
+        self.assertEqual(pipeline.fetch_workers, 3)
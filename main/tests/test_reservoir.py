@@ -0,0 +1,121 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from main import reservoir
+from main.models import RandomUser, ReservoirUser
+from main.services import RandomUserService
+from main.tests.factories import mock_user_data, unique_users
+
+
+@override_settings(RANDOM_USER_RESERVOIR_LOW=2, RANDOM_USER_RESERVOIR_HIGH=5)
+class ReservoirTest(TestCase):
+
+    def setUp(self):
+        self.service = RandomUserService()
+        self.mock_user_data = mock_user_data()
+        self._unique_users = unique_users(self.mock_user_data)
+
+    def _records(self, count):
+        return self.service.validate_records(self._unique_users(count))
+
+    def test_store_skips_known_users(self):
+        """В резерв не попадают опубликованные и уже лежащие там люди."""
+        records = self._records(3)
+        self.service.save_users([
+            dict(self.mock_user_data, email=records[0]['email'])
+        ])
+        reservoir.store(records[1:2])
+
+        self.assertEqual(reservoir.store(records + records), 1)
+        self.assertEqual(reservoir.reservoir_size(), 2)
+
+    def test_take_oldest_first(self):
+        """take отдаёт самые старые записи и удаляет их из резерва."""
+        records = self._records(3)
+        reservoir.store(records)
+
+        taken = reservoir.take(2)
+
+        self.assertEqual(taken, records[:2])
+        self.assertEqual(reservoir.reservoir_size(), 1)
+        self.assertEqual(reservoir.take(5), records[2:])
+        self.assertEqual(reservoir.take(5), [])
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_refill_watermarks(self, mock_fetch):
+        """Резерв пополняется до high, только когда в нём не больше low."""
+        mock_fetch.side_effect = self._unique_users
+        reservoir.store(self._records(3))
+
+        self.assertEqual(reservoir.refill(self.service), 0)
+        mock_fetch.assert_not_called()
+
+        reservoir.take(1)
+        self.assertEqual(reservoir.refill(self.service), 3)
+        self.assertEqual(reservoir.reservoir_size(), 5)
+        self.assertEqual(RandomUser.objects.count(), 0)
+
+    @override_settings(RANDOM_USER_RESERVOIR_HIGH=0)
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_refill_disabled(self, mock_fetch):
+        """RANDOM_USER_RESERVOIR_HIGH=0 отключает резерв."""
+        self.assertEqual(reservoir.refill(self.service), 0)
+        mock_fetch.assert_not_called()
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_load_takes_from_reservoir_first(self, mock_fetch):
+        """Загрузка берёт записи из резерва, а из API — только остаток."""
+        mock_fetch.side_effect = self._unique_users
+        reservoir.store(self._records(3))
+        progress = []
+
+        saved = self.service.load_initial_users(
+            total=5, concurrency=1, on_progress=progress.append
+        )
+
+        self.assertEqual(saved, 5)
+        self.assertEqual(RandomUser.objects.count(), 5)
+        self.assertEqual(reservoir.reservoir_size(), 0)
+        mock_fetch.assert_called_once_with(2)
+        self.assertEqual(progress, [3, 5])
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_load_from_reservoir_only(self, mock_fetch):
+        """Если резерва хватает, API не вызывается."""
+        reservoir.store(self._records(5))
+
+        saved = self.service.load_initial_users(total=4, concurrency=1)
+
+        self.assertEqual(saved, 4)
+        self.assertEqual(reservoir.reservoir_size(), 1)
+        mock_fetch.assert_not_called()
+
+    @patch('main.services.RandomUserService.write_users')
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_failed_write_keeps_reservoir(self, mock_fetch, mock_write):
+        """При ошибке записи записи остаются в резерве."""
+        mock_fetch.return_value = []
+        mock_write.side_effect = RuntimeError("DB is down")
+        reservoir.store(self._records(2))
+
+        with self.assertLogs('main.services', level='ERROR') as cm:
+            self.service.load_initial_users(total=2, concurrency=1)
+
+        self.assertEqual(reservoir.reservoir_size(), 2)
+        self.assertTrue(
+            any('Reservoir load failed' in msg for msg in cm.output)
+        )
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_worker_refills_reservoir(self, mock_fetch):
+        """Воркер пополняет резерв, когда очередь заданий пуста."""
+        mock_fetch.side_effect = self._unique_users
+
+        out = StringIO()
+        call_command('run_ingestion_worker', once=True, stdout=out)
+
+        self.assertIn('Added 5 users to reservoir', out.getvalue())
+        self.assertEqual(ReservoirUser.objects.count(), 5)
@@ -0,0 +1,247 @@
+import random
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.test import TestCase, override_settings
+
+from main.models import RandomUser
+from main.resilience import (
+    AdaptiveBatchSize, CircuitBreaker, CircuitOpenError, RetryPolicy
+)
+from main.services import RandomUserService
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RetryPolicyTest(TestCase):
+
+    def test_delay_bounds(self):
+        """Пауза случайна, но не больше min(max_delay, base·2ⁿ)."""
+        policy = RetryPolicy(
+            base_delay=0.5, max_delay=3.0, rng=random.Random(1)
+        )
+        for attempt, ceiling in enumerate([0.5, 1.0, 2.0, 3.0, 3.0]):
+            for _ in range(50):
+                delay = policy.delay(attempt)
+                self.assertGreaterEqual(delay, 0)
+                self.assertLessEqual(delay, ceiling)
+
+
+class CircuitBreakerTest(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=2, reset_timeout=10, clock=self.clock
+        )
+
+    def test_opens_after_consecutive_failures(self):
+        """Цепь размыкается после failure_threshold ошибок подряд."""
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_trial(self):
+        """После паузы проходит один пробный запрос."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_trial_reopens(self):
+        """Ошибка пробного запроса снова размыкает цепь."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.now = 19
+        self.assertFalse(self.breaker.allow())
+
+    def test_ignored_keeps_state(self):
+        """
+        Ошибка клиента не сбрасывает серию ошибок и не замыкает
+        полуоткрытую цепь, но освобождает пробный запрос.
+        """
+        self.breaker.record_failure()
+        self.breaker.record_ignored()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_ignored()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+
+
+class AdaptiveBatchSizeTest(TestCase):
+
+    def test_shrinks_on_timeout_and_slow_response(self):
+        """Таймаут уменьшает батч вдвое, медленный ответ — на четверть."""
+        batch = AdaptiveBatchSize(
+            400, minimum=50, maximum=1000, target_latency=1.0
+        )
+        batch.record_timeout()
+        self.assertEqual(batch.size, 200)
+        batch.record_success(latency=5.0)
+        self.assertEqual(batch.size, 150)
+        for _ in range(5):
+            batch.record_timeout()
+        self.assertEqual(batch.size, 50)
+
+    def test_grows_after_healthy_responses(self):
+        """Батч растёт после grow_after быстрых ответов, до maximum."""
+        batch = AdaptiveBatchSize(
+            400, minimum=50, maximum=600, target_latency=1.0, grow_after=3
+        )
+        batch.record_success(latency=0.1)
+        batch.record_success(latency=0.1)
+        self.assertEqual(batch.size, 400)
+        batch.record_success(latency=0.1)
+        self.assertEqual(batch.size, 500)
+        for _ in range(6):
+            batch.record_success(latency=0.1)
+        self.assertEqual(batch.size, 600)
+
+
+@override_settings(
+    RANDOM_USER_FETCH_RETRIES=2,
+    RANDOM_USER_CIRCUIT_FAILURES=3,
+    RANDOM_USER_MIN_BATCH_SIZE=10,
+)
+@patch('main.services.time.sleep')
+@patch('main.services.RandomUserService.fetch_users')
+class FetchWithRetryTest(TestCase):
+
+    def setUp(self):
+        self.service = RandomUserService()
+        self.user = {
+            'gender': 'male',
+            'name': {'first': 'John', 'last': 'Doe'},
+            'phone': '123-456-7890',
+            'email': 'john.doe@example.com',
+            'location': {'city': 'New York', 'country': 'USA'},
+            'picture': {'thumbnail': 'http://example.com/thumb.jpg'}
+        }
+
+    @staticmethod
+    def _http_error(status):
+        response = MagicMock(status_code=status)
+        return requests.HTTPError(f"{status} error", response=response)
+
+    def test_retries_transient_errors(self, mock_fetch, mock_sleep):
+        """Временные ошибки повторяются с паузой, затем успех."""
+        mock_fetch.side_effect = [
+            self._http_error(503), requests.ConnectionError(), [self.user]
+        ]
+
+        with self.assertLogs('main.services', level='WARNING'):
+            data = self.service.fetch_with_retry(1)
+
+        self.assertEqual(data, [self.user])
+        self.assertEqual(mock_fetch.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_timeout_shrinks_batch(self, mock_fetch, mock_sleep):
+        """После таймаута повтор запрашивает меньший батч."""
+        mock_fetch.side_effect = [requests.Timeout(), [self.user]]
+        size = self.service.batch_size.size
+
+        with self.assertLogs('main.services', level='WARNING'):
+            self.service.fetch_with_retry(size)
+
+        self.assertEqual(mock_fetch.call_args_list[1].args, (size // 2,))
+        self.assertEqual(self.service.batch_size.size, size // 2)
+
+    def test_client_error_not_retried(self, mock_fetch, mock_sleep):
+        """Ошибка клиента (4xx, кроме 429) не повторяется."""
+        mock_fetch.side_effect = self._http_error(404)
+
+        with self.assertRaises(requests.HTTPError):
+            self.service.fetch_with_retry(1)
+
+        self.assertEqual(mock_fetch.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    def test_client_error_keeps_failure_streak(self, mock_fetch, mock_sleep):
+        """Ошибка клиента между сбоями не обнуляет их серию."""
+        self.service.circuit_breaker.failure_threshold = 2
+        self.service.retry_policy.retries = 0
+        mock_fetch.side_effect = [
+            requests.ConnectionError(), self._http_error(404),
+            requests.ConnectionError(),
+        ]
+
+        for error in (requests.ConnectionError, requests.HTTPError,
+                      requests.ConnectionError):
+            with self.assertRaises(error):
+                self.service.fetch_with_retry(1)
+
+        self.assertEqual(
+            self.service.circuit_breaker.state, CircuitBreaker.OPEN
+        )
+
+    def test_retries_exhausted(self, mock_fetch, mock_sleep):
+        """После последнего повтора ошибка пробрасывается."""
+        mock_fetch.side_effect = self._http_error(429)
+
+        with self.assertLogs('main.services', level='WARNING'):
+            with self.assertRaises(requests.HTTPError):
+                self.service.fetch_with_retry(1)
+
+        self.assertEqual(mock_fetch.call_count, 3)
+
+    def test_open_circuit_skips_requests(self, mock_fetch, mock_sleep):
+        """При разомкнутой цепи запросы к API не отправляются."""
+        mock_fetch.side_effect = requests.ConnectionError()
+
+        with self.assertLogs('main.services', level='WARNING'):
+            with self.assertRaises(requests.ConnectionError):
+                self.service.fetch_with_retry(1)
+            with self.assertRaises(CircuitOpenError):
+                self.service.fetch_with_retry(1)
+
+        self.assertEqual(mock_fetch.call_count, 3)
+
+    def test_load_survives_transient_errors(self, mock_fetch, mock_sleep):
+        """Загрузка завершается, несмотря на временные сбои API."""
+        emails = iter(range(100))
+        calls = iter(range(100))
+
+        def flaky_fetch(count):
+            if next(calls) % 2 == 0:
+                raise requests.Timeout("Timeout error")
+            return [
+                dict(self.user, email=f'user{next(emails)}@example.com')
+                for _ in range(count)
+            ]
+
+        mock_fetch.side_effect = flaky_fetch
+
+        with self.assertLogs('main.services', level='WARNING'):
+            saved = self.service.load_initial_users(total=5, concurrency=1)
+
+        self.assertEqual(saved, 5)
+        self.assertEqual(RandomUser.objects.count(), 5)
@@ -6,6 +6,7 @@ from django.test import TestCase
 from rest_framework.exceptions import ValidationError
 
 from main.services import RandomUserService
+from main.tests.factories import mock_user_data, unique_users
 import requests
 
 
@@ -13,14 +14,8 @@ class RandomUserServiceTest(TestCase):
 
     def setUp(self):
         self.service = RandomUserService()
-        self.mock_user_data = {
-            'gender': 'male',
-            'name': {'first': 'John', 'last': 'Doe'},
-            'phone': '123-456-7890',
-            'email': 'john.doe@example.com',
-            'location': {'city': 'New York', 'country': 'USA'},
-            'picture': {'thumbnail': 'http://example.com/thumb.jpg'}
-        }
+        self.mock_user_data = mock_user_data()
+        self._unique_users = unique_users(self.mock_user_data)
         self.error_mock_data = {
             'error': (
                 "Uh oh, something has gone wrong. "
@@ -122,6 +117,8 @@ class RandomUserServiceTest(TestCase):
         self.assertEqual(user.phone, '123-456-7890')
         self.assertEqual(user.email, 'john.doe@example.com')
         self.assertEqual(user.location, {'city': 'New York', 'country': 'USA'})
+        self.assertEqual(user.city, 'New York')
+        self.assertEqual(user.country, 'USA')
 
     def test_create_user_invalid_data(self):
         """Тест обработки невалидных данных при создании пользователя."""
@@ -203,10 +200,23 @@ class RandomUserServiceTest(TestCase):
             )
         )
 
-    @patch('main.services.RandomUser.objects.bulk_create')
-    def test_save_users_bulk_create_fails(self, mock_bulk_create):
+    def test_save_users_deduplicates(self):
+        """Повторное сохранение тех же людей не создаёт дубликатов."""
+        from main.models import RandomUser
+
+        self.assertEqual(self.service.save_users([self.mock_user_data]), 1)
+        again = dict(self.mock_user_data, email=' JOHN.DOE@example.com')
+        self.assertEqual(
+            self.service.save_users([self.mock_user_data, again]), 0
+        )
+        self.assertEqual(RandomUser.objects.count(), 1)
+        self.assertEqual(self.service.write_result.inserted, 1)
+        self.assertEqual(self.service.write_result.skipped, 2)
+
+    @patch('main.services.bulk_write_users')
+    def test_save_users_write_fails(self, mock_write):
         """Проверка обработки ошибок базы данных при сохранении."""
-        mock_bulk_create.side_effect = DatabaseError("DB fail")
+        mock_write.side_effect = DatabaseError("DB fail")
         with self.assertRaises(DatabaseError):
             self.service.save_users([self.mock_user_data])
 
@@ -216,3 +226,42 @@ class RandomUserServiceTest(TestCase):
             logger = logging.getLogger('main.services')
             logger.error("Test error log")
         self.assertTrue(any("Test error log" in m for m in cm.output))
+
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_load_initial_users_concurrent(self, mock_fetch):
+        """Параллельная загрузка сохраняет всех запрошенных пользователей."""
+        from main.models import RandomUser
+
+        mock_fetch.side_effect = self._unique_users
+
+        with patch.object(RandomUserService, 'DEFAULT_BATCH_SIZE', 2):
+            saved = self.service.load_initial_users(total=7, concurrency=3)
+
+        self.assertEqual(saved, 7)
+        self.assertEqual(RandomUser.objects.count(), 7)
+        self.assertEqual(mock_fetch.call_count, 4)
+
+    @patch('main.services.time.sleep')
+    @patch('main.services.RandomUserService.fetch_users')
+    def test_load_initial_users_concurrent_batch_failure(
+        self, mock_fetch, mock_sleep
+    ):
+        """Ошибка одного батча не отменяет уже запущенные батчи."""
+        from main.models import RandomUser
+
+        def fake_fetch(count):
+            if count == 1:
+                raise requests.Timeout("Timeout error")
+            return self._unique_users(count)
+
+        mock_fetch.side_effect = fake_fetch
+
+        with patch.object(RandomUserService, 'DEFAULT_BATCH_SIZE', 2):
+            with self.assertLogs('main.services', level='ERROR') as cm:
+                saved = self.service.load_initial_users(
+                    total=5, concurrency=3
+                )
+
+        self.assertEqual(saved, 4)
+        self.assertEqual(RandomUser.objects.count(), 4)
+        self.assertTrue(any('Batch failed' in msg for msg in cm.output))
@@ -0,0 +1,170 @@
+import itertools
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from main import stats
+from main.models import RandomUser, UserStat
+from main.services import RandomUserService
+from main.tests.factories import mock_user_data, unique_users
+
+
+class UserStatsTest(TestCase):
+
+    def setUp(self):
+        self.service = RandomUserService()
+        self._unique_users = unique_users(mock_user_data())
+
+    def _user(self, **overrides):
+        user, = self._unique_users(1)
+        user.update(overrides)
+        return user
+
+    def _stats(self):
+        return {
+            (stat.dimension, stat.value): stat.count
+            for stat in UserStat.objects.filter(count__gt=0)
+        }
+
+    def test_save_users_updates_stats(self):
+        """Запись батча прибавляет новых людей, повторы не считаются."""
+        users = [
+            self._user(),
+            self._user(gender='female', email='ann@Mail.example.org'),
+            self._user(location={'country': 'France'}),
+        ]
+        self.service.save_users(users)
+        self.service.save_users(users[:1] + [self._user()])
+
+        self.assertEqual(stats.get_breakdown(UserStat.GENDER),
+                         [('male', 3), ('female', 1)])
+        self.assertEqual(stats.get_breakdown(UserStat.COUNTRY),
+                         [('USA', 3), ('France', 1)])
+        self.assertEqual(stats.get_breakdown(UserStat.EMAIL_DOMAIN, 1),
+                         [('example.com', 3)])
+        self.assertIn(
+            ('mail.example.org', 1),
+            stats.get_breakdown(UserStat.EMAIL_DOMAIN)
+        )
+
+    @override_settings(RANDOM_USER_CONFLICT_MODE='update')
+    def test_update_mode_moves_counts(self):
+        """В режиме update старые значения заменяются новыми."""
+        user = self._user()
+        self.service.save_users([user])
+        moved = dict(user, location={'country': 'Spain'})
+        self.service.save_users([moved])
+
+        self.assertEqual(stats.get_breakdown(UserStat.COUNTRY),
+                         [('Spain', 1)])
+        self.assertEqual(stats.get_breakdown(UserStat.GENDER), [('male', 1)])
+
+    def test_single_row_changes(self):
+        """Создание, изменение и удаление по одному тоже учитываются."""
+        user = RandomUser.objects.create(
+            gender='male', first_name='John', last_name='Doe',
+            email='john@example.com', phone='123',
+            picture='http://example.com/thumb.jpg',
+            location={'country': 'Norway'}
+        )
+        user.location = {'country': 'Brazil'}
+        user.gender = 'female'
+        user.save()
+        self.assertEqual(self._stats(), {
+            (UserStat.GENDER, 'female'): 1,
+            (UserStat.COUNTRY, 'Brazil'): 1,
+            (UserStat.EMAIL_DOMAIN, 'example.com'): 1,
+            (UserStat.GENDER_COUNTRY, 'female|Brazil'): 1,
+        })
+
+        user.delete()
+        self.assertEqual(self._stats(), {})
+
+    def test_apply_paths_agree(self):
+        """Upsert и запасной путь с CASE дают одинаковые числа."""
+        deltas = {
+            (UserStat.GENDER, 'male'): 2,
+            (UserStat.COUNTRY, 'USA'): 1,
+            (UserStat.COUNTRY, 'Peru'): 0,
+        }
+        UserStat.objects.apply(deltas)
+        upserted = self._stats()
+        UserStat.objects.all().delete()
+
+        with patch.object(connection, 'vendor', 'other'):
+            UserStat.objects.apply(deltas)
+            UserStat.objects.apply({(UserStat.GENDER, 'male'): -1})
+
+        self.assertEqual(upserted, {
+            (UserStat.GENDER, 'male'): 2, (UserStat.COUNTRY, 'USA'): 1,
+        })
+        self.assertEqual(self._stats(), {
+            (UserStat.GENDER, 'male'): 1, (UserStat.COUNTRY, 'USA'): 1,
+        })
+
+    def test_rebuild_matches_incremental(self):
+        """Пересчёт GROUP BY даёт те же числа, что и инкрементальный."""
+        self.service.save_users([
+            self._user(gender=gender, location={'country': country})
+            for gender, country in itertools.product(
+                ['male', 'female'], ['USA', 'France', 'Germany']
+            )
+        ])
+        RandomUser.objects.first().delete()
+        incremental = self._stats()
+
+        out = StringIO()
+        call_command('rebuild_user_stats', stdout=out)
+
+        self.assertIn('Rebuilt user statistics', out.getvalue())
+        self.assertEqual(self._stats(), incremental)
+
+    def test_rebuild_non_ascii_domain(self):
+        """Не-ASCII домены пересчитываются так же, как при записи."""
+        for email in ['anna@ÜBER.example', 'otto@über.example']:
+            RandomUser.objects.create(
+                gender='female', first_name='Anna', last_name='Berg',
+                email=email, phone='123', picture='',
+                location={'country': 'Germany'}
+            )
+        incremental = self._stats()
+        domain = (UserStat.EMAIL_DOMAIN, 'über.example')
+        self.assertEqual(incremental[domain], 2)
+
+        stats.rebuild()
+
+        self.assertEqual(self._stats(), incremental)
+
+    def test_backfill_location_updates_countries(self):
+        """Заполнение колонки country переносит людей в статистике."""
+        self.service.save_users([self._user(), self._user()])
+        RandomUser.objects.update(city='', country='')
+        stats.rebuild()
+
+        call_command('backfill_location_columns', stdout=StringIO())
+
+        self.assertEqual(stats.get_breakdown(UserStat.COUNTRY),
+                         [('USA', 2)])
+
+    def test_stats_endpoint(self):
+        """Эндпоинт читает только таблицу статистики."""
+        self.service.save_users([self._user() for _ in range(3)])
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('api_users_stats'))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['gender'], [{'value': 'male', 'count': 3}])
+        self.assertEqual(data['country'], [{'value': 'USA', 'count': 3}])
+        self.assertEqual(
+            self.client.get(
+                reverse('api_users_stats'), {'limit': 0}
+            ).status_code,
+            400
+        )
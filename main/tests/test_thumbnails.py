@@ -0,0 +1,186 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from main import thumbnails
+from main.fake_api import FakeRandomUserServer
+from main.models import Counter, RandomUser, Thumbnail
+
+
+class ThumbnailTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(THUMBNAIL_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.directory = directory.name
+
+        self.server = FakeRandomUserServer().start()
+        self.addCleanup(self.server.stop)
+
+    def _picture(self, name='1'):
+        return f'{self.server.portrait_base}thumb/men/{name}.jpg'
+
+    def _files(self):
+        return [
+            name for _, _, names in os.walk(self.directory) for name in names
+        ]
+
+    def test_proxy_url(self):
+        """Путь стабилен для адреса и не подделывается."""
+        url = self._picture()
+        path = thumbnails.proxy_url(url)
+        self.assertEqual(path, thumbnails.proxy_url(url))
+        self.assertNotEqual(path, thumbnails.proxy_url(self._picture('2')))
+
+        token = path.rstrip('/').rsplit('/', 1)[-1]
+        self.assertEqual(thumbnails.unsign(token), url)
+        response = self.client.get(
+            reverse('thumbnail', kwargs={'token': token + 'x'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(THUMBNAIL_PROXY=False)
+    def test_proxy_disabled(self):
+        """THUMBNAIL_PROXY=False оставляет исходные адреса."""
+        url = self._picture()
+        self.assertEqual(thumbnails.proxy_url(url), url)
+
+    def test_served_from_store(self):
+        """Фото скачивается один раз и отдаётся с ETag и Cache-Control."""
+        path = thumbnails.proxy_url(self._picture())
+
+        response = self.client.get(path)
+        content = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(content.startswith(b'\x89PNG'))
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(len(self._files()), 1)
+
+        # Повторный запрос не обращается к источнику
+        self.server.stop()
+        cached = self.client.get(path)
+        self.assertEqual(b''.join(cached.streaming_content), content)
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+        not_modified = self.client.get(
+            path, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_content_addressed(self):
+        """Одинаковые картинки с разных адресов хранятся одним файлом."""
+        first = thumbnails.get_or_fetch(self._picture())
+        second = thumbnails.get_or_fetch(self._picture() + '?size=small')
+        third = thumbnails.get_or_fetch(self._picture('2'))
+
+        self.assertEqual(first.digest, second.digest)
+        self.assertNotEqual(first.digest, third.digest)
+        self.assertEqual(Thumbnail.objects.count(), 3)
+        self.assertEqual(len(self._files()), 2)
+
+    def test_download_failure_redirects(self):
+        """Если фото не скачалось, браузер идёт по исходному адресу."""
+        url = f'{self.server.url}missing.jpg'.replace('/api/', '/nope/')
+
+        with self.assertLogs('main.views', level='WARNING'):
+            response = self.client.get(thumbnails.proxy_url(url))
+
+        self.assertRedirects(
+            response, url, fetch_redirect_response=False
+        )
+        self.assertFalse(Thumbnail.objects.exists())
+
+    def test_eviction(self):
+        """Сверх THUMBNAIL_CACHE_MAX_BYTES вытесняются давние фото."""
+        old = thumbnails.get_or_fetch(self._picture('1'))
+        Thumbnail.objects.filter(pk=old.pk).update(
+            last_used_at=timezone.now() - timedelta(days=1)
+        )
+        thumbnails.get_or_fetch(self._picture('2'))
+
+        with override_settings(THUMBNAIL_CACHE_MAX_BYTES=old.size + 1):
+            with self.assertLogs('main.thumbnails', level='INFO'):
+                thumbnail = thumbnails.get_or_fetch(self._picture('3'))
+
+        self.assertEqual(
+            list(Thumbnail.objects.values_list('pk', flat=True)),
+            [thumbnail.pk]
+        )
+        self.assertEqual(self._files(), [thumbnail.digest])
+
+    def test_eviction_only_over_limit(self):
+        """
+        Пока счётчик объёма меньше лимита, хранилище не пересчитывается;
+        вытеснение записывает в счётчик точный объём.
+        """
+        with patch('main.thumbnails.evict') as evict:
+            first = thumbnails.get_or_fetch(self._picture('1'))
+            thumbnails.get_or_fetch(self._picture('1') + '?size=small')
+        evict.assert_not_called()
+        self.assertEqual(
+            Counter.objects.get_value(Counter.THUMBNAIL_BYTES), first.size
+        )
+        self.assertEqual(thumbnails.stored_bytes(), first.size)
+
+        Counter.objects.filter(name=Counter.THUMBNAIL_BYTES).update(value=0)
+        thumbnails.evict()
+        self.assertEqual(
+            Counter.objects.get_value(Counter.THUMBNAIL_BYTES), first.size
+        )
+
+    def test_concurrent_first_request(self):
+        """
+        Если строку для адреса одновременно записал другой запрос,
+        берётся она, а не ошибка 500.
+        """
+        url = self._picture()
+        existing = thumbnails.fetch(url)
+
+        with patch.object(
+            Thumbnail.objects, 'update_or_create',
+            side_effect=IntegrityError('duplicate url_key')
+        ):
+            thumbnail = thumbnails.fetch(url)
+
+        self.assertEqual(thumbnail.pk, existing.pk)
+
+    def test_pages_use_proxy(self):
+        """Список и профиль ссылаются на фото через эндпоинт."""
+        user = RandomUser.objects.create(
+            gender='male', first_name='John', last_name='Doe',
+            email='john@example.com', phone='123', picture=self._picture()
+        )
+        path = thumbnails.proxy_url(user.picture)
+
+        self.assertContains(self.client.get(reverse('main')), path)
+        self.assertContains(self.client.get(user.get_absolute_url()), path)
+
+    def test_cache_thumbnails_command(self):
+        """Команда скачивает фото пользователей заранее."""
+        for index, name in enumerate(['1', '2', '1']):
+            RandomUser.objects.create(
+                gender='male', first_name='John', last_name='Doe',
+                email=f'john{index}@example.com', phone='123',
+                picture=self._picture(name)
+            )
+
+        out = StringIO()
+        call_command('cache_thumbnails', stdout=out)
+
+        self.assertIn('Cached 2 thumbnails, 0 failed', out.getvalue())
+        self.assertEqual(len(self._files()), 2)
@@ -0,0 +1,127 @@
+import copy
+
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+
+from main.serializers import RandomUserSerializer
+from main.validators import RandomUserBatchValidator
+
+
+class RandomUserBatchValidatorParityTest(TestCase):
+    """
+    Пакетный валидатор должен принимать и отклонять те же записи,
+    что и RandomUserSerializer, с теми же сообщениями об ошибках.
+    """
+
+    def setUp(self):
+        self.validator = RandomUserBatchValidator()
+        self.valid_data = {
+            'gender': 'male',
+            'name': {'first': 'John', 'last': 'Doe'},
+            'phone': '123-456-7890',
+            'email': 'john.doe@example.com',
+            'location': {'city': 'New York', 'country': 'USA'},
+            'picture': {'thumbnail': 'http://example.com/thumb.jpg'}
+        }
+
+    def _variant(self, **changes):
+        data = copy.deepcopy(self.valid_data)
+        for key, value in changes.items():
+            if value is None and key.startswith('drop_'):
+                data.pop(key[len('drop_'):])
+            else:
+                data[key] = value
+        return data
+
+    def assertParity(self, data):
+        serializer = RandomUserSerializer(data=copy.deepcopy(data))
+        serializer_valid = serializer.is_valid()
+        try:
+            validated = self.validator.validate_one(copy.deepcopy(data))
+        except ValidationError as e:
+            self.assertFalse(serializer_valid, f'rejected valid {data!r}')
+            self.assertEqual(e.detail, serializer.errors)
+            return
+        self.assertTrue(serializer_valid, f'accepted invalid {data!r}')
+        self.assertEqual(dict(validated), dict(serializer.validated_data))
+
+    def test_serializer_cases(self):
+        """Случаи из тестов RandomUserSerializer."""
+        cases = [
+            self.valid_data,
+            self._variant(drop_gender=None),
+            self._variant(name='not-a-dict'),
+            self._variant(name={'first': 'Only'}),
+            self._variant(drop_name=None),
+            self._variant(drop_phone=None),
+            self._variant(drop_email=None),
+            self._variant(email='not-an-email'),
+            self._variant(drop_location=None),
+            self._variant(location='not a dict'),
+            self._variant(picture='not-a-dict'),
+            self._variant(picture={}),
+            self._variant(drop_picture=None),
+            self._variant(picture={'thumbnail': 'not-a-url'}),
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                self.assertParity(data)
+
+    def test_field_edge_cases(self):
+        """Граничные значения полей, уходящие в медленный путь."""
+        cases = [
+            self._variant(gender=''),
+            self._variant(gender='   '),
+            self._variant(gender=None),
+            self._variant(gender=True),
+            self._variant(gender=42),
+            self._variant(gender='  female  '),
+            self._variant(gender='x' * 21),
+            self._variant(gender='ma\x00le'),
+            self._variant(gender='ma\ud800le'),
+            self._variant(phone=['123']),
+            self._variant(name={'first': None, 'last': 'Doe'}),
+            self._variant(name={'first': 'J' * 101, 'last': ''}),
+            self._variant(email='JOHN.DOE@EXAMPLE.COM'),
+            self._variant(email='john..doe@example.com'),
+            self._variant(email='john@localhost'),
+            self._variant(email='john@example.com\n'),
+            self._variant(email='jöhn@exämple.com'),
+            self._variant(email='"john"@[127.0.0.1]'),
+            self._variant(email='a' * 95 + '@x.com'),
+            self._variant(location=None),
+            self._variant(location=[]),
+            self._variant(location={'bad': {1, 2}}),
+            self._variant(location={'nested': {'deep': [1, 2.5, None]}}),
+            self._variant(picture={
+                'thumbnail': 'https://randomuser.me/api/portraits/thumb/1.jpg'
+            }),
+            self._variant(picture={'thumbnail': 'ftp://example.com/a.jpg'}),
+            self._variant(picture={'thumbnail': 'http://localhost:8000/a'}),
+            self._variant(picture={'thumbnail': 'http://example.com/a b'}),
+            self._variant(picture={'thumbnail': 'http://ex ample.com/'}),
+            self._variant(picture={
+                'thumbnail': 'http://example.com/' + 'a' * 200
+            }),
+            self._variant(picture={'thumbnail': None}),
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                self.assertParity(data)
+
+    def test_non_dict_records(self):
+        """Нестандартные записи проверяются самим сериализатором."""
+        self.assertParity([])
+        with self.assertRaises(ValidationError):
+            self.validator.validate_one([])
+
+    def test_validate_batch(self):
+        """Пакетная проверка возвращает валидные записи и индексы ошибок."""
+        invalid = self._variant(email='not-an-email')
+        validated, errors = self.validator.validate(
+            [self.valid_data, invalid, self.valid_data]
+        )
+        self.assertEqual(len(validated), 2)
+        self.assertEqual(validated[0]['first_name'], 'John')
+        self.assertEqual([index for index, _ in errors], [1])
+        self.assertIn('email', errors[0][1].detail)
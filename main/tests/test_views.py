@@ -1,10 +1,15 @@
+from io import StringIO
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from main.forms import FormNumber
-from main.models import RandomUser
+from main.models import IngestionJob, RandomUser
+from main.pagination import CursorPaginator
+from main.search import _prefix_upper_bound
 from main.services import RandomUserService
 
 
@@ -30,6 +35,11 @@ class ViewTests(TestCase):
             location={}
         )
 
+    def setUp(self):
+        # Версия данных повышается on_commit, а в TestCase транзакции
+        # не фиксируются: закэшированные страницы сбрасываются вручную
+        cache.clear()
+
     def test_users_view_get(self):
         """Проверка главной страницы (GET-запрос)."""
         response = self.client.get(reverse('main'))
@@ -40,14 +50,34 @@ class ViewTests(TestCase):
         self.assertIsInstance(response.context['form'], FormNumber)
         self.assertEqual(len(response.context['user_list']), 2)
 
+    def test_users_view_loads_list_columns_only(self):
+        """Список не загружает JSON location."""
+        response = self.client.get(reverse('main'))
+        user = response.context['user_list'][0]
+        self.assertIn('location', user.get_deferred_fields())
+
     def test_users_view_post_valid(self):
-        """Тест POST-запроса с валидной формой."""
+        """Тест POST-запроса с валидной формой: загрузка уходит в очередь."""
         with patch.object(
                 RandomUserService, 'load_initial_users'
         ) as mock_load:
             response = self.client.post(reverse('main'), {'number': 5})
             self.assertEqual(response.status_code, 302)
-            mock_load.assert_called_once_with(total=5)
+            mock_load.assert_not_called()
+        job = IngestionJob.objects.get()
+        self.assertEqual(job.requested, 5)
+        self.assertEqual(job.status, IngestionJob.PENDING)
+
+    def test_users_view_jobs_panel(self):
+        """Панель загрузок показывает прогресс заданий."""
+        IngestionJob.objects.create(
+            requested=10, saved=4, status=IngestionJob.RUNNING
+        )
+        response = self.client.get(reverse('main'))
+        self.assertContains(response, 'Выполняется')
+        self.assertContains(
+            response, 'осталось <span data-field="remaining">6</span>'
+        )
 
     def test_users_view_post_invalid(self):
         """Тест POST-запроса с невалидными данными."""
@@ -115,3 +145,182 @@ class ViewTests(TestCase):
         self.assertEqual(
             users[0], self.user2
         )
+
+
+@override_settings(USER_LIST_PAGINATION='cursor')
+class CursorPaginationViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            RandomUser.objects.create(
+                first_name=f'User{i}',
+                last_name='Test',
+                email=f'user{i}@example.com',
+                gender='male',
+                phone='000-000-000',
+                picture='',
+                location={}
+            )
+            for i in range(25)
+        ]
+        cls.newest_first = list(reversed(cls.users))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_first_page(self):
+        """Первая страница без курсора — самые новые пользователи."""
+        response = self.client.get(reverse('main'))
+        page = response.context['page_obj']
+        self.assertTrue(response.context['cursor_pagination'])
+        self.assertTrue(response.context['is_paginated'])
+        self.assertEqual(
+            list(response.context['user_list']), self.newest_first[:10]
+        )
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+        self.assertContains(response, f'?after={page.next_cursor}')
+
+    def test_next_and_previous(self):
+        """Переход вперёд по курсору и обратно возвращает те же страницы."""
+        first = self.client.get(reverse('main')).context['page_obj']
+        second = self.client.get(
+            reverse('main'), {'after': first.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(second), self.newest_first[10:20])
+        self.assertTrue(second.has_previous())
+
+        back = self.client.get(
+            reverse('main'), {'before': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), self.newest_first[:10])
+        self.assertFalse(back.has_previous())
+
+    def test_last_page(self):
+        """Последняя страница и отсутствие следующей."""
+        response = self.client.get(reverse('main'), {'before': 0})
+        page = response.context['page_obj']
+        self.assertEqual(list(page), self.newest_first[-10:])
+        self.assertFalse(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_deep_page_query_count(self):
+        """Страница на любой глубине не требует OFFSET и COUNT."""
+        with self.assertNumQueries(1):
+            rows = list(
+                CursorPaginator(RandomUser.displayed.all(), 10)
+                .page(after=self.users[3].pk)
+            )
+        self.assertEqual(rows, list(reversed(self.users[:3])))
+
+    def test_invalid_cursor(self):
+        """Некорректный курсор даёт первую страницу."""
+        response = self.client.get(reverse('main'), {'after': 'abc'})
+        self.assertEqual(
+            list(response.context['user_list']), self.newest_first[:10]
+        )
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        people = [
+            ('John', 'Doe', 'john.doe@example.com'),
+            ('Johanna', 'Smith', 'jo.smith@example.com'),
+            ('Anna', 'Johnson', 'anna@example.com'),
+            ('Peter', 'Parker', 'spidey@example.com'),
+        ]
+        cls.users = [
+            RandomUser.objects.create(
+                first_name=first,
+                last_name=last,
+                email=email,
+                gender='male',
+                phone='000-000-000',
+                picture='',
+                location={}
+            )
+            for first, last, email in people
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def _search(self, query):
+        response = self.client.get(reverse('main'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return {user.first_name for user in response.context['user_list']}
+
+    def test_prefix_search(self):
+        """Поиск по началу имени, фамилии и email без учёта регистра."""
+        self.assertEqual(self._search('JOH'), {'John', 'Johanna', 'Anna'})
+        self.assertEqual(self._search('spid'), {'Peter'})
+        self.assertEqual(self._search('park'), {'Peter'})
+
+    def test_multiple_terms(self):
+        """Все слова запроса должны найтись."""
+        self.assertEqual(self._search('jo smith'), {'Johanna'})
+
+    def test_no_match(self):
+        """Пустой результат при отсутствии совпадений."""
+        response = self.client.get(reverse('main'), {'q': 'zzz'})
+        self.assertContains(response, 'Нет пользователей')
+
+    def test_empty_query(self):
+        """Пустой запрос показывает всех пользователей."""
+        self.assertEqual(len(self._search('   ')), 4)
+
+    def test_non_ascii_names(self):
+        """Регистр не учитывается и для букв за пределами ASCII."""
+        for first, last, email in [
+            ('Émile', 'Öztürk', 'emile@example.com'),
+            ('Дмитрий', 'Straße', 'dima@example.com'),
+        ]:
+            RandomUser.objects.create(
+                first_name=first, last_name=last, email=email,
+                gender='male', phone='000-000-000', picture='',
+                location={}
+            )
+        self.assertEqual(self._search('Émile'), {'Émile'})
+        self.assertEqual(self._search('ÉMI öz'), {'Émile'})
+        self.assertEqual(self._search('дми'), {'Дмитрий'})
+        self.assertEqual(self._search('STRASS'), {'Дмитрий'})
+
+    def test_prefix_upper_bound(self):
+        """Верхняя граница префикса на краях диапазона Unicode."""
+        self.assertEqual(_prefix_upper_bound('abc'), 'abd')
+        self.assertEqual(_prefix_upper_bound('a\U0010ffff'), 'b')
+        self.assertIsNone(_prefix_upper_bound('\U0010ffff'))
+        self.assertEqual(_prefix_upper_bound('\ud7ff'), '\ue000')
+        self.assertEqual(self._search('\U0010ffff'), set())
+
+    def test_backfill_search_columns(self):
+        """Команда заполняет колонки поиска у старых записей."""
+        RandomUser.objects.update(
+            first_name_search='', last_name_search='', email_search=''
+        )
+        self.assertEqual(self._search('john'), set())
+
+        out = StringIO()
+        call_command('backfill_search_columns', stdout=out)
+
+        self.assertIn('Backfilled search columns for 4 users',
+                      out.getvalue())
+        cache.clear()
+        self.assertEqual(self._search('john'), {'John', 'Anna'})
+
+    def test_pagination_keeps_query(self):
+        """Ссылки пагинации сохраняют строку поиска."""
+        for i in range(12):
+            RandomUser.objects.create(
+                first_name=f'Joe{i}',
+                last_name='Test',
+                email=f'joe{i}@example.com',
+                gender='male',
+                phone='000-000-000',
+                picture='',
+                location={}
+            )
+        response = self.client.get(reverse('main'), {'q': 'joe'})
+        self.assertEqual(response.context['paginator'].count, 12)
+        self.assertContains(response, '?q=joe&amp;page=2')
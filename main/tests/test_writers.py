@@ -0,0 +1,128 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from main.models import RandomUser
+from main.writers import (
+    CONFLICT_UPDATE, EMPTY_RESULT, WriteResult, _LineStream,
+    bulk_write_users, copy_lines, copy_users
+)
+
+
+class WritersTest(TestCase):
+
+    def _user(self, **kwargs):
+        data = {
+            'gender': 'male',
+            'first_name': 'John',
+            'last_name': 'Doe',
+            'location': {'city': 'New York', 'country': 'USA'},
+            'email': 'john@example.com',
+            'phone': '123',
+            'picture': 'http://example.com/john.jpg',
+        }
+        data.update(kwargs)
+        user = RandomUser(**data)
+        user.sync_derived_columns()
+        return user
+
+    def _users(self, count):
+        return [
+            self._user(email=f'john{index}@example.com')
+            for index in range(count)
+        ]
+
+    @override_settings(RANDOM_USER_WRITE_BATCH_SIZE=2)
+    def test_batched_insert(self):
+        """Вне PostgreSQL пользователи пишутся порциями."""
+        # 1 запрос на поиск существующих ключей + 3 порции вставки
+        with self.assertNumQueries(4):
+            result = bulk_write_users(self._users(5))
+        self.assertEqual(result, WriteResult(5, 0, 0))
+        self.assertEqual(RandomUser.objects.count(), 5)
+
+    def test_empty(self):
+        """Пустой список ничего не пишет."""
+        with self.assertNumQueries(0):
+            self.assertEqual(bulk_write_users([]), EMPTY_RESULT)
+
+    def test_duplicates_skipped(self):
+        """Повторы внутри батча и уже сохранённые люди пропускаются."""
+        bulk_write_users([self._user()])
+        result = bulk_write_users(
+            [self._user(), self._user(email='JOHN@example.com ')]
+            + self._users(2)
+        )
+        self.assertEqual(result, WriteResult(2, 0, 2))
+        self.assertEqual(RandomUser.objects.count(), 3)
+
+    def test_duplicates_updated(self):
+        """В режиме update существующий человек обновляется."""
+        bulk_write_users([self._user(phone='123')])
+        result = bulk_write_users(
+            [self._user(phone='456')], conflict_mode=CONFLICT_UPDATE
+        )
+        self.assertEqual(result, WriteResult(0, 1, 0))
+        self.assertEqual(RandomUser.objects.get().phone, '456')
+
+    @override_settings(RANDOM_USER_CONFLICT_MODE='replace')
+    def test_invalid_conflict_mode(self):
+        """Неизвестный режим конфликтов — ошибка конфигурации."""
+        with self.assertRaises(ImproperlyConfigured):
+            bulk_write_users([self._user()])
+
+    def test_copy_lines_escaping(self):
+        """Текстовый формат COPY: экранирование и JSON."""
+        user = self._user(
+            first_name='Tab\there', last_name='Back\\slash',
+            location={'city': 'Line\nbreak'}
+        )
+        line = next(copy_lines([user]))
+        values = line.rstrip('\n').split('\t')
+        self.assertEqual(values[0], 'male')
+        self.assertEqual(values[1], 'Tab\\there')
+        self.assertEqual(values[2], 'Back\\\\slash')
+        self.assertEqual(values[3], '{"city": "Line\\\\nbreak"}')
+        self.assertEqual(line.count('\n'), 1)
+
+    def test_line_stream(self):
+        """Поток отдаёт строки кусками нужного размера."""
+        stream = _LineStream(['abc\n', 'de\n', 'f\n'])
+        self.assertEqual(stream.read(5), 'abc\nd')
+        self.assertEqual(stream.read(100), 'e\nf\n')
+        self.assertEqual(stream.read(10), '')
+
+    def test_copy_users(self):
+        """COPY во временную таблицу и перенос через ON CONFLICT."""
+        connection = MagicMock()
+        connection.ops.quote_name = lambda name: f'"{name}"'
+        raw_cursor = connection.cursor.return_value.__enter__.return_value
+        raw_cursor.fetchall.return_value = [(True,)]
+        captured = {}
+
+        def copy_expert(sql, stream):
+            captured['sql'] = sql
+            captured['data'] = stream.read()
+
+        raw_cursor.cursor.copy_expert.side_effect = copy_expert
+
+        result = copy_users([self._user(), self._user()], connection)
+
+        self.assertEqual(result, WriteResult(1, 0, 1))
+        self.assertTrue(captured['sql'].startswith(
+            'COPY "main_randomuser_staging" ("gender", "first_name"'
+        ))
+        self.assertTrue(captured['sql'].endswith('FROM STDIN'))
+        self.assertEqual(captured['data'].count('\n'), 2)
+        insert_sql = raw_cursor.execute.call_args_list[-1].args[0]
+        self.assertIn('ON CONFLICT ("dedup_key") DO NOTHING', insert_sql)
+
+    @patch('main.writers.copy_users', return_value=WriteResult(3, 0, 0))
+    def test_postgresql_uses_copy(self, mock_copy):
+        """В PostgreSQL выбирается COPY."""
+        with patch('main.writers.connection') as connection:
+            connection.vendor = 'postgresql'
+            result = bulk_write_users([self._user()] * 3)
+        self.assertEqual(result.inserted, 3)
+        mock_copy.assert_called_once()
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import os
+import threading
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Sum
+from django.urls import reverse
+from django.utils import timezone
+
+from main import metrics
+from main.models import Counter, Thumbnail
+
+logger = logging.getLogger(__name__)
+
+SIGNING_SALT = 'main.thumbnails'
+# last_used_at обновляется не чаще, чтобы отдача фото не писала в DB
+# на каждый запрос
+TOUCH_INTERVAL = timedelta(hours=1)
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_signer = signing.Signer(salt=SIGNING_SALT)
+_evict_lock = threading.Lock()
+
+
+class ThumbnailError(Exception):
+    """Фото не удалось скачать или оно не похоже на картинку."""
+
+
+def get_thumbnail_dir():
+    default = os.path.join(settings.BASE_DIR, 'thumbnails')
+    return str(getattr(settings, 'THUMBNAIL_DIR', default))
+
+
+def url_key(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+def file_path(digest):
+    return os.path.join(get_thumbnail_dir(), digest[:2], digest)
+
+
+def proxy_url(url):
+    """
+    Адрес фото через эндпоинт приложения. В пути лежит подписанный
+    исходный адрес: эндпоинт не скачивает произвольные ссылки, а путь
+    для одного адреса всегда один и тот же, поэтому кэшируется навсегда.
+    При THUMBNAIL_PROXY=False возвращается исходный адрес.
+    """
+    if not url or not getattr(settings, 'THUMBNAIL_PROXY', True):
+        return url
+    token = _signer.sign_object(url, compress=True)
+    return reverse('thumbnail', kwargs={'token': token})
+
+
+def unsign(token):
+    """Исходный адрес из пути proxy_url (BadSignature для чужих путей)."""
+    return _signer.unsign_object(token)
+
+
+def get_or_fetch(url):
+    """
+    Thumbnail для адреса фото: из локального хранилища или только что
+    скачанный. Выбрасывает ThumbnailError, если фото не скачалось.
+    """
+    thumbnail = Thumbnail.objects.filter(url_key=url_key(url)).first()
+    if thumbnail is not None and os.path.exists(file_path(thumbnail.digest)):
+        metrics.THUMBNAIL_REQUESTS.inc(result='hit')
+        touch(thumbnail)
+        return thumbnail
+    metrics.THUMBNAIL_REQUESTS.inc(result='miss')
+    return fetch(url)
+
+
+def touch(thumbnail):
+    now = timezone.now()
+    if now - thumbnail.last_used_at >= TOUCH_INTERVAL:
+        Thumbnail.objects.filter(pk=thumbnail.pk).update(last_used_at=now)
+        thumbnail.last_used_at = now
+
+
+def fetch(url):
+    """
+    Скачивает фото в хранилище. Новые файлы увеличивают счётчик объёма
+    хранилища, и старые фото вытесняются, только когда он больше
+    THUMBNAIL_CACHE_MAX_BYTES, а не после каждого скачивания.
+    """
+    content, content_type = download(url)
+    digest = hashlib.sha256(content).hexdigest()
+    path = file_path(digest)
+    added = not os.path.exists(path)
+    if added:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    key = url_key(url)
+    try:
+        with transaction.atomic():
+            thumbnail, _ = Thumbnail.objects.update_or_create(
+                url_key=key,
+                defaults={
+                    'url': url,
+                    'digest': digest,
+                    'size': len(content),
+                    'content_type': content_type,
+                    'last_used_at': timezone.now(),
+                },
+            )
+    except IntegrityError:
+        # Тот же адрес одновременно скачал другой запрос: его строка
+        # уже записана
+        thumbnail = Thumbnail.objects.get(url_key=key)
+    if added:
+        Counter.objects.increment(
+            Counter.THUMBNAIL_BYTES, len(content), initial=stored_bytes
+        )
+        total = Counter.objects.get_value(Counter.THUMBNAIL_BYTES)
+        if total > _max_bytes():
+            evict()
+    return thumbnail
+
+
+def download(url):
+    """
+    Скачивает картинку не больше THUMBNAIL_MAX_BYTES.
+    Возвращает (содержимое, Content-Type).
+    """
+    max_bytes = getattr(settings, 'THUMBNAIL_MAX_BYTES', 1024 * 1024)
+    timeout = getattr(settings, 'THUMBNAIL_FETCH_TIMEOUT', 5)
+    try:
+        with requests.get(url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '')
+            if not content_type.startswith('image/'):
+                raise ThumbnailError(
+                    f"{url} is not an image ({content_type or 'no type'})"
+                )
+            content = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                content += chunk
+                if len(content) > max_bytes:
+                    raise ThumbnailError(
+                        f"{url} is larger than {max_bytes} bytes"
+                    )
+    except requests.RequestException as e:
+        raise ThumbnailError(f"Failed to download {url}: {e}") from e
+    return bytes(content), content_type.split(';')[0].strip()
+
+
+def _max_bytes():
+    return getattr(settings, 'THUMBNAIL_CACHE_MAX_BYTES', 100 * 1024 * 1024)
+
+
+def stored_bytes():
+    """Точный объём хранилища: по файлу на содержимое."""
+    sizes = Thumbnail.objects.values('digest').annotate(size=Max('size'))
+    return sizes.aggregate(total=Sum('size'))['total'] or 0
+
+
+def evict(max_bytes=None):
+    """
+    Удаляет давно не использованные фото, пока хранилище больше
+    THUMBNAIL_CACHE_MAX_BYTES, и записывает в счётчик точный
+    оставшийся объём (счётчик — оценка: одновременные скачивания
+    одного файла учитываются дважды). Возвращает число удалённых
+    файлов.
+    """
+    if max_bytes is None:
+        max_bytes = _max_bytes()
+    with _evict_lock:
+        # Один файл на содержимое, сколько бы адресов на него ни ссылалось
+        files = list(
+            Thumbnail.objects.values('digest')
+            .annotate(size=Max('size'), used=Max('last_used_at'))
+            .order_by('used')
+        )
+        total = sum(item['size'] for item in files)
+        evicted = 0
+        for item in files:
+            if total <= max_bytes:
+                break
+            Thumbnail.objects.filter(digest=item['digest']).delete()
+            try:
+                os.remove(file_path(item['digest']))
+            except FileNotFoundError:
+                pass
+            total -= item['size']
+            evicted += 1
+        Counter.objects.update_or_create(
+            name=Counter.THUMBNAIL_BYTES, defaults={'value': total}
+        )
+    if evicted:
+        logger.info(f"Evicted {evicted} thumbnails, {total} bytes left")
+    return evicted
@@ -1,4 +1,4 @@
-from . import views
+from . import api_views, views
 from django.urls import path
 
 
@@ -6,4 +6,37 @@ urlpatterns = [
     path('', views.UsersView.as_view(), name='main'),
     path('<int:user_pk>/', views.ShowUserView.as_view(), name='user'),
     path('random/', views.RandomUserView.as_view(), name='random_user'),
+    path('metrics', views.MetricsView.as_view(), name='metrics'),
+    path(
+        'thumbnails/<str:token>/', views.ThumbnailView.as_view(),
+        name='thumbnail'
+    ),
+    path(
+        'api/users/', api_views.UserListAPIView.as_view(),
+        name='api_users'
+    ),
+    path(
+        'api/users/<int:user_pk>/', api_views.UserDetailAPIView.as_view(),
+        name='api_user'
+    ),
+    path(
+        'api/users/random/', api_views.RandomUserAPIView.as_view(),
+        name='api_random_user'
+    ),
+    path(
+        'api/users/nearby/', api_views.NearbyUsersAPIView.as_view(),
+        name='api_users_nearby'
+    ),
+    path(
+        'api/users/stats/', api_views.UserStatsAPIView.as_view(),
+        name='api_users_stats'
+    ),
+    path(
+        'api/users/stream/', api_views.UserStreamView.as_view(),
+        name='api_users_stream'
+    ),
+    path(
+        'api/jobs/<int:job_pk>/', api_views.IngestionJobAPIView.as_view(),
+        name='ingestion_job'
+    ),
 ]
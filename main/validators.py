@@ -0,0 +1,152 @@
+import json
+import re
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import get_error_detail
+
+from main.serializers import RandomUserSerializer
+
+# Строгие подмножества того, что принимают EmailValidator и URLValidator
+# Django: всё, что подходит под эти выражения, заведомо валидно.
+# Остальное проверяется полноценными полями сериализатора.
+_FAST_EMAIL = re.compile(
+    r'[A-Za-z0-9_%+-]+(?:\.[A-Za-z0-9_%+-]+)*'
+    r'@(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}'
+)
+_FAST_URL = re.compile(
+    r'https?://(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+'
+    r'[A-Za-z]{2,63}(?:/[A-Za-z0-9._~%/-]*)?'
+)
+# Символы, на которые ругаются ProhibitNullCharactersValidator
+# и ProhibitSurrogateCharactersValidator.
+_PROHIBITED_CHARS = re.compile('[\x00\ud800-\udfff]')
+
+
+class RandomUserBatchValidator:
+    """
+    Быстрая пакетная валидация записей внешнего API randomuser.me.
+
+    Принимает и отклоняет ровно те же записи, что и RandomUserSerializer,
+    с теми же сообщениями об ошибках, но не создаёт сериализатор на
+    каждую запись: типичные значения проверяются заранее
+    скомпилированными проверками, а нетипичные передаются тем же
+    полям DRF, что использует сериализатор.
+    """
+
+    REQUIRED_FIELDS = [
+        'gender', 'name', 'phone', 'email', 'location', 'picture'
+    ]
+    NESTED_FIELDS = [
+        ('name', ['first', 'last']),
+        ('picture', ['thumbnail']),
+    ]
+
+    def __init__(self):
+        self._serializer = RandomUserSerializer()
+        self._fields = self._serializer.fields
+        self._max_lengths = {
+            name: self._fields[name].max_length
+            for name in (
+                'gender', 'first_name', 'last_name', 'phone', 'email',
+                'picture'
+            )
+        }
+        self._patterns = {'email': _FAST_EMAIL, 'picture': _FAST_URL}
+
+    def validate(self, records):
+        """
+        Проверяет список записей за один проход.
+        Возвращает (validated, errors): список validated_data в формате
+        модели RandomUser и список пар (индекс записи, ValidationError).
+        """
+        validated = []
+        errors = []
+        for index, record in enumerate(records):
+            try:
+                validated.append(self.validate_one(record))
+            except ValidationError as e:
+                errors.append((index, e))
+        return validated, errors
+
+    def validate_one(self, record):
+        """
+        Проверяет одну запись и возвращает validated_data
+        либо выбрасывает ValidationError как сериализатор.
+        """
+        if type(record) is not dict:
+            return self._validate_with_serializer(record)
+
+        missing = [f for f in self.REQUIRED_FIELDS if f not in record]
+        if missing:
+            raise ValidationError(
+                {field: ["This field is required."] for field in missing}
+            )
+        for field_name, required_keys in self.NESTED_FIELDS:
+            self._serializer._validate_nested_field(
+                record, field_name, required_keys
+            )
+
+        name = record['name']
+        values = {
+            'gender': record['gender'],
+            'first_name': name['first'],
+            'last_name': name['last'],
+            'phone': record['phone'],
+            'email': record['email'],
+            'location': record['location'],
+            'picture': record['picture']['thumbnail'],
+        }
+
+        result = {}
+        field_errors = {}
+        for field_name, value in values.items():
+            try:
+                result[field_name] = self._validate_field(field_name, value)
+            except ValidationError as e:
+                field_errors[field_name] = e.detail
+            except DjangoValidationError as e:
+                field_errors[field_name] = get_error_detail(e)
+        if field_errors:
+            raise ValidationError(field_errors)
+        return result
+
+    def _validate_field(self, field_name, value):
+        if field_name == 'location':
+            if type(value) is dict:
+                try:
+                    json.dumps(value)
+                    return value
+                except (TypeError, ValueError):
+                    pass
+            return self._validate_with_field(field_name, value)
+
+        if type(value) is str and not _PROHIBITED_CHARS.search(value):
+            stripped = value.strip()
+            pattern = self._patterns.get(field_name)
+            if (
+                stripped
+                and len(stripped) <= self._max_lengths[field_name]
+                and (pattern is None or pattern.fullmatch(stripped))
+            ):
+                return stripped
+        return self._validate_with_field(field_name, value)
+
+    def _validate_with_field(self, field_name, value):
+        """
+        Медленный путь: то же поле DRF и метод validate_<field>,
+        что вызывает RandomUserSerializer.to_internal_value.
+        """
+        value = self._fields[field_name].run_validation(value)
+        validate_method = getattr(
+            self._serializer, f'validate_{field_name}', None
+        )
+        if validate_method is not None:
+            value = validate_method(value)
+        return value
+
+    def _validate_with_serializer(self, record):
+        """Полная проверка сериализатором для нестандартных входных данных."""
+        serializer = RandomUserSerializer(data=record)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
@@ -1,14 +1,27 @@
 import logging
-import random
 
-from django.http import Http404
+from django.conf import settings
+from django.core import signing
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+    HttpResponseRedirect,
+)
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
-from django.views.generic import ListView, DetailView
+from django.utils.functional import cached_property
+from django.utils.safestring import mark_safe
+from django.views.generic import DetailView, ListView, View
 from django.views.generic.edit import FormMixin
 
-from main.forms import FormNumber
-from main.models import RandomUser
-from main.services import RandomUserService
+from main import facets, geo, metrics, thumbnails
+from main.forms import FacetForm, FormNumber, SearchForm
+from main.counts import get_user_count
+from main.jobs import enqueue_ingestion
+from main.middleware import timed_render
+from main.models import IngestionJob, RandomUser
+from main.page_cache import VersionedCacheMixin, cached_fragment
+from main.pagination import CountedPaginator, CursorPaginator
+from main.search import search_users
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +34,7 @@ class UsersView(FormMixin, ListView):
     form_class = FormNumber
     success_url = reverse_lazy('main')
     paginate_by = 10
+    paginator_class = CountedPaginator
 
     def post(self, request, *args, **kwargs):
         """Обрабатывает POST-запрос с формой."""
@@ -32,26 +46,148 @@ class UsersView(FormMixin, ListView):
             return self.form_invalid(form)
 
     def form_valid(self, form):
-        """Обрабатывает валидную форму и загружает пользователей."""
+        """
+        Обрабатывает валидную форму: ставит загрузку пользователей
+        в очередь воркера и сразу возвращает редирект.
+        """
         number = form.cleaned_data['number']
-        RandomUserService().load_initial_users(total=number)
+        enqueue_ingestion(number)
         return super().form_valid(form)
 
     def get_queryset(self):
         """
         Возвращает queryset пользователей, отсортированных по id.
-        Используется для отображения на странице списка.
+        Используется для отображения на странице списка, поэтому
+        выбирает только колонки, которые выводит таблица.
+        """
+        queryset = RandomUser.displayed.only(*RandomUser.LIST_FIELDS)
+        if self.facet_filters:
+            # Индексы (gender, id) и (country, gender, id) отдают
+            # отфильтрованные строки уже в порядке -pk
+            queryset = queryset.filter(**self.facet_filters)
+        if self.search_query:
+            queryset = search_users(queryset, self.search_query)
+        return queryset
+
+    @cached_property
+    def search_form(self):
+        return SearchForm(self.request.GET or None)
+
+    @cached_property
+    def search_query(self):
+        """Строка поиска из параметра ?q= (пустая, если поиска нет)."""
+        if self.search_form.is_valid():
+            return self.search_form.cleaned_data['q'].strip()
+        return ''
+
+    @cached_property
+    def facet_filters(self):
+        """Выбранные фильтры {колонка: значение} из ?gender=&country=."""
+        form = FacetForm(self.request.GET or None)
+        if not form.is_valid():
+            return {}
+        return {
+            field: form.cleaned_data[field]
+            for field in facets.FACET_FIELDS if form.cleaned_data[field]
+        }
+
+    def get_total_count(self):
+        """
+        Оценка общего числа пользователей из провайдера USER_COUNT_MODE
+        вместо COUNT(*) по queryset, с фильтрами — из кэша фасетов.
+        Пагинатор выбирает строки страницы без опоры на неё, поэтому
+        отставшая статистика не прячет записи. При поиске считаются
+        найденные записи.
+        """
+        if self.search_query:
+            return None
+        if self.facet_filters:
+            return facets.filtered_count(**self.facet_filters)
+        return get_user_count()
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return super().get_paginator(
+            queryset, per_page, count=self.get_total_count(), **kwargs
+        )
+
+    @property
+    def cursor_pagination(self):
+        return getattr(settings, 'USER_LIST_PAGINATION', 'offset') == 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        В режиме cursor страница выбирается по курсорам ?after=/?before=
+        вместо номера страницы ?page=.
         """
-        return RandomUser.displayed.all()
+        if not self.cursor_pagination:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(
+            queryset, page_size, count=self.get_total_count()
+        )
+        page = paginator.page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        """
+        Форма загрузки (с csrf_token посетителя) и панель заданий
+        строятся на каждый запрос, а поиск, таблица и пагинация берутся
+        из кэша по версии набора пользователей.
+        """
+        listing = cached_fragment(
+            self.request, 'users', lambda: self.render_listing(**kwargs)
+        )
+        kwargs.setdefault('view', self)
+        kwargs.setdefault('form', self.get_form())
+        kwargs['user_table'] = mark_safe(listing['html'])
+        kwargs['user_total'] = listing['total']
+        kwargs['ingestion_jobs'] = IngestionJob.objects.order_by('-pk')[:5]
+        return kwargs
+
+    def render_listing(self, **kwargs):
+        """HTML поиска, таблицы и пагинации и общее число записей."""
+        context = super().get_context_data(**kwargs)
+        context['cursor_pagination'] = self.cursor_pagination
+        context['search_form'] = self.search_form
+        context['search_query'] = self.search_query
+        context['facet_filters'] = self.facet_filters
+        context['facets'] = facets.facet_options(**self.facet_filters)
+        # Параметры, которые нужно сохранить в ссылках пагинации
+        params = self.request.GET.copy()
+        for key in ('page', 'after', 'before'):
+            params.pop(key, None)
+        context['page_query'] = f'{params.urlencode()}&' if params else ''
+        with timed_render(self.request):
+            html = render_to_string(
+                'main/user_table.html', context, self.request
+            )
+        return {'html': html, 'total': context['paginator'].count}
 
 
-class ShowUserView(DetailView):
-    """Отображает профиль пользователя по pk из URL."""
+class ShowUserView(VersionedCacheMixin, DetailView):
+    """
+    Отображает профиль пользователя по pk из URL
+    и ближайших к нему пользователей.
+    """
     model = RandomUser
     template_name = 'main/user.html'
     pk_url_kwarg = 'user_pk'
     context_object_name = 'user'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        user = self.object
+        context['nearby_users'] = geo.nearest(
+            user.latitude, user.longitude,
+            k=getattr(settings, 'NEARBY_USERS_COUNT', 5),
+            queryset=RandomUser.objects.exclude(pk=user.pk).only(
+                *RandomUser.LIST_FIELDS
+            ),
+        )
+        return context
+
 
 class RandomUserView(DetailView):
     """Отображает случайного пользователя из DB."""
@@ -62,11 +198,51 @@ class RandomUserView(DetailView):
     def get_object(self, queryset=None):
         """Метод для получения случайного объекта пользователя."""
         try:
-            ids = list(RandomUser.objects.values_list('id', flat=True))
-            if not ids:
+            users = RandomUser.objects.random()
+            if not users:
                 raise Http404("No users available")
-            random_id = random.choice(ids)
-            return RandomUser.objects.get(pk=random_id)
+            return users[0]
         except Exception as e:
             logger.error(f"Database error: {e}")
             raise Http404("No users available")
+
+
+class MetricsView(View):
+    """Метрики загрузки и запросов в текстовом формате Prometheus."""
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE
+        )
+
+
+class ThumbnailView(View):
+    """
+    Фото пользователя из локального хранилища (main.thumbnails):
+    при первом запросе скачивается, дальше отдаётся с диска с ETag
+    по содержимому и вечным Cache-Control. Если фото не скачалось,
+    браузер перенаправляется на исходный адрес.
+    """
+
+    def get(self, request, token):
+        try:
+            url = thumbnails.unsign(token)
+        except signing.BadSignature:
+            raise Http404("Unknown thumbnail")
+        try:
+            thumbnail = thumbnails.get_or_fetch(url)
+            etag = f'"{thumbnail.digest}"'
+            if etag in request.headers.get('If-None-Match', ''):
+                response = HttpResponseNotModified()
+            else:
+                response = FileResponse(
+                    open(thumbnails.file_path(thumbnail.digest), 'rb'),
+                    content_type=thumbnail.content_type
+                )
+        except (thumbnails.ThumbnailError, OSError) as e:
+            logger.warning(f"Thumbnail unavailable: {e}")
+            metrics.THUMBNAIL_REQUESTS.inc(result='error')
+            return HttpResponseRedirect(url)
+        response['ETag'] = etag
+        response['Cache-Control'] = thumbnails.CACHE_CONTROL
+        return response
@@ -0,0 +1,276 @@
+import itertools
+import json
+import operator
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, models
+
+from main.models import RandomUser
+
+DEFAULT_WRITE_BATCH_SIZE = 100
+# Сколько ключей проверять одним запросом (лимит параметров SQLite)
+KEY_LOOKUP_BATCH_SIZE = 500
+
+CONFLICT_IGNORE = 'ignore'
+CONFLICT_UPDATE = 'update'
+# Поля, обновляемые у уже существующего человека в режиме update
+UPDATE_FIELDS = (
+    'gender', 'first_name', 'last_name', 'location', 'email', 'phone',
+    'picture', 'city', 'country', 'latitude', 'longitude', 'geo_cell',
+    'first_name_search', 'last_name_search', 'email_search',
+)
+
+
+class WriteResult(namedtuple('WriteResult', 'inserted updated skipped')):
+    """Итог записи: новые строки, обновлённые и пропущенные дубликаты."""
+
+    def __add__(self, other):
+        return WriteResult(*(a + b for a, b in zip(self, other)))
+
+
+EMPTY_RESULT = WriteResult(0, 0, 0)
+
+
+def get_conflict_mode():
+    """
+    Что делать с уже существующим человеком (тот же dedup_key):
+    'ignore' — пропустить, 'update' — обновить данными из API.
+    """
+    mode = getattr(settings, 'RANDOM_USER_CONFLICT_MODE', CONFLICT_IGNORE)
+    if mode not in (CONFLICT_IGNORE, CONFLICT_UPDATE):
+        raise ImproperlyConfigured(
+            f"RANDOM_USER_CONFLICT_MODE must be 'ignore' or 'update', "
+            f"got {mode!r}"
+        )
+    return mode
+
+
+def bulk_write_users(users, conflict_mode=None, existing_keys=None):
+    """
+    Записывает несохранённые объекты RandomUser самым быстрым способом
+    для текущей базы. Повторы по dedup_key не создают новых строк:
+    они пропускаются или обновляют существующие (conflict_mode).
+    В PostgreSQL строки передаются потоком через COPY ... FROM STDIN,
+    в SQLite — executemany порциями (insert_users), в остальных базах —
+    bulk_create порциями. Если вызывающий код уже
+    выбрал существующие dedup_key батча, их можно передать в
+    existing_keys вместо повторного запроса. Транзакцией управляет
+    вызывающий код. Возвращает WriteResult.
+    """
+    if not users:
+        return EMPTY_RESULT
+    if conflict_mode is None:
+        conflict_mode = get_conflict_mode()
+    if connection.vendor == 'postgresql':
+        return copy_users(users, connection, conflict_mode)
+
+    unique, duplicates = _unique_by_key(users)
+    if existing_keys is None:
+        existing = _existing_keys([user.dedup_key for user in unique])
+    else:
+        existing = {
+            user.dedup_key for user in unique
+            if user.dedup_key in existing_keys
+        }
+    if connection.vendor == 'sqlite':
+        insert_users(unique, connection, conflict_mode)
+    elif conflict_mode == CONFLICT_UPDATE:
+        RandomUser.objects.bulk_create(
+            unique, batch_size=_write_batch_size(), update_conflicts=True,
+            unique_fields=['dedup_key'], update_fields=UPDATE_FIELDS
+        )
+    else:
+        RandomUser.objects.bulk_create(
+            unique, batch_size=_write_batch_size(), ignore_conflicts=True
+        )
+    if conflict_mode == CONFLICT_UPDATE:
+        updated, skipped = len(existing), duplicates
+    else:
+        updated, skipped = 0, duplicates + len(existing)
+    return WriteResult(len(unique) - len(existing), updated, skipped)
+
+
+def _write_batch_size():
+    return getattr(
+        settings, 'RANDOM_USER_WRITE_BATCH_SIZE', DEFAULT_WRITE_BATCH_SIZE
+    )
+
+
+def _unique_by_key(users):
+    """Оставляет по одному объекту на dedup_key внутри батча."""
+    seen = set()
+    unique = []
+    for user in users:
+        if user.dedup_key is None:
+            user.sync_dedup_key()
+        if user.dedup_key not in seen:
+            seen.add(user.dedup_key)
+            unique.append(user)
+    return unique, len(users) - len(unique)
+
+
+def _existing_keys(keys):
+    existing = set()
+    for start in range(0, len(keys), KEY_LOOKUP_BATCH_SIZE):
+        existing.update(
+            RandomUser.objects.filter(
+                dedup_key__in=keys[start:start + KEY_LOOKUP_BATCH_SIZE]
+            ).values_list('dedup_key', flat=True)
+        )
+    return existing
+
+
+def _copy_fields():
+    return [
+        field for field in RandomUser._meta.concrete_fields
+        if not field.primary_key
+    ]
+
+
+def _on_conflict(quote, conflict_mode):
+    """ON CONFLICT по dedup_key (одинаково в PostgreSQL и SQLite)."""
+    if conflict_mode != CONFLICT_UPDATE:
+        return f'ON CONFLICT ({quote("dedup_key")}) DO NOTHING'
+    assignments = ', '.join(
+        f'{quote(name)} = EXCLUDED.{quote(name)}' for name in UPDATE_FIELDS
+    )
+    return f'ON CONFLICT ({quote("dedup_key")}) DO UPDATE SET {assignments}'
+
+
+def insert_rows(users, fields):
+    """Строки значений колонок для executemany, JSON — текстом."""
+    getter = operator.attrgetter(*(field.attname for field in fields))
+    json_columns = [
+        (index, field.encoder) for index, field in enumerate(fields)
+        if isinstance(field, models.JSONField)
+    ]
+    for user in users:
+        row = list(getter(user))
+        for index, encoder in json_columns:
+            if row[index] is not None:
+                row[index] = json.dumps(row[index], cls=encoder)
+        yield row
+
+
+def insert_users(users, connection=connection,
+                 conflict_mode=CONFLICT_IGNORE):
+    """
+    Вставляет пользователей через executemany с INSERT ... ON CONFLICT
+    по dedup_key (SQLite). В отличие от bulk_create значения не
+    проходят подготовку ORM по одному полю, которая на широкой таблице
+    занимала большую часть записи. Порции по RANDOM_USER_WRITE_BATCH_SIZE
+    строк ограничивают память: обёртка курсора Django держит в памяти
+    все строки одного executemany. Объекты не получают pk.
+    """
+    fields = _copy_fields()
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = (
+        f'INSERT INTO {quote(RandomUser._meta.db_table)} ({columns}) '
+        f'VALUES ({placeholders}) {_on_conflict(quote, conflict_mode)}'
+    )
+    rows = insert_rows(users, fields)
+    batch_size = _write_batch_size()
+    with connection.cursor() as cursor:
+        while batch := list(itertools.islice(rows, batch_size)):
+            cursor.executemany(sql, batch)
+
+
+def _escape(value):
+    """Экранирование значения для текстового формата COPY."""
+    return (
+        value.replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def copy_lines(users, fields=None):
+    """
+    Строки в текстовом формате COPY: значения через табуляцию,
+    NULL как \\N, JSON-поля сериализуются в текст.
+    """
+    fields = fields or _copy_fields()
+    for user in users:
+        values = []
+        for field in fields:
+            value = getattr(user, field.attname)
+            if value is None:
+                values.append('\\N')
+            elif isinstance(field, models.JSONField):
+                values.append(_escape(json.dumps(value, cls=field.encoder)))
+            elif isinstance(value, bool):
+                values.append('t' if value else 'f')
+            else:
+                values.append(_escape(str(value)))
+        yield '\t'.join(values) + '\n'
+
+
+class _LineStream:
+    """Файловый объект, читающий строки из итератора по мере надобности."""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        if not self._buffer:
+            self._buffer = next(self._lines, '')
+        line, self._buffer = self._buffer, ''
+        return line
+
+
+def copy_users(users, connection=connection, conflict_mode=CONFLICT_IGNORE):
+    """
+    Вставляет пользователей через COPY (psycopg2). COPY не умеет
+    ON CONFLICT, поэтому строки сначала копируются во временную таблицу,
+    а затем переносятся одним INSERT ... SELECT ... ON CONFLICT
+    по dedup_key. RETURNING (xmax = 0) отличает вставленные строки
+    от обновлённых. Объекты не получают pk.
+    """
+    fields = _copy_fields()
+    quote = connection.ops.quote_name
+    table = quote(RandomUser._meta.db_table)
+    staging = quote(f'{RandomUser._meta.db_table}_staging')
+    columns = ', '.join(quote(field.column) for field in fields)
+    key = quote('dedup_key')
+
+    for user in users:
+        if user.dedup_key is None:
+            user.sync_dedup_key()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE IF NOT EXISTS {staging} '
+            f'ON COMMIT DELETE ROWS AS '
+            f'SELECT {columns} FROM {table} WITH NO DATA'
+        )
+        cursor.execute(f'TRUNCATE {staging}')
+        cursor.cursor.copy_expert(
+            f'COPY {staging} ({columns}) FROM STDIN',
+            _LineStream(copy_lines(users, fields))
+        )
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) '
+            f'SELECT DISTINCT ON ({key}) {columns} FROM {staging} '
+            f'{_on_conflict(quote, conflict_mode)} '
+            f'RETURNING (xmax = 0)'
+        )
+        flags = [row[0] for row in cursor.fetchall()]
+
+    inserted = sum(flags)
+    updated = len(flags) - inserted
+    return WriteResult(inserted, updated, len(users) - len(flags))